@@ -37,7 +37,9 @@ def debug_export():
         snippet_concepts = comment_detector.detect_educational_concepts(sample_snippet.content)
         print(f"Conceptos resultado: {type(snippet_concepts)} = {snippet_concepts}")
         
-        educational_context = educational_classifier.classify_snippet(sample_snippet)
+        educational_context = educational_classifier.classify_snippet(
+            sample_snippet, snippet_comments, snippet_concepts
+        )
         print(f"Educational context: {type(educational_context)} = {educational_context}")
         
         # Convertir EducationalContext a dict
@@ -235,7 +235,9 @@ class TheWayExporter:
             # Análisis educativo del snippet
             snippet_comments = self.comment_detector.detect_educational_comments(snippet.content)
             snippet_concepts = self.comment_detector.detect_educational_concepts(snippet.content)
-            educational_context = self.educational_classifier.classify_snippet(snippet)
+            educational_context = self.educational_classifier.classify_snippet(
+                snippet, snippet_comments, snippet_concepts
+            )
             
             # Convertir EducationalContext a dict
             educational_data = {
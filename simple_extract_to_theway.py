@@ -203,7 +203,7 @@ class SimpleTheWayExporter:
         for snippet in snippets:
             # Análisis educativo
             concepts = self.comment_detector.detect_educational_concepts(snippet.content)
-            educational_context = self.educational_classifier.classify_snippet(snippet)
+            educational_context = self.educational_classifier.classify_snippet(snippet, concepts=concepts)
             educational_data = {
                 'educational_level': educational_context.level.value,
                 'difficulty': educational_context.difficulty_score,
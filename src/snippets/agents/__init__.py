@@ -26,6 +26,7 @@ from .context_analyzer import ContextAnalyzer
 from .llm_client import (
     get_llm_client,
     GroqLLMClient,
+    BatchedLLMClient,
     LLMConfig,
     LLMResponse,
     TokenUsage
@@ -44,6 +45,7 @@ __all__ = [
     # LLM Client
     'get_llm_client',
     'GroqLLMClient',
+    'BatchedLLMClient',
     'LLMConfig',
     'LLMResponse',
     'TokenUsage',
@@ -22,7 +22,7 @@ logging.basicConfig(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class Snippet:
     """Estructura de datos para un snippet de código"""
     content: str
@@ -160,6 +160,9 @@ class BaseAgent(ABC):
         for attempt in range(self.max_retries):
             try:
                 return await asyncio.wait_for(coro, timeout=self.timeout_seconds)
+            except asyncio.CancelledError:
+                # La cancelación la decide quien lanzó la tarea: no reintentar
+                raise
             except asyncio.TimeoutError:
                 last_exception = f"Timeout after {self.timeout_seconds}s"
                 self.logger.warning(f"Attempt {attempt + 1} timed out")
@@ -8,13 +8,43 @@ de referencia Python para mejorar la extracción y contextualización de código
 
 import re
 import ast
-from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from typing import ClassVar, Dict, Iterator, List, Any, Optional, Pattern, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from .base_agent import Snippet, AgentResult
 
 
+# Comentario en una línea y métricas de complejidad (compilados una sola vez)
+_COMMENT_RE = re.compile(r'#(.+)')
+_COMPLEXITY_RES = tuple(re.compile(pattern) for pattern in (
+    r'\bif\b', r'\bfor\b', r'\bwhile\b', r'\btry\b',  # Estructuras de control
+    r'\bdef\s+', r'\bclass\s+',  # Definiciones
+))
+# Campos con listas de sentencias, en el mismo orden que ast.iter_child_nodes
+_STATEMENT_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+# Conceptos que penalizan la dificultad
+_ADVANCED_CONCEPTS = frozenset({'classes', 'inheritance', 'decorators', 'exceptions', 'metaclasses'})
+
+
+def _walk_statements(tree: ast.AST) -> Iterator[ast.AST]:
+    """
+    Recorre el árbol en el mismo orden que ast.walk pero solo por sentencias.
+    
+    Una clase solo puede definirse como sentencia, así que no hace falta bajar
+    a las expresiones, que son la mayoría de los nodos.
+    """
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        for field in _STATEMENT_FIELDS:
+            children = getattr(node, field, None)
+            if children:
+                todo.extend(children)
+        yield node
+
+
 class EducationalLevel(Enum):
     """Niveles educativos de código"""
     BEGINNER = "beginner"      # Variables, tipos básicos, operadores
@@ -45,56 +75,76 @@ class EducationalContext:
     comment_quality: float
     
 
+# Patrones para identificar diferentes tipos de comentarios
+_COMMENT_PATTERNS = {
+    CommentType.EXPLANATION: (
+        r"#\s*[Ee]sta?\s+(es|función|método)",
+        r"#\s*[Aa]quí",
+        r"#\s*[Ll]a\s+siguiente",
+        r"#\s*[Ee]sto\s+(hace|sirve|es)",
+        r"#\s*[Pp]ara\s+",
+        r"#\s*[Cc]on\s+este",
+    ),
+    CommentType.EXAMPLE: (
+        r"#\s*[Ee]jemplo",
+        r"#\s*[Pp]or\s+ejemplo",
+        r"#\s*[Cc]omo\s+este",
+        r"#\s*[Uu]so:",
+    ),
+    CommentType.OUTPUT: (
+        r"#\s*[Rr]esultado:",
+        r"#\s*[Ss]alida:",
+        r"#\s*[Oo]utput:",
+        r"#\s*[Dd]evuelve:",
+        r"#\s*[Ii]mprime:",
+        r"#\s*\s*\[.*\]",  # Listas como output
+        r"#\s*\s*\{.*\}",  # Diccionarios como output
+    ),
+    CommentType.WARNING: (
+        r"#\s*[Cc]uidado",
+        r"#\s*[Aa]tención",
+        r"#\s*[Nn][Oo][Tt][Aa]:",
+        r"#\s*[Ii]mportante",
+        r"#\s*[Nn]o\s+se\s+puede",
+    ),
+}
+
+# Patrones para detectar conceptos educativos
+_CONCEPT_PATTERNS = {
+    # r'\w\s*=' encuentra lo mismo que r'\w+\s*=\s*' sin reintentar cada sufijo de la palabra
+    'variables': (r'\w\s*=', r'variable', r'valor'),
+    'functions': (r'def\s+\w+', r'función', r'función'),
+    'classes': (r'class\s+\w+', r'clase', r'objeto'),
+    'loops': (r'for\s+\w+\s+in', r'while', r'bucle', r'iteración'),
+    'conditionals': (r'if\s+', r'elif', r'else', r'condicional'),
+    'lists': (r'\[.*\]', r'lista', r'append', r'índice'),
+    'dictionaries': (r'\{.*\}', r'diccionario', r'clave', r'valor'),
+    'strings': (r'["\'].*["\']', r'cadena', r'string', r'texto'),
+    'imports': (r'import\s+', r'from\s+.*\s+import', r'módulo'),
+}
+
+
 class CommentContextDetector:
     """Detecta y contextualiza comentarios explicativos en código educativo"""
     
-    def __init__(self):
-        # Patrones para identificar diferentes tipos de comentarios
-        self.comment_patterns = {
-            CommentType.EXPLANATION: [
-                r"#\s*[Ee]sta?\s+(es|función|método)",
-                r"#\s*[Aa]quí",
-                r"#\s*[Ll]a\s+siguiente",
-                r"#\s*[Ee]sto\s+(hace|sirve|es)",
-                r"#\s*[Pp]ara\s+",
-                r"#\s*[Cc]on\s+este",
-            ],
-            CommentType.EXAMPLE: [
-                r"#\s*[Ee]jemplo",
-                r"#\s*[Pp]or\s+ejemplo",
-                r"#\s*[Cc]omo\s+este",
-                r"#\s*[Uu]so:",
-            ],
-            CommentType.OUTPUT: [
-                r"#\s*[Rr]esultado:",
-                r"#\s*[Ss]alida:",
-                r"#\s*[Oo]utput:",
-                r"#\s*[Dd]evuelve:",
-                r"#\s*[Ii]mprime:",
-                r"#\s*\s*\[.*\]",  # Listas como output
-                r"#\s*\s*\{.*\}",  # Diccionarios como output
-            ],
-            CommentType.WARNING: [
-                r"#\s*[Cc]uidado",
-                r"#\s*[Aa]tención",
-                r"#\s*[Nn][Oo][Tt][Aa]:",
-                r"#\s*[Ii]mportante",
-                r"#\s*[Nn]o\s+se\s+puede",
-            ]
-        }
-        
-        # Patrones para detectar conceptos educativos
-        self.concept_patterns = {
-            'variables': [r'\w+\s*=\s*', r'variable', r'valor'],
-            'functions': [r'def\s+\w+', r'función', r'función'],
-            'classes': [r'class\s+\w+', r'clase', r'objeto'],
-            'loops': [r'for\s+\w+\s+in', r'while', r'bucle', r'iteración'],
-            'conditionals': [r'if\s+', r'elif', r'else', r'condicional'],
-            'lists': [r'\[.*\]', r'lista', r'append', r'índice'],
-            'dictionaries': [r'\{.*\}', r'diccionario', r'clave', r'valor'],
-            'strings': [r'["\'].*["\']', r'cadena', r'string', r'texto'],
-            'imports': [r'import\s+', r'from\s+.*\s+import', r'módulo'],
-        }
+    # Tablas compiladas una vez al importar y compartidas por todas las instancias
+    COMMENT_PATTERNS: ClassVar[Dict[CommentType, Tuple[Pattern[str], ...]]] = {
+        comment_type: tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+        for comment_type, patterns in _COMMENT_PATTERNS.items()
+    }
+    
+    # Las palabras literales (la mayoría) se buscan con `in` sobre el texto en
+    # minúsculas, una búsqueda en C por palabra; solo los patrones con
+    # estructura siguen como regex
+    CONCEPT_KEYWORDS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        concept: tuple(pattern.lower() for pattern in patterns if re.escape(pattern) == pattern)
+        for concept, patterns in _CONCEPT_PATTERNS.items()
+    }
+    CONCEPT_PATTERNS: ClassVar[Dict[str, Tuple[Pattern[str], ...]]] = {
+        concept: tuple(re.compile(pattern, re.IGNORECASE)
+                       for pattern in patterns if re.escape(pattern) != pattern)
+        for concept, patterns in _CONCEPT_PATTERNS.items()
+    }
     
     def detect_educational_comments(self, content: str) -> Dict[str, Any]:
         """Detecta y analiza comentarios educativos en el contenido"""
@@ -112,7 +162,7 @@ class CommentContextDetector:
         
         for i, line in enumerate(lines):
             # Buscar comentarios
-            comment_match = re.search(r'#(.+)', line.strip())
+            comment_match = _COMMENT_RE.search(line.strip())
             if comment_match:
                 comment_text = comment_match.group(1).strip()
                 comment_type = self._classify_comment(comment_text)
@@ -156,9 +206,9 @@ class CommentContextDetector:
     
     def _classify_comment(self, comment_text: str) -> Optional[CommentType]:
         """Clasifica un comentario según su contenido"""
-        for comment_type, patterns in self.comment_patterns.items():
+        for comment_type, patterns in self.COMMENT_PATTERNS.items():
             for pattern in patterns:
-                if re.search(pattern, comment_text, re.IGNORECASE):
+                if pattern.search(comment_text):
                     return comment_type
         
         return None
@@ -166,13 +216,12 @@ class CommentContextDetector:
     def detect_educational_concepts(self, content: str) -> List[str]:
         """Detecta conceptos educativos presentes en el código"""
         concepts = []
+        lowered = content.lower()
         
-        for concept, patterns in self.concept_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, content, re.IGNORECASE):
-                    if concept not in concepts:
-                        concepts.append(concept)
-                    break
+        for concept, keywords in self.CONCEPT_KEYWORDS.items():
+            if (any(keyword in lowered for keyword in keywords) or
+                    any(pattern.search(content) for pattern in self.CONCEPT_PATTERNS[concept])):
+                concepts.append(concept)
         
         return concepts
 
@@ -180,52 +229,77 @@ class CommentContextDetector:
 class EducationalSnippetClassifier:
     """Clasificador de snippets por nivel educativo y temas"""
     
+    # Criterios para determinar nivel educativo (en orden de evaluación)
+    LEVEL_INDICATORS: ClassVar[Dict[EducationalLevel, Dict[str, Any]]] = {
+        EducationalLevel.BEGINNER: {
+            'required_concepts': ('variables',),
+            'forbidden_concepts': ('classes', 'decorators', 'exceptions'),
+            'max_complexity': 3,
+            'typical_concepts': ('variables', 'strings', 'numbers', 'print')
+        },
+        EducationalLevel.INTERMEDIATE: {
+            'required_concepts': ('functions', 'loops'),
+            'forbidden_concepts': ('decorators', 'metaclasses'),
+            'max_complexity': 6,
+            'typical_concepts': ('functions', 'loops', 'conditionals', 'lists', 'dictionaries')
+        },
+        EducationalLevel.ADVANCED: {
+            'required_concepts': ('classes',),
+            'forbidden_concepts': (),
+            'max_complexity': 9,
+            'typical_concepts': ('classes', 'inheritance', 'exceptions', 'modules')
+        },
+        EducationalLevel.EXPERT: {
+            'required_concepts': ('decorators', 'metaclasses'),
+            'forbidden_concepts': (),
+            'max_complexity': 10,
+            'typical_concepts': ('decorators', 'metaclasses', 'descriptors', 'context_managers')
+        }
+    }
+    
+    # Prerequisitos por concepto
+    CONCEPT_PREREQS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        'functions': ('variables', 'basic_types'),
+        'classes': ('functions', 'variables', 'basic_types'),
+        'inheritance': ('classes',),
+        'loops': ('conditionals', 'variables'),
+        'dictionaries': ('variables', 'basic_types'),
+        'lists': ('variables', 'basic_types'),
+        'exceptions': ('functions', 'conditionals')
+    }
+    
     def __init__(self):
         self.comment_detector = CommentContextDetector()
-        
-        # Criterios para determinar nivel educativo
-        self.level_indicators = {
-            EducationalLevel.BEGINNER: {
-                'required_concepts': ['variables'],
-                'forbidden_concepts': ['classes', 'decorators', 'exceptions'],
-                'max_complexity': 3,
-                'typical_concepts': ['variables', 'strings', 'numbers', 'print']
-            },
-            EducationalLevel.INTERMEDIATE: {
-                'required_concepts': ['functions', 'loops'],
-                'forbidden_concepts': ['decorators', 'metaclasses'],
-                'max_complexity': 6,
-                'typical_concepts': ['functions', 'loops', 'conditionals', 'lists', 'dictionaries']
-            },
-            EducationalLevel.ADVANCED: {
-                'required_concepts': ['classes'],
-                'forbidden_concepts': [],
-                'max_complexity': 9,
-                'typical_concepts': ['classes', 'inheritance', 'exceptions', 'modules']
-            },
-            EducationalLevel.EXPERT: {
-                'required_concepts': ['decorators', 'metaclasses'],
-                'forbidden_concepts': [],
-                'max_complexity': 10,
-                'typical_concepts': ['decorators', 'metaclasses', 'descriptors', 'context_managers']
-            }
-        }
     
-    def classify_snippet(self, snippet: Snippet) -> EducationalContext:
-        """Clasifica un snippet según criterios educativos"""
+    def classify_snippet(self, snippet: Snippet,
+                         comment_analysis: Optional[Dict[str, Any]] = None,
+                         concepts: Optional[List[str]] = None) -> EducationalContext:
+        """
+        Clasifica un snippet según criterios educativos
+        
+        Args:
+            snippet: Snippet a clasificar
+            comment_analysis: Resultado ya calculado de detect_educational_comments
+            concepts: Resultado ya calculado de detect_educational_concepts
+        """
         content = snippet.content
         
-        # Detectar comentarios educativos
-        comment_analysis = self.comment_detector.detect_educational_comments(content)
+        # Detectar comentarios educativos (salvo que el llamador ya los tenga)
+        if comment_analysis is None:
+            comment_analysis = self.comment_detector.detect_educational_comments(content)
         
         # Detectar conceptos presentes
-        concepts = self.comment_detector.detect_educational_concepts(content)
+        if concepts is None:
+            concepts = self.comment_detector.detect_educational_concepts(content)
+        
+        # Complejidad del código (se calcula una vez para nivel y dificultad)
+        complexity = self._calculate_code_complexity(content)
         
         # Determinar nivel educativo
-        level = self._determine_educational_level(content, concepts)
+        level = self._determine_educational_level(complexity, concepts)
         
         # Calcular dificultad
-        difficulty = self._calculate_difficulty_score(content, concepts, comment_analysis)
+        difficulty = self._calculate_difficulty_score(complexity, concepts, comment_analysis)
         
         # Determinar prerequisitos
         prerequisites = self._determine_prerequisites(concepts, level)
@@ -240,13 +314,10 @@ class EducationalSnippetClassifier:
             comment_quality=comment_analysis['comment_quality_score']
         )
     
-    def _determine_educational_level(self, content: str, concepts: List[str]) -> EducationalLevel:
+    def _determine_educational_level(self, complexity: int, concepts: List[str]) -> EducationalLevel:
         """Determina el nivel educativo basado en conceptos y complejidad"""
-        # Calcular complejidad del código
-        complexity = self._calculate_code_complexity(content)
-        
         # Evaluar cada nivel
-        for level, criteria in self.level_indicators.items():
+        for level, criteria in self.LEVEL_INDICATORS.items():
             # Verificar conceptos requeridos
             if all(req in concepts for req in criteria['required_concepts']):
                 # Verificar conceptos prohibidos
@@ -262,15 +333,9 @@ class EducationalSnippetClassifier:
         """Calcula la complejidad del código usando métricas simples"""
         complexity = 0
         
-        # Contar estructuras de control
-        complexity += len(re.findall(r'\bif\b', content))
-        complexity += len(re.findall(r'\bfor\b', content))
-        complexity += len(re.findall(r'\bwhile\b', content))
-        complexity += len(re.findall(r'\btry\b', content))
-        
-        # Contar definiciones
-        complexity += len(re.findall(r'\bdef\s+', content))
-        complexity += len(re.findall(r'\bclass\s+', content))
+        # Contar estructuras de control y definiciones
+        for pattern in _COMPLEXITY_RES:
+            complexity += len(pattern.findall(content))
         
         # Contar anidamiento (aproximado)
         lines = content.split('\n')
@@ -284,16 +349,15 @@ class EducationalSnippetClassifier:
         
         return complexity
     
-    def _calculate_difficulty_score(self, content: str, concepts: List[str], 
+    def _calculate_difficulty_score(self, complexity: int, concepts: List[str], 
                                   comment_analysis: Dict[str, Any]) -> float:
         """Calcula un score de dificultad (1-10)"""
         base_difficulty = len(concepts) * 0.5
-        complexity_penalty = self._calculate_code_complexity(content) * 0.3
+        complexity_penalty = complexity * 0.3
         comment_bonus = comment_analysis['comment_quality_score'] * 0.2
         
         # Penalizaciones por conceptos avanzados
-        advanced_concepts = {'classes', 'inheritance', 'decorators', 'exceptions', 'metaclasses'}
-        advanced_penalty = len(set(concepts) & advanced_concepts) * 0.8
+        advanced_penalty = len(_ADVANCED_CONCEPTS.intersection(concepts)) * 0.8
         
         difficulty = base_difficulty + complexity_penalty + advanced_penalty - comment_bonus
         
@@ -303,20 +367,9 @@ class EducationalSnippetClassifier:
         """Determina prerequisitos basados en conceptos y nivel"""
         prerequisites = []
         
-        # Prerequisitos por concepto
-        concept_prereqs = {
-            'functions': ['variables', 'basic_types'],
-            'classes': ['functions', 'variables', 'basic_types'],
-            'inheritance': ['classes'],
-            'loops': ['conditionals', 'variables'],
-            'dictionaries': ['variables', 'basic_types'],
-            'lists': ['variables', 'basic_types'],
-            'exceptions': ['functions', 'conditionals']
-        }
-        
         for concept in concepts:
-            if concept in concept_prereqs:
-                prerequisites.extend(concept_prereqs[concept])
+            if concept in self.CONCEPT_PREREQS:
+                prerequisites.extend(self.CONCEPT_PREREQS[concept])
         
         # Remover duplicados y conceptos ya presentes
         prerequisites = list(set(prerequisites) - set(concepts))
@@ -378,7 +431,7 @@ class OOPPatternDetector:
         try:
             tree = ast.parse(content)
             
-            for node in ast.walk(tree):
+            for node in _walk_statements(tree):
                 if isinstance(node, ast.ClassDef):
                     parent = None
                     if node.bases:
@@ -2,16 +2,41 @@
 Enhanced Context Analyzer con análisis multi-pass para código complejo
 """
 
+import os
 import ast
 import re
-from typing import List, Dict, Any, Optional, Union, Tuple
+import string
+import asyncio
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable
 from dataclasses import dataclass
 from .context_analyzer import ContextAnalyzer
 from .base_agent import Snippet, AgentResult, DependencyMap
+from .robust_json_parser import IncrementalConfidenceScanner
+from .llm_client import supports_capability
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pesos de cada rasgo en el score de complejidad, en el mismo orden que
+# devuelve CodeComplexity._flags()
+_WEIGHTS = (0.2, 0.2, 0.1, 0.1, 0.1, 0.3)
+
+
+def _compile_template(template: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+    """
+    Pre-parsea un template str.format en piezas (literal, campo)
+    
+    Returns:
+        Tupla de piezas, o None si el template usa format specs, conversiones
+        o campos no simples (en ese caso se usa str.format directamente)
+    """
+    parts = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion or (field_name is not None and not field_name.isidentifier()):
+            return None
+        parts.append((literal, field_name))
+    return tuple(parts)
+
 
 @dataclass
 class CodeComplexity:
@@ -27,6 +52,17 @@ class CodeComplexity:
     def __post_init__(self):
         if self.framework_patterns is None:
             self.framework_patterns = []
+    
+    def _flags(self) -> Tuple[bool, ...]:
+        """Rasgos detectados, alineados con _WEIGHTS"""
+        return (
+            self.has_decorators,
+            self.has_inheritance,
+            self.has_context_managers,
+            self.has_comprehensions,
+            self.has_f_strings,
+            bool(self.framework_patterns)
+        )
 
 
 class EnhancedContextAnalyzer(ContextAnalyzer):
@@ -40,6 +76,82 @@ class EnhancedContextAnalyzer(ContextAnalyzer):
         # Templates especializados
         self.complex_template = self._load_complex_template()
         self.framework_patterns = self._load_framework_patterns()
+        
+        # Templates pre-parseados, indexados por el texto del template
+        self._compiled_templates: Dict[str, Optional[Tuple[Tuple[str, Optional[str]], ...]]] = {}
+        
+        # Límite de llamadas LLM simultáneas para no saturar el backend
+        self._llm_semaphore = asyncio.Semaphore(int(os.environ.get('ANALYZER_MAX_CONCURRENCY', 16)))
+    
+    async def _generate(self,
+                        prompt: str,
+                        system_message: str,
+                        on_confidence: Optional[Callable[[float], None]] = None) -> Any:
+        """
+        Llama al LLM; con on_confidence usa streaming si el cliente lo soporta
+        
+        Args:
+            prompt: Prompt del usuario
+            system_message: Mensaje del sistema
+            on_confidence: Callback con overall_confidence en cuanto se recibe
+            
+        Returns:
+            Respuesta del LLM (con atributo content)
+        """
+        if on_confidence is None or not supports_capability(self.llm_client, 'SUPPORTS_STREAMING'):
+            return await self.llm_client.generate(prompt=prompt, system_message=system_message)
+        
+        scanner = IncrementalConfidenceScanner()
+        
+        def on_chunk(chunk: str) -> None:
+            confidence = scanner.feed(chunk)
+            if confidence is not None:
+                on_confidence(confidence)
+        
+        return await self.llm_client.generate_stream(
+            prompt=prompt, system_message=system_message, on_chunk=on_chunk
+        )
+    
+    async def _with_llm_limit(self, coro) -> Any:
+        """
+        _with_timeout_and_retry limitado por el semáforo de concurrencia LLM
+        
+        Args:
+            coro: Corrutina de la llamada LLM
+            
+        Returns:
+            Resultado de la corrutina
+        """
+        try:
+            async with self._llm_semaphore:
+                return await self._with_timeout_and_retry(coro)
+        except asyncio.CancelledError:
+            coro.close()  # Cancelado antes de obtener turno: no dejarla sin await
+            raise
+    
+    def _render_template(self, template: str, **values: str) -> str:
+        """
+        Equivalente a template.format(**values) sin re-parsear el template
+        
+        Args:
+            template: Template con campos {nombre}
+            **values: Valores de los campos
+            
+        Returns:
+            Prompt renderizado
+        """
+        try:
+            parts = self._compiled_templates[template]
+        except KeyError:
+            parts = self._compiled_templates[template] = _compile_template(template)
+        
+        if parts is None:
+            return template.format(**values)
+        
+        return "".join(
+            literal + str(values[field_name]) if field_name is not None else literal
+            for literal, field_name in parts
+        )
     
     def _load_complex_template(self) -> str:
         """Carga template para código complejo"""
@@ -107,8 +219,14 @@ class EnhancedContextAnalyzer(ContextAnalyzer):
         """
         Analiza la complejidad del código para determinar estrategia de análisis
         """
-        complexity = CodeComplexity()
         all_code = snippet.content + "\n" + "\n".join(s.content for s in context_snippets)
+        return self._complexity_from_code(all_code)
+    
+    def _complexity_from_code(self, all_code: str) -> CodeComplexity:
+        """
+        Detecta rasgos de complejidad sobre el código ya concatenado
+        """
+        complexity = CodeComplexity()
         
         # Detectar decorators
         if re.search(r'^@\w+', all_code, re.MULTILINE):
@@ -138,13 +256,8 @@ class EnhancedContextAnalyzer(ContextAnalyzer):
                     break
         
         # Calcular score de complejidad
-        complexity.complexity_score = (
-            (0.2 if complexity.has_decorators else 0) +
-            (0.2 if complexity.has_inheritance else 0) +
-            (0.1 if complexity.has_context_managers else 0) +
-            (0.1 if complexity.has_comprehensions else 0) +
-            (0.1 if complexity.has_f_strings else 0) +
-            (0.3 if complexity.framework_patterns else 0)
+        complexity.complexity_score = sum(
+            (w for w, f in zip(_WEIGHTS, complexity._flags()) if f), 0.0
         )
         
         return complexity
@@ -162,20 +275,23 @@ class EnhancedContextAnalyzer(ContextAnalyzer):
     
     async def _analyze_with_complex_template(self,
                                            snippet: Snippet,
-                                           formatted_context: str) -> DependencyMap:
+                                           formatted_context: str,
+                                           on_confidence: Optional[Callable[[float], None]] = None) -> DependencyMap:
         """
         Análisis usando template especializado para código complejo
         """
-        prompt = self.complex_template.format(
+        prompt = self._render_template(
+            self.complex_template,
             target_snippet=snippet.content,
             context_snippets=formatted_context
         )
         
         try:
-            llm_analysis = await self._with_timeout_and_retry(
-                self.llm_client.generate(
+            llm_analysis = await self._with_llm_limit(
+                self._generate(
                     prompt=prompt,
-                    system_message="You are an expert in complex Python patterns and modern frameworks."
+                    system_message="You are an expert in complex Python patterns and modern frameworks.",
+                    on_confidence=on_confidence
                 )
             )
             
@@ -322,18 +438,23 @@ class EnhancedContextAnalyzer(ContextAnalyzer):
                 metadata={'analysis_strategy': 'failed'}
             )
     
-    async def _analyze_with_standard_template(self, snippet: Snippet, formatted_context: str) -> DependencyMap:
+    async def _analyze_with_standard_template(self,
+                                              snippet: Snippet,
+                                              formatted_context: str,
+                                              on_confidence: Optional[Callable[[float], None]] = None) -> DependencyMap:
         """Análisis con template estándar"""
-        prompt = self.prompt_template.format(
+        prompt = self._render_template(
+            self.prompt_template,
             target_snippet=snippet.content,
             context_snippets=formatted_context
         )
         
         try:
-            llm_analysis = await self._with_timeout_and_retry(
-                self.llm_client.generate(
+            llm_analysis = await self._with_llm_limit(
+                self._generate(
                     prompt=prompt,
-                    system_message="You are an expert Python code analyzer focused on dependency detection."
+                    system_message="You are an expert Python code analyzer focused on dependency detection.",
+                    on_confidence=on_confidence
                 )
             )
             
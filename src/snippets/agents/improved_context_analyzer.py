@@ -12,17 +12,64 @@ Versión mejorada del Context Analyzer que integra:
 Esta versión reemplaza la versión básica para casos complejos.
 """
 
+import os
 import time
+import copy
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from .context_analyzer import ContextAnalyzer
 from .enhanced_analyzer import EnhancedContextAnalyzer, CodeComplexity
 from .robust_json_parser import RobustJSONParser
 from .precision_filter import PrecisionFilter
+from .llm_client import BatchedLLMClient
 from .base_agent import Snippet, AgentResult, DependencyMap
 
 logger = logging.getLogger(__name__)
 
+# Campos fijos de la metadata de análisis
+_STATIC_METADATA = {
+    'analysis_version': 'improved_v1.0'
+}
+
+
+@lru_cache(maxsize=512)
+def _pattern_context_from_key(has_decorators: bool,
+                              has_inheritance: bool,
+                              has_context_managers: bool,
+                              has_comprehensions: bool,
+                              has_f_strings: bool,
+                              framework_patterns: Tuple[str, ...]) -> str:
+    """
+    Construye el contexto de patrones para una combinación de rasgos
+    
+    Hay pocas combinaciones posibles, así que el resultado se memoiza.
+    """
+    context_parts = ["DETECTED PATTERNS:"]
+    
+    if has_decorators:
+        context_parts.append("- Contains decorators: Pay attention to decorator dependencies")
+    
+    if has_inheritance:
+        context_parts.append("- Contains inheritance: Track parent class dependencies")
+    
+    if has_context_managers:
+        context_parts.append("- Contains 'with' statements: Consider context manager setup")
+    
+    if has_comprehensions:
+        context_parts.append("- Contains comprehensions: Check for closure variables")
+    
+    if has_f_strings:
+        context_parts.append("- Contains f-strings: Variables embedded in strings")
+    
+    if framework_patterns:
+        context_parts.append(f"- Framework patterns: {', '.join(framework_patterns)}")
+    
+    return "\n".join(context_parts)
+
 
 class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
     """
@@ -35,14 +82,29 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         # Componentes mejorados
         self.json_parser = RobustJSONParser()
         self.precision_filter = PrecisionFilter() if enable_precision_filter else None
+        self.batched_client = BatchedLLMClient(self.llm_client)
+        
+        # Límite de filtrados simultáneos en threads
+        self._filter_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
         
         # Configuración
         self.enable_precision_filter = enable_precision_filter
         self.max_complexity_threshold = 0.8  # Umbral para casos muy complejos
         
-        # Métricas de rendimiento
-        self.parsing_stats = []
-        self.filter_stats = []
+        # Métricas de rendimiento (últimos resultados + agregados acumulados)
+        self.stats_window = 1024
+        self.parsing_stats = deque(maxlen=self.stats_window)
+        self.filter_stats = deque(maxlen=self.stats_window)
+        self._filter_rate_sum = 0.0
+        self._confidence_improvement_sum = 0.0
+        self._filter_stats_count = 0
+        
+        # Cache LRU con expiración de DependencyMaps ya analizados
+        self.cache_max_size = 4096
+        self.cache_ttl = 3600.0
+        self._result_cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         
         logger.info("ImprovedContextAnalyzer initialized with enhanced capabilities")
     
@@ -58,15 +120,13 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         start_time = time.time()
         
         try:
-            # Fase 1: Análisis de complejidad y estrategia
-            context_snippets_data = self._extract_context_snippets(all_snippets, snippet_index)
-            context_snippets = [all_snippets[cs['index']] for cs in context_snippets_data 
-                              if not cs['is_target']]
-            
-            complexity = self._analyze_code_complexity(snippet, context_snippets)
+            # Fase 1: Contexto y complejidad de la misma ventana
+            context_snippets_data, complexity = self._context_and_complexity(
+                snippet, all_snippets, snippet_index
+            )
             strategy = self._choose_enhanced_analysis_strategy(complexity)
             
-            self.logger.info(f"Analysis strategy: {strategy} (complexity: {complexity.complexity_score:.2f})")
+            self.logger.info("Analysis strategy: %s (complexity: %.2f)", strategy, complexity.complexity_score)
             
             # Fase 2: Análisis LLM con estrategia adaptativa
             dependency_map = await self._execute_analysis_strategy(
@@ -75,7 +135,7 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
             
             # Fase 3: Post-procesamiento y filtrado
             if dependency_map.confidence > 0.0:
-                dependency_map = self._post_process_dependencies(
+                dependency_map = await self._post_process_dependencies(
                     dependency_map, snippet, complexity
                 )
             
@@ -94,7 +154,7 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
             
         except Exception as e:
             processing_time = time.time() - start_time
-            logger.error(f"Improved analysis failed: {e}")
+            logger.error("Improved analysis failed: %s", e)
             
             return AgentResult(
                 success=False,
@@ -105,6 +165,25 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
                 metadata={'analysis_strategy': 'failed'}
             )
     
+    def _context_and_complexity(self,
+                                snippet: Snippet,
+                                all_snippets: List[Snippet],
+                                snippet_index: int) -> Tuple[List[Dict[str, Any]], CodeComplexity]:
+        """
+        Extrae la ventana de contexto y analiza su complejidad
+        
+        La complejidad se calcula sobre los Snippet de la ventana ya extraída,
+        sin recalcular sus índices.
+        
+        Returns:
+            Tupla (context_snippets_data, complexity)
+        """
+        context_snippets_data = self._extract_context_snippets(all_snippets, snippet_index)
+        context_snippets = [
+            all_snippets[cs["index"]] for cs in context_snippets_data if not cs["is_target"]
+        ]
+        return context_snippets_data, self._analyze_code_complexity(snippet, context_snippets)
+    
     def _choose_enhanced_analysis_strategy(self, complexity: CodeComplexity) -> str:
         """
         Elige estrategia de análisis mejorada basada en complejidad detallada
@@ -130,16 +209,77 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         """
         formatted_context = self._format_context_for_llm(context_snippets_data)
         
+        cache_key = self._result_cache_key(snippet, formatted_context, strategy, complexity)
+        cached_map = self._get_cached_result(cache_key)
+        if cached_map is not None:
+            return cached_map
+        
         if strategy == "ultra_complex":
-            return await self._ultra_complex_analysis(snippet, formatted_context, complexity)
+            dependency_map = await self._ultra_complex_analysis(snippet, formatted_context, complexity)
         elif strategy == "complex_multi_pass":
-            return await self._multi_pass_analysis(snippet, formatted_context, complexity)
+            dependency_map = await self._multi_pass_analysis(snippet, formatted_context, complexity)
         elif strategy == "framework_specialized":
-            return await self._framework_specialized_analysis(snippet, formatted_context, complexity)
+            dependency_map = await self._framework_specialized_analysis(snippet, formatted_context, complexity)
         elif strategy == "pattern_aware":
-            return await self._pattern_aware_analysis(snippet, formatted_context, complexity)
+            dependency_map = await self._pattern_aware_analysis(snippet, formatted_context, complexity)
         else:
-            return await self._standard_improved_analysis(snippet, formatted_context)
+            dependency_map = await self._standard_improved_analysis(snippet, formatted_context)
+        
+        # Solo cachear análisis válidos para poder reintentar los fallidos
+        if dependency_map.confidence > 0.0:
+            self._store_cached_result(cache_key, dependency_map)
+        
+        return dependency_map
+    
+    def _result_cache_key(self,
+                          snippet: Snippet,
+                          formatted_context: str,
+                          strategy: str,
+                          complexity: CodeComplexity) -> bytes:
+        """
+        Clave de cache para un análisis (snippet, contexto, estrategia, frameworks)
+        """
+        # Hash incremental: evita concatenar el contexto (potencialmente grande)
+        key_hash = hashlib.blake2b(digest_size=16)
+        for part in (snippet.content, formatted_context, strategy, ",".join(complexity.framework_patterns)):
+            key_hash.update(part.encode('utf-8'))
+            key_hash.update(b"\0")
+        return key_hash.digest()
+    
+    def _get_cached_result(self, cache_key: bytes) -> Optional[DependencyMap]:
+        """
+        Devuelve una copia del DependencyMap cacheado si existe y no expiró
+        """
+        entry = self._result_cache.get(cache_key)
+        if entry is not None:
+            stored_at, dependency_map = entry
+            if time.monotonic() - stored_at <= self.cache_ttl:
+                self._result_cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return copy.deepcopy(dependency_map)
+            del self._result_cache[cache_key]
+        
+        self.cache_misses += 1
+        return None
+    
+    def _store_cached_result(self, cache_key: bytes, dependency_map: DependencyMap) -> None:
+        """
+        Guarda una copia del DependencyMap, expulsando la entrada menos usada
+        """
+        self._result_cache[cache_key] = (time.monotonic(), copy.deepcopy(dependency_map))
+        self._result_cache.move_to_end(cache_key)
+        while len(self._result_cache) > self.cache_max_size:
+            self._result_cache.popitem(last=False)
+    
+    async def aclose(self) -> None:
+        """Detiene el worker del cliente LLM agrupado"""
+        await self.batched_client.close()
+    
+    def clear_cache(self) -> None:
+        """Vacía la cache de resultados y sus contadores"""
+        self._result_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     async def _ultra_complex_analysis(self,
                                     snippet: Snippet,
@@ -147,35 +287,81 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
                                     complexity: CodeComplexity) -> DependencyMap:
         """
         Análisis para casos ultra-complejos con múltiples intentos y fallbacks
-        """
-        attempts = [
-            ("complex_template", self._analyze_with_complex_template),
-            ("standard_template", self._analyze_with_standard_template),
-            ("ast_enhanced", self._enhanced_ast_fallback_wrapper)
-        ]
+        
+        Los intentos LLM se lanzan en paralelo y se devuelve el primero que
+        supere 0.8 de confianza, cancelando los que sigan pendientes. El
+        análisis AST corre a la vez en un thread y sirve de resultado base que
+        los intentos LLM deben superar; no evita la llamada al LLM porque su
+        confianza está acotada (0.3-0.6) y no distingue casos resueltos.
+        """
+        ast_task = asyncio.ensure_future(asyncio.to_thread(
+            self._enhanced_ast_fallback_wrapper, snippet, [], complexity
+        ))
+        
+        def cancel_others_when_confident(attempt_name: str):
+            # Con streaming, la confianza llega antes que el resto del JSON:
+            # si ya basta, cancelar los demás intentos sin esperar a que terminen
+            def on_confidence(confidence: float) -> None:
+                if confidence > 0.8:
+                    for task, name in attempts.items():
+                        if name != attempt_name and not task.done():
+                            task.cancel()
+            return on_confidence
+        
+        attempts = {
+            asyncio.create_task(
+                self._analyze_with_complex_template(
+                    snippet, formatted_context,
+                    on_confidence=cancel_others_when_confident("complex_template")
+                )
+            ): "complex_template",
+            asyncio.create_task(
+                self._analyze_with_standard_template(
+                    snippet, formatted_context,
+                    on_confidence=cancel_others_when_confident("standard_template")
+                )
+            ): "standard_template"
+        }
         
         best_result = None
         best_confidence = 0.0
+        pending = set(attempts)
         
-        for attempt_name, analysis_method in attempts:
-            try:
-                if attempt_name == "ast_enhanced":
-                    result = analysis_method(snippet, [], complexity)
-                else:
-                    result = await analysis_method(snippet, formatted_context)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
                 
-                if result.confidence > best_confidence:
-                    best_result = result
-                    best_confidence = result.confidence
+                for task in done:
+                    attempt_name = attempts[task]
+                    if task.cancelled():
+                        continue
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning("Ultra-complex analysis attempt %s failed: %s", attempt_name, e)
+                        continue
                     
-                # Si obtenemos confianza alta, usar ese resultado
-                if result.confidence > 0.8:
-                    logger.info(f"High confidence result from {attempt_name}")
-                    return result
+                    if result.confidence > best_confidence:
+                        best_result = result
+                        best_confidence = result.confidence
                     
+                    # Si obtenemos confianza alta, usar ese resultado
+                    if result.confidence > 0.8:
+                        logger.info("High confidence result from %s", attempt_name)
+                        return result
+            
+            # El resultado AST gana los empates: el LLM tiene que superarlo
+            try:
+                ast_result = await ast_task
             except Exception as e:
-                logger.warning(f"Ultra-complex analysis attempt {attempt_name} failed: {e}")
-                continue
+                logger.warning("Ultra-complex AST baseline failed: %s", e)
+            else:
+                if best_result is None or ast_result.confidence >= best_confidence:
+                    best_result = ast_result
+        finally:
+            for task in pending:
+                task.cancel()
+            ast_task.cancel()
         
         return best_result or DependencyMap(confidence=0.0, error="All ultra-complex analysis attempts failed")
     
@@ -186,17 +372,35 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         """
         Análisis multi-pass para código complejo
         """
-        # Pass 1: Análisis general
-        general_result = await self._analyze_with_complex_template(snippet, formatted_context)
-        
-        # Pass 2: Análisis específico de patrones detectados
+        # Pass 1 y 2 son independientes: lanzar ambas llamadas LLM a la vez
+        general_task = asyncio.create_task(
+            self._analyze_with_complex_template(snippet, formatted_context)
+        )
+        framework_task = None
         if complexity.framework_patterns:
-            framework_result = await self._analyze_framework_patterns(snippet, complexity.framework_patterns)
-            general_result = self._merge_dependency_maps(general_result, framework_result)
+            framework_task = asyncio.create_task(
+                self._analyze_framework_patterns(snippet, complexity.framework_patterns)
+            )
+        
+        try:
+            # Pass 1: Análisis general
+            general_result = await general_task
+            
+            # Pass 2: Análisis específico de patrones detectados; su propio
+            # presupuesto de reintentos acota la espera
+            if framework_task is not None:
+                framework_result = await framework_task
+                general_result = self._merge_dependency_maps(general_result, framework_result)
+        finally:
+            # Si el pass 1 falla, no dejar la llamada del pass 2 huérfana
+            if framework_task is not None:
+                framework_task.cancel()
         
         # Pass 3: Refinamiento con AST si la confianza es baja
         if general_result.confidence < 0.5:
-            ast_result = self._enhanced_ast_fallback_wrapper(snippet, [], complexity)
+            ast_result = await asyncio.to_thread(
+                self._enhanced_ast_fallback_wrapper, snippet, [], complexity
+            )
             general_result = self._merge_dependency_maps(general_result, ast_result, prefer_higher_confidence=True)
         
         return general_result
@@ -213,14 +417,15 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         
         if framework_template:
             try:
-                prompt = framework_template.format(
+                prompt = self._render_template(
+                    framework_template,
                     target_snippet=snippet.content,
                     context_snippets=formatted_context,
                     detected_frameworks=", ".join(complexity.framework_patterns)
                 )
                 
-                llm_analysis = await self._with_timeout_and_retry(
-                    self.llm_client.generate(
+                llm_analysis = await self._with_llm_limit(
+                    self.batched_client.submit(
                         prompt=prompt,
                         system_message=f"You are an expert in {', '.join(complexity.framework_patterns)} frameworks."
                     )
@@ -229,7 +434,7 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
                 return self._parse_enhanced_llm_response(llm_analysis.content)
                 
             except Exception as e:
-                logger.warning(f"Framework specialized analysis failed: {e}")
+                logger.warning("Framework specialized analysis failed: %s", e)
         
         # Fallback a análisis complejo estándar
         return await self._analyze_with_complex_template(snippet, formatted_context)
@@ -243,14 +448,15 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         """
         # Preparar contexto adicional sobre patrones detectados
         pattern_context = self._build_pattern_context(complexity)
-        enhanced_prompt = self.complex_template.format(
+        enhanced_prompt = self._render_template(
+            self.complex_template,
             target_snippet=snippet.content,
             context_snippets=formatted_context + "\n\n" + pattern_context
         )
         
         try:
-            llm_analysis = await self._with_timeout_and_retry(
-                self.llm_client.generate(
+            llm_analysis = await self._with_llm_limit(
+                self.batched_client.submit(
                     prompt=enhanced_prompt,
                     system_message="You are an expert in Python design patterns and advanced language features."
                 )
@@ -259,7 +465,7 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
             return self._parse_enhanced_llm_response(llm_analysis.content)
             
         except Exception as e:
-            logger.error(f"Pattern-aware analysis failed: {e}")
+            logger.error("Pattern-aware analysis failed: %s", e)
             return await self._analyze_with_standard_template(snippet, formatted_context)
     
     async def _standard_improved_analysis(self,
@@ -287,39 +493,47 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
                 confidence=parsed_data.get("overall_confidence", 0.7)
             )
         else:
-            logger.warning(f"Robust JSON parsing failed: {parse_result.errors}")
+            logger.warning("Robust JSON parsing failed: %s", parse_result.errors)
             return DependencyMap(
                 confidence=0.0,
                 error=f"JSON parsing failed: {', '.join(parse_result.errors)}"
             )
     
-    def _post_process_dependencies(self,
+    async def _post_process_dependencies(self,
                                  dependency_map: DependencyMap,
                                  snippet: Snippet,
                                  complexity: CodeComplexity) -> DependencyMap:
         """
         Post-procesamiento con filtrado de precisión y validaciones
+        
+        El filtrado (AST + regex) corre en un thread para no bloquear el event loop.
         """
         if not self.enable_precision_filter or not self.precision_filter:
             return dependency_map
         
-        # Aplicar filtros de precisión
-        original_map = dependency_map
-        filtered_map = self.precision_filter.filter_dependencies(
-            dependency_map, snippet.content
-        )
-        
-        # Guardar estadísticas de filtrado
-        filter_stats = self.precision_filter.analyze_filter_effectiveness(
-            original_map, filtered_map
-        )
-        self.filter_stats.append(filter_stats)
+        async with self._filter_semaphore:
+            # Aplicar filtros de precisión y recolectar estadísticas en una pasada
+            filtered_map, filter_stats = await asyncio.to_thread(
+                self.precision_filter.filter_dependencies_with_stats, dependency_map, snippet.content
+            )
+        self._record_filter_stats(filter_stats)
         
-        logger.debug(f"Filtered {filter_stats['overall']['total_filtered']} dependencies "
-                    f"({filter_stats['overall']['overall_filter_rate']:.2%} reduction)")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Filtered %d dependencies (%.2f%% reduction)",
+                         filter_stats['overall']['total_filtered'],
+                         filter_stats['overall']['overall_filter_rate'] * 100)
         
         return filtered_map
     
+    def _record_filter_stats(self, filter_stats: Dict[str, Any]) -> None:
+        """
+        Registra estadísticas de filtrado y actualiza los agregados acumulados
+        """
+        self.filter_stats.append(filter_stats)
+        self._filter_rate_sum += filter_stats['overall']['overall_filter_rate']
+        self._confidence_improvement_sum += filter_stats['overall']['confidence_improvement']
+        self._filter_stats_count += 1
+    
     def _enhanced_ast_fallback_wrapper(self,
                                      snippet: Snippet,
                                      all_snippets: List[Snippet],
@@ -336,7 +550,7 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         """
         Fusiona dos mapas de dependencias de manera inteligente
         """
-        if map1.confidence == 0.0:
+        if map1 is map2 or map1.confidence == 0.0:
             return map2
         if map2.confidence == 0.0:
             return map1
@@ -347,17 +561,41 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         else:
             primary, secondary = map1, map2
         
+        # Si primary ya cubre todas las claves de secondary el resultado es primary
+        # (caso típico al re-analizar el mismo snippet)
+        if (primary.confidence >= secondary.confidence
+                and (primary.error or not secondary.error)
+                and secondary.variables.keys() <= primary.variables.keys()
+                and secondary.classes.keys() <= primary.classes.keys()
+                and secondary.imports.keys() <= primary.imports.keys()
+                and secondary.functions.keys() <= primary.functions.keys()):
+            return primary
+        
         merged_map = DependencyMap(
-            variables={**secondary.variables, **primary.variables},
-            classes={**secondary.classes, **primary.classes},
-            imports={**secondary.imports, **primary.imports},
-            functions={**secondary.functions, **primary.functions},
+            variables=self._merge_items(secondary.variables, primary.variables),
+            classes=self._merge_items(secondary.classes, primary.classes),
+            imports=self._merge_items(secondary.imports, primary.imports),
+            functions=self._merge_items(secondary.functions, primary.functions),
             confidence=max(primary.confidence, secondary.confidence),
             error=primary.error or secondary.error
         )
         
         return merged_map
     
+    @staticmethod
+    def _merge_items(secondary: Dict[str, Dict], primary: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Fusiona una categoría dando prioridad a primary, sin copiar si un lado está vacío
+        """
+        if not secondary or secondary.keys() <= primary.keys():
+            return primary
+        if not primary:
+            return secondary
+        
+        merged = secondary.copy()
+        merged.update(primary)
+        return merged
+    
     def _get_framework_template(self, frameworks: List[str]) -> Optional[str]:
         """
         Obtiene template especializado para frameworks detectados
@@ -369,27 +607,14 @@ class ImprovedContextAnalyzer(EnhancedContextAnalyzer):
         """
         Construye contexto adicional sobre patrones detectados
         """
-        context_parts = ["DETECTED PATTERNS:"]
-        
-        if complexity.has_decorators:
-            context_parts.append("- Contains decorators: Pay attention to decorator dependencies")
-        
-        if complexity.has_inheritance:
-            context_parts.append("- Contains inheritance: Track parent class dependencies")
-        
-        if complexity.has_context_managers:
-            context_parts.append("- Contains 'with' statements: Consider context manager setup")
-        
-        if complexity.has_comprehensions:
-            context_parts.append("- Contains comprehensions: Check for closure variables")
-        
-        if complexity.has_f_strings:
-            context_parts.append("- Contains f-strings: Variables embedded in strings")
-        
-        if complexity.framework_patterns:
-            context_parts.append(f"- Framework patterns: {', '.join(complexity.framework_patterns)}")
-        
-        return "\n".join(context_parts)
+        return _pattern_context_from_key(
+            complexity.has_decorators,
+            complexity.has_inheritance,
+            complexity.has_context_managers,
+            complexity.has_comprehensions,
+            complexity.has_f_strings,
+            tuple(complexity.framework_patterns)
+        )
     
     async def _analyze_framework_patterns(self,
                                         snippet: Snippet,
@@ -415,8 +640,8 @@ Focus on:
 Return JSON with dependency analysis.
 """
             
-            llm_analysis = await self._with_timeout_and_retry(
-                self.llm_client.generate(
+            llm_analysis = await self._with_llm_limit(
+                self.batched_client.submit(
                     prompt=prompt,
                     system_message=f"You are an expert in {', '.join(frameworks)} framework patterns."
                 )
@@ -425,7 +650,7 @@ Return JSON with dependency analysis.
             return self._parse_enhanced_llm_response(llm_analysis.content)
             
         except Exception as e:
-            logger.warning(f"Framework pattern analysis failed: {e}")
+            logger.warning("Framework pattern analysis failed: %s", e)
             return DependencyMap(confidence=0.0, error=str(e))
     
     def _build_analysis_metadata(self,
@@ -436,7 +661,7 @@ Return JSON with dependency analysis.
         Construye metadata detallada del análisis
         """
         return {
-            'analysis_version': 'improved_v1.0',
+            **_STATIC_METADATA,
             'complexity_score': complexity.complexity_score,
             'detected_patterns': complexity.framework_patterns,
             'analysis_strategy': strategy,
@@ -453,12 +678,18 @@ Return JSON with dependency analysis.
         """
         Obtiene estadísticas de rendimiento del analyzer mejorado
         """
+        count = self._filter_stats_count
         return {
             'parsing_stats': self.json_parser.get_parsing_stats(self.parsing_stats),
             'filter_stats_summary': {
-                'total_filters_applied': len(self.filter_stats),
-                'avg_filter_rate': sum(fs['overall']['overall_filter_rate'] for fs in self.filter_stats) / len(self.filter_stats) if self.filter_stats else 0,
-                'avg_confidence_improvement': sum(fs['overall']['confidence_improvement'] for fs in self.filter_stats) / len(self.filter_stats) if self.filter_stats else 0
+                'total_filters_applied': count,
+                'avg_filter_rate': self._filter_rate_sum / count if count else 0,
+                'avg_confidence_improvement': self._confidence_improvement_sum / count if count else 0
+            },
+            'result_cache': {
+                'size': len(self._result_cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses
             }
         }
     
@@ -466,6 +697,9 @@ Return JSON with dependency analysis.
         """Resetea las estadísticas de rendimiento"""
         self.parsing_stats.clear()
         self.filter_stats.clear()
+        self._filter_rate_sum = 0.0
+        self._confidence_improvement_sum = 0.0
+        self._filter_stats_count = 0
 
 
 def create_improved_analyzer(llm_client=None, **kwargs) -> ImprovedContextAnalyzer:
@@ -12,20 +12,53 @@ Features:
 
 import os
 import json
+import math
 import time
+import atexit
+import struct
+import asyncio
 import hashlib
 import logging
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Callable, Literal, Protocol
+from dataclasses import dataclass, asdict
 from pathlib import Path
 
 import groq
-from tenacity import retry, stop_after_attempt, wait_exponential
-from pydantic import BaseModel, Field
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dump_bytes(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dump_bytes(data: Any) -> bytes:
+        return json.dumps(data, indent=2).encode('utf-8')
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Marca del tokenizer aún no cargado (None significa "sin tokenizer")
+_TOKENIZER_NOT_LOADED = object()
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Clientes con cache activo; un único hook de salida vuelca los que sigan vivos
+_clients_with_cache: "weakref.WeakSet[GroqLLMClient]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_caches() -> None:
+    for client in list(_clients_with_cache):
+        client._flush_cache_sync()
+
 
 @dataclass
 class LLMConfig:
@@ -37,18 +70,134 @@ class LLMConfig:
     max_retries: int = 3
     cache_enabled: bool = True
     cache_dir: str = ".agent_cache"
+    cache_backend: Literal['file', 'memcached', 'redis'] = 'file'
+    cache_url: str = ""  # host:port para memcached, redis://... para redis
+    mem_cache_max: int = 1024  # Entradas LRU en memoria delante del cache en disco
     max_cost_per_session: float = 5.00  # Límite de $5 por sesión
+    pool_size: int = 16  # Requests simultáneas a Groq
+
+
+class CacheBackend(Protocol):
+    """Almacenamiento persistente de respuestas cacheadas (bytes por clave)"""
+    
+    def get(self, key: str) -> Optional[bytes]: ...
+    
+    def set(self, key: str, value: bytes) -> None: ...
+
+
+class FileCacheBackend:
+    """Un archivo por clave, repartido en subdirectorios por prefijo del hash"""
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True)
+        # Rutas como str: evita construir objetos Path en cada request
+        self._cache_dir_str = str(self.cache_dir) + os.sep
+        self._shards: set = set()
+    
+    def path(self, key: str) -> str:
+        """Ruta del archivo de cache (cache_dir/ab/cdef....json)"""
+        return self._cache_dir_str + key[:2] + os.sep + key[2:] + ".json"
+    
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def set(self, key: str, value: bytes) -> None:
+        shard = key[:2]
+        if shard not in self._shards:
+            os.makedirs(self._cache_dir_str + shard, exist_ok=True)
+            self._shards.add(shard)
+        with open(self.path(key), 'wb') as f:
+            f.write(value)
+
+
+class MemcachedBackend:
+    """Cache compartido entre procesos sobre memcached (requiere pymemcache)"""
+    
+    def __init__(self, url: str):
+        from pymemcache.client.base import PooledClient
+        
+        host, _, port = (url or "localhost:11211").rpartition(':')
+        # PooledClient es thread-safe: los volcados corren en un thread
+        self.client = PooledClient((host or "localhost", int(port or 11211)))
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+    
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(key, value)
 
 
-class TokenUsage(BaseModel):
+class RedisBackend:
+    """Cache compartido entre procesos sobre Redis (requiere redis)"""
+    
+    def __init__(self, url: str):
+        import redis
+        
+        self.client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+    
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(key, value)
+
+
+def create_cache_backend(config: "LLMConfig") -> CacheBackend:
+    """
+    Crea el backend de cache configurado
+    
+    Args:
+        config: Configuración del cliente
+        
+    Returns:
+        Backend de cache (file, memcached o redis)
+    """
+    if config.cache_backend == 'memcached':
+        return MemcachedBackend(config.cache_url)
+    if config.cache_backend == 'redis':
+        return RedisBackend(config.cache_url)
+    if config.cache_backend == 'file':
+        return FileCacheBackend(config.cache_dir)
+    raise ValueError(f"Unknown cache backend: {config.cache_backend}")
+
+
+def supports_capability(llm_client: Any, capability: str) -> bool:
+    """
+    Indica si la clase del cliente declara una capacidad opcional
+    
+    Se consulta la clase y se exige True literal: un Mock responde a
+    cualquier atributo y no debe tomar los caminos de batch o streaming.
+    
+    Args:
+        llm_client: Cliente LLM
+        capability: Nombre del flag (SUPPORTS_BATCH, SUPPORTS_STREAMING)
+        
+    Returns:
+        True si el cliente soporta la capacidad
+    """
+    return getattr(type(llm_client), capability, False) is True
+
+
+@dataclass(slots=True)
+class TokenUsage:
     """Tracking de uso de tokens"""
     prompt_tokens: int = 0
     completion_tokens: int = 0  
     total_tokens: int = 0
     estimated_cost: float = 0.0
+    
+    def dict(self) -> Dict[str, Any]:
+        """Compatibilidad con la API previa basada en pydantic"""
+        return asdict(self)
 
 
-class LLMResponse(BaseModel):
+@dataclass(slots=True)
+class LLMResponse:
     """Respuesta estructurada del LLM"""
     content: str
     usage: TokenUsage
@@ -56,8 +205,9 @@ class LLMResponse(BaseModel):
     cached: bool = False
     processing_time: float = 0.0
     
-    class Config:
-        validate_assignment = True
+    def dict(self) -> Dict[str, Any]:
+        """Compatibilidad con la API previa basada en pydantic"""
+        return asdict(self)
 
 
 class GroqLLMClient:
@@ -71,6 +221,18 @@ class GroqLLMClient:
         "llama-3.1-8b-instant": 0.0001,
     }
     
+    # Escrituras de cache diferidas: se vuelcan a disco por lotes
+    CACHE_FLUSH_INTERVAL = 5.0  # segundos
+    CACHE_FLUSH_MAX_PENDING = 32
+    
+    # Margen sobre el conteo de tiktoken: su vocabulario no es el de Llama
+    TOKEN_ESTIMATE_MARGIN = 1.5
+    
+    # Capacidades opcionales; se declaran en la clase porque hasattr() es
+    # siempre cierto para un Mock (ver supports_capability)
+    SUPPORTS_BATCH = True
+    SUPPORTS_STREAMING = True
+    
     def __init__(self, config: Optional[LLMConfig] = None):
         """
         Inicializar cliente Groq
@@ -87,13 +249,32 @@ class GroqLLMClient:
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
         
-        self.client = groq.Groq(api_key=api_key)
+        # Cliente asíncrono: reutiliza el pool de conexiones entre tareas.
+        # Los reintentos los hace el SDK respetando Retry-After
+        self.client = groq.AsyncGroq(
+            api_key=api_key,
+            max_retries=self.config.max_retries,
+            timeout=self.config.timeout
+        )
+        self._sem = asyncio.Semaphore(self.config.pool_size)
+        self._cost_per_token = self.PRICING.get(self.config.model, 0.0002) / 1000.0
+        
+        # Tokenizer BPE para estimar el costo antes de la request. Se carga
+        # en la primera request: get_encoding puede descargar el vocabulario
+        self._tokenizer: Any = _TOKENIZER_NOT_LOADED
         
         # Configurar cache
+        self._pending_writes: Dict[str, Dict[str, Any]] = {}
+        self._flushing_writes: Dict[str, Dict[str, Any]] = {}
+        self._last_flush = time.monotonic()
+        self._mem_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._mem_cache_max = self.config.mem_cache_max
         if self.config.cache_enabled:
-            self.cache_dir = Path(self.config.cache_dir)
-            self.cache_dir.mkdir(exist_ok=True)
-            logger.info(f"Cache enabled: {self.cache_dir}")
+            self._cache_backend = create_cache_backend(self.config)
+            if isinstance(self._cache_backend, FileCacheBackend):
+                self.cache_dir = self._cache_backend.cache_dir
+            _clients_with_cache.add(self)
+            logger.info(f"Cache enabled: {self.config.cache_backend}")
         
         logger.info(f"Groq client initialized with model: {self.config.model}")
     
@@ -108,16 +289,21 @@ class GroqLLMClient:
         Returns:
             Hash único para la cache key
         """
-        cache_data = {
-            "prompt": prompt,
-            "model": self.config.model,
-            "temperature": self.config.temperature,
-            "max_tokens": self.config.max_tokens,
-            **kwargs
-        }
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.config.model.encode())
+        h.update(b'\0')
+        h.update(struct.pack('<f', self.config.temperature))
+        h.update(struct.pack('<i', self.config.max_tokens))
+        h.update(prompt.encode('utf-8'))
         
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(cache_string.encode()).hexdigest()
+        for key, value in sorted(kwargs.items()):
+            h.update(b'\0')
+            h.update(key.encode())
+            h.update(b'\0')
+            # None se distingue de cualquier string con un byte no-UTF-8
+            h.update(b'\xff' if value is None else str(value).encode('utf-8'))
+        
+        return h.hexdigest()
     
     def _load_from_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """
@@ -132,22 +318,44 @@ class GroqLLMClient:
         if not self.config.cache_enabled:
             return None
         
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        data = self._mem_cache.get(cache_key)
+        if data is not None:
+            self._mem_cache.move_to_end(cache_key)
+            return data
+        
+        # Entradas aún no volcadas a disco
+        data = self._pending_writes.get(cache_key) or self._flushing_writes.get(cache_key)
+        if data is not None:
+            return data
         
         try:
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.debug(f"Cache hit: {cache_key}")
-                    return data
+            raw = self._cache_backend.get(cache_key)
+            if raw is not None:
+                data = _json_loads(raw)
+                logger.debug(f"Cache hit: {cache_key}")
+                self._remember(cache_key, data)
+                return data
         except Exception as e:
             logger.warning(f"Cache read error: {e}")
         
         return None
     
+    def _remember(self, cache_key: str, data: Dict[str, Any]) -> None:
+        """
+        Inserta una entrada en el LRU en memoria, desalojando la más antigua
+        
+        Args:
+            cache_key: Clave de cache
+            data: Datos a cachear
+        """
+        self._mem_cache[cache_key] = data
+        self._mem_cache.move_to_end(cache_key)
+        if len(self._mem_cache) > self._mem_cache_max:
+            self._mem_cache.popitem(last=False)
+    
     def _save_to_cache(self, cache_key: str, data: Dict[str, Any]) -> None:
         """
-        Guarda respuesta en cache
+        Guarda respuesta en cache (en memoria hasta el próximo volcado a disco)
         
         Args:
             cache_key: Clave de cache
@@ -156,14 +364,65 @@ class GroqLLMClient:
         if not self.config.cache_enabled:
             return
         
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        self._remember(cache_key, data)
+        self._pending_writes[cache_key] = data
+    
+    async def _maybe_flush_cache(self) -> None:
+        """
+        Vuelca las escrituras pendientes en un thread si hay suficientes o pasó
+        el intervalo de volcado
+        """
+        if not self._pending_writes:
+            return
+        if (len(self._pending_writes) < self.CACHE_FLUSH_MAX_PENDING and
+                time.monotonic() - self._last_flush < self.CACHE_FLUSH_INTERVAL):
+            return
+        await self.flush_cache()
+    
+    def _flush_cache_sync(self) -> None:
+        """Vuelca todas las escrituras pendientes (usado al salir del proceso)"""
+        if self._pending_writes:
+            self._write_cache_entries(self._take_pending_writes())
+    
+    async def flush_cache(self) -> None:
+        """
+        Vuelca en un thread todas las escrituras pendientes
+        
+        Conviene llamarlo antes de descartar el cliente: el hook de salida solo
+        vuelca los clientes que siguen vivos al terminar el proceso.
+        """
+        if not self._pending_writes:
+            return
         
+        pending = self._take_pending_writes()
+        self._flushing_writes.update(pending)
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
-                logger.debug(f"Cached response: {cache_key}")
-        except Exception as e:
-            logger.warning(f"Cache write error: {e}")
+            await asyncio.to_thread(self._write_cache_entries, pending)
+        finally:
+            for cache_key in pending:
+                self._flushing_writes.pop(cache_key, None)
+    
+    def _take_pending_writes(self) -> Dict[str, Dict[str, Any]]:
+        """Retira el lote de escrituras pendientes"""
+        pending = self._pending_writes
+        self._pending_writes = {}
+        self._last_flush = time.monotonic()
+        return pending
+    
+    def _write_cache_entries(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Escribe un lote de entradas en el backend de cache
+        
+        Args:
+            entries: Datos a cachear por clave
+        """
+        for cache_key, data in entries.items():
+            try:
+                self._cache_backend.set(cache_key, _json_dump_bytes(data))
+            except Exception as e:
+                logger.warning(f"Cache write error: {e}")
+        
+        logger.debug(f"Flushed {len(entries)} cached responses")
     
     def _calculate_cost(self, usage: TokenUsage) -> float:
         """
@@ -175,9 +434,47 @@ class GroqLLMClient:
         Returns:
             Costo estimado en USD
         """
-        price_per_1k = self.PRICING.get(self.config.model, 0.0002)
-        cost = (usage.total_tokens / 1000.0) * price_per_1k
-        return round(cost, 6)
+        return usage.total_tokens * self._cost_per_token
+    
+    async def _ensure_tokenizer(self) -> None:
+        """Carga el tokenizer una sola vez, fuera del event loop"""
+        if self._tokenizer is not _TOKENIZER_NOT_LOADED:
+            return
+        # Las requests concurrentes usan la aproximación mientras se carga
+        self._tokenizer = None
+        if tiktoken is None:
+            return
+        try:
+            self._tokenizer = await asyncio.to_thread(tiktoken.get_encoding, "cl100k_base")
+        except Exception as e:
+            logger.debug(f"tiktoken unavailable, using word-count estimate: {e}")
+    
+    def _estimate_prompt_tokens(self, prompt: str) -> float:
+        """
+        Estima los tokens del prompt para el control de costo
+        
+        cl100k_base no es el tokenizer de los modelos de Groq, así que el
+        conteo se infla con TOKEN_ESTIMATE_MARGIN para no quedarse corto.
+        
+        Args:
+            prompt: Prompt del usuario
+            
+        Returns:
+            Estimación con tiktoken, o aproximación por palabras si no está disponible
+        """
+        if self._tokenizer is not None and self._tokenizer is not _TOKENIZER_NOT_LOADED:
+            return len(self._tokenizer.encode(prompt)) * self.TOKEN_ESTIMATE_MARGIN
+        return (prompt.count(' ') + 1) * 1.5  # Aproximación conservadora
+    
+    def _estimate_usage(self, prompt: str, completion: str) -> TokenUsage:
+        """Estima el uso de tokens de una request cuya respuesta no lo reportó"""
+        prompt_tokens = math.ceil(self._estimate_prompt_tokens(prompt))
+        completion_tokens = math.ceil(self._estimate_prompt_tokens(completion)) if completion else 0
+        return TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        )
     
     def _check_cost_limit(self, estimated_cost: float) -> bool:
         """
@@ -194,42 +491,118 @@ class GroqLLMClient:
             return False
         return True
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    async def _make_groq_request(self, prompt: str, system_message: str = None) -> Dict[str, Any]:
+    def _reserve_cost(self, estimated_cost: float) -> None:
         """
-        Realiza request a Groq API con retry logic
+        Verifica el límite y reserva el costo estimado en el mismo paso
+        
+        No hay await entre la verificación y la actualización, así que es
+        atómico frente a otras tareas del event loop: requests concurrentes no
+        pueden superar juntas el límite de la sesión.
         
         Args:
-            prompt: Prompt del usuario
-            system_message: Mensaje del sistema opcional
+            estimated_cost: Costo estimado de la request
             
-        Returns:
-            Respuesta raw de Groq
+        Raises:
+            ValueError: Si la request excedería el límite de costo
         """
+        if not self._check_cost_limit(estimated_cost):
+            raise ValueError(f"Request would exceed cost limit of ${self.config.max_cost_per_session}")
+        self.session_cost += estimated_cost
+    
+    def _settle_cost(self, estimated_cost: float, actual_cost: float) -> None:
+        """Reemplaza la reserva por el costo real de una request completada"""
+        self.session_cost += actual_cost - estimated_cost
+        self.session_requests += 1
+    
+    def _release_cost(self, estimated_cost: float) -> None:
+        """Libera la reserva de una request fallida o cancelada"""
+        self.session_cost -= estimated_cost
+    
+    def _build_messages(self, prompt: str, system_message: str = None) -> List[Dict[str, str]]:
+        """Construye la lista de mensajes del chat"""
         messages = []
-        
         if system_message:
-            messages.append({
-                "role": "system",
-                "content": system_message
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _cached_response(self, cache_key: Optional[str], start_time: float) -> Optional[LLMResponse]:
+        """Devuelve la respuesta cacheada para cache_key, si existe"""
+        cached_data = self._load_from_cache(cache_key) if cache_key else None
+        if not cached_data:
+            return None
+        return LLMResponse(
+            content=cached_data["content"],
+            usage=TokenUsage(**cached_data["usage"]),
+            model=cached_data["model"],
+            cached=True,
+            processing_time=time.time() - start_time
+        )
+    
+    async def _reserve_prompt_cost(self, prompt: str) -> float:
+        """
+        Estima el costo del prompt y lo reserva en el presupuesto de la sesión
+        
+        Returns:
+            Costo reservado, a liquidar o liberar al terminar la request
+        """
+        await self._ensure_tokenizer()
+        # Sin await entre la estimación y la reserva
+        estimated_cost = self._estimate_prompt_tokens(prompt) * self._cost_per_token
+        self._reserve_cost(estimated_cost)
+        return estimated_cost
+    
+    async def _complete_response(self,
+                                 cache_key: Optional[str],
+                                 estimated_cost: float,
+                                 content: str,
+                                 usage: TokenUsage,
+                                 model: str,
+                                 start_time: float) -> LLMResponse:
+        """
+        Liquida el costo de una request completada, arma la respuesta y la cachea
+        """
+        usage.estimated_cost = self._calculate_cost(usage)
+        self._settle_cost(estimated_cost, usage.estimated_cost)
+        
+        llm_response = LLMResponse(
+            content=content,
+            usage=usage,
+            model=model,
+            cached=False,
+            processing_time=time.time() - start_time
+        )
+        
+        if cache_key:
+            self._save_to_cache(cache_key, {
+                "content": llm_response.content,
+                "usage": asdict(usage),
+                "model": llm_response.model
             })
+            await self._maybe_flush_cache()
         
-        messages.append({
-            "role": "user", 
-            "content": prompt
-        })
+        return llm_response
+    
+    async def _make_groq_request(self, prompt: str, system_message: str = None) -> Dict[str, Any]:
+        """
+        Realiza request a Groq API (el SDK reintenta errores transitorios)
         
+        Args:
+            prompt: Prompt del usuario
+            system_message: Mensaje del sistema opcional
+            
+        Returns:
+            Respuesta raw de Groq
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.model,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                stream=False
-            )
+            async with self._sem:
+                response = await self.client.chat.completions.create(
+                    model=self.config.model,
+                    messages=self._build_messages(prompt, system_message),
+                    temperature=self.config.temperature,
+                    max_tokens=self.config.max_tokens,
+                    stream=False
+                )
             
             return {
                 "content": response.choices[0].message.content,
@@ -262,55 +635,35 @@ class GroqLLMClient:
         """
         start_time = time.time()
         
-        # Generar cache key
-        cache_key = self._generate_cache_key(prompt, system=system_message, **kwargs)
+        # Generar cache key (solo si el cache está habilitado)
+        cache_key = (self._generate_cache_key(prompt, system=system_message, **kwargs)
+                     if self.config.cache_enabled else None)
         
         # Intentar cargar desde cache
-        cached_data = self._load_from_cache(cache_key)
-        if cached_data:
-            return LLMResponse(
-                content=cached_data["content"],
-                usage=TokenUsage(**cached_data["usage"]),
-                model=cached_data["model"],
-                cached=True,
-                processing_time=time.time() - start_time
-            )
+        cached_response = self._cached_response(cache_key, start_time)
+        if cached_response is not None:
+            return cached_response
         
-        # Estimación conservadora de tokens para verificar límite
-        estimated_tokens = len(prompt.split()) * 1.5  # Aproximación
-        estimated_cost = (estimated_tokens / 1000.0) * self.PRICING.get(self.config.model, 0.0002)
-        
-        if not self._check_cost_limit(estimated_cost):
-            raise ValueError(f"Request would exceed cost limit of ${self.config.max_cost_per_session}")
+        # Estimación de tokens para verificar límite y reservar presupuesto
+        estimated_cost = await self._reserve_prompt_cost(prompt)
         
         # Hacer request a Groq
         try:
-            response_data = await self._make_groq_request(prompt, system_message)
+            try:
+                response_data = await self._make_groq_request(prompt, system_message)
+            except BaseException:
+                self._release_cost(estimated_cost)
+                raise
             
-            # Crear TokenUsage
-            usage = TokenUsage(**response_data["usage"])
-            usage.estimated_cost = self._calculate_cost(usage)
-            
-            # Actualizar contadores de sesión
-            self.session_cost += usage.estimated_cost
-            self.session_requests += 1
-            
-            # Crear respuesta
-            llm_response = LLMResponse(
+            llm_response = await self._complete_response(
+                cache_key, estimated_cost,
                 content=response_data["content"],
-                usage=usage,
+                usage=TokenUsage(**response_data["usage"]),
                 model=response_data["model"],
-                cached=False,
-                processing_time=time.time() - start_time
+                start_time=start_time
             )
             
-            # Guardar en cache
-            self._save_to_cache(cache_key, {
-                "content": llm_response.content,
-                "usage": usage.dict(),
-                "model": llm_response.model
-            })
-            
+            usage = llm_response.usage
             logger.info(f"LLM response generated: {usage.total_tokens} tokens, ${usage.estimated_cost:.4f}")
             
             return llm_response
@@ -319,6 +672,109 @@ class GroqLLMClient:
             logger.error(f"LLM generation failed: {e}")
             raise
     
+    async def generate_stream(self,
+                              prompt: str,
+                              system_message: str = None,
+                              on_chunk: Optional[Callable[[str], None]] = None) -> LLMResponse:
+        """
+        Genera respuesta en modo streaming, notificando cada fragmento
+        
+        Permite a quien llama reaccionar a la respuesta parcial (por ejemplo,
+        leer la confianza en cuanto aparece) antes de que termine la generación.
+        
+        Args:
+            prompt: Prompt del usuario
+            system_message: Mensaje del sistema opcional
+            on_chunk: Callback invocado con cada fragmento de texto recibido
+            
+        Returns:
+            LLMResponse con el contenido completo
+        """
+        start_time = time.time()
+        
+        cache_key = (self._generate_cache_key(prompt, system=system_message)
+                     if self.config.cache_enabled else None)
+        cached_response = self._cached_response(cache_key, start_time)
+        if cached_response is not None:
+            if on_chunk is not None:
+                on_chunk(cached_response.content)
+            return cached_response
+        
+        estimated_cost = await self._reserve_prompt_cost(prompt)
+        
+        chunks = []
+        usage: Optional[TokenUsage] = None
+        model = self.config.model
+        try:
+            async with self._sem:
+                stream = await self.client.chat.completions.create(
+                    model=self.config.model,
+                    messages=self._build_messages(prompt, system_message),
+                    temperature=self.config.temperature,
+                    max_tokens=self.config.max_tokens,
+                    stream=True
+                )
+                
+                async for chunk in stream:
+                    model = chunk.model or model
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        text = chunk.choices[0].delta.content
+                        chunks.append(text)
+                        if on_chunk is not None:
+                            on_chunk(text)
+                    # Groq reporta el uso de tokens en el último fragmento
+                    chunk_usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+                    if chunk_usage is not None:
+                        usage = TokenUsage(
+                            prompt_tokens=chunk_usage.prompt_tokens,
+                            completion_tokens=chunk_usage.completion_tokens,
+                            total_tokens=chunk_usage.total_tokens
+                        )
+        except BaseException as e:
+            self._release_cost(estimated_cost)
+            if isinstance(e, Exception):
+                logger.error(f"LLM streaming failed: {e}")
+            raise
+        
+        content = "".join(chunks)
+        if usage is None:
+            # Sin uso reportado no se liquida a $0: se estima con el texto recibido
+            logger.warning("Stream ended without usage data, using estimated token counts")
+            usage = self._estimate_usage(prompt, content)
+        
+        return await self._complete_response(
+            cache_key, estimated_cost,
+            content=content,
+            usage=usage,
+            model=model,
+            start_time=start_time
+        )
+    
+    async def generate_batch(self,
+                             prompts: List[str],
+                             system_messages: Optional[List[Optional[str]]] = None) -> List[Any]:
+        """
+        Genera respuestas para varios prompts a la vez
+        
+        Groq no expone un endpoint de batch, así que las requests se lanzan
+        concurrentemente y cada una pasa por el cache y el control de costo.
+        
+        Args:
+            prompts: Prompts del usuario
+            system_messages: Mensaje del sistema para cada prompt (opcional)
+            
+        Returns:
+            Lista alineada con prompts: LLMResponse o la excepción de esa request
+        """
+        if system_messages is None:
+            system_messages = [None] * len(prompts)
+        
+        return await asyncio.gather(
+            *(self.generate(prompt, system_message=system_message)
+              for prompt, system_message in zip(prompts, system_messages)),
+            return_exceptions=True
+        )
+    
     def get_session_stats(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas de la sesión actual
@@ -341,6 +797,114 @@ class GroqLLMClient:
         logger.info("Session stats reset")
 
 
+class BatchedLLMClient:
+    """
+    Agrupa prompts concurrentes en lotes antes de enviarlos al cliente LLM
+    
+    Cada submit() encola el prompt; un worker en segundo plano espera hasta
+    max_wait segundos (o max_batch prompts) y despacha el lote completo con
+    generate_batch() si el cliente declara SUPPORTS_BATCH, o con generate()
+    concurrentes.
+    El worker arranca con el primer submit() y termina cuando la cola queda
+    vacía, así que un cliente inactivo no deja tareas pendientes en el loop.
+    """
+    
+    def __init__(self, llm_client: Any, max_batch: int = 32, max_wait: float = 0.02):
+        """
+        Args:
+            llm_client: Cliente LLM envuelto
+            max_batch: Máximo de prompts por lote
+            max_wait: Ventana de agrupación en segundos
+        """
+        self.llm_client = llm_client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatches: set = set()
+    
+    async def submit(self, prompt: str, system_message: str = None) -> Any:
+        """
+        Encola un prompt y espera su respuesta
+        
+        Args:
+            prompt: Prompt del usuario
+            system_message: Mensaje del sistema opcional
+            
+        Returns:
+            Respuesta del cliente LLM para este prompt
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((prompt, system_message, future))
+        return await future
+    
+    def _ensure_worker(self) -> None:
+        """Arranca el worker en el event loop actual si no está corriendo"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect_batches())
+    
+    async def _collect_batches(self) -> None:
+        """Agrupa prompts en lotes y los despacha hasta vaciar la cola"""
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()]
+            deadline = self._loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[str, Optional[str], asyncio.Future]]) -> None:
+        """Envía un lote al cliente y resuelve cada future en orden"""
+        prompts = [prompt for prompt, _, _ in batch]
+        system_messages = [system_message for _, system_message, _ in batch]
+        
+        try:
+            if supports_capability(self.llm_client, 'SUPPORTS_BATCH'):
+                results = await self.llm_client.generate_batch(prompts, system_messages)
+            else:
+                results = await asyncio.gather(
+                    *(self.llm_client.generate(prompt=prompt, system_message=system_message)
+                      for prompt, system_message in zip(prompts, system_messages)),
+                    return_exceptions=True
+                )
+        except Exception as e:
+            logger.error(f"Batched LLM dispatch failed: {e}")
+            results = [e] * len(batch)
+        
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue  # El llamador canceló su espera
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    async def close(self) -> None:
+        """Detiene el worker de agrupación"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+
 # Singleton para uso global
 _global_llm_client: Optional[GroqLLMClient] = None
 
@@ -8,14 +8,90 @@ basado en análisis contextual, patrones de código y heurísticas específicas.
 
 import ast
 import re
+import hashlib
 import logging
-from typing import Dict, Any, List, Set, Optional, Tuple
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Set, Optional, Tuple, Callable, Iterator
 from dataclasses import dataclass
 from .base_agent import DependencyMap
 
 logger = logging.getLogger(__name__)
 
 
+def _add_target_names(target: ast.AST, definitions: Set[str]) -> None:
+    """Agrega los nombres de un target de asignación, desempaquetando tuplas"""
+    if isinstance(target, ast.Name):
+        definitions.add(target.id)
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for element in target.elts:
+            _add_target_names(element, definitions)
+    elif isinstance(target, ast.Starred):
+        _add_target_names(target.value, definitions)
+
+
+def _h_assign(node: ast.Assign, definitions: Set[str]) -> None:
+    for target in node.targets:
+        _add_target_names(target, definitions)
+
+
+def _h_named(node: ast.AST, definitions: Set[str]) -> None:
+    definitions.add(node.name)
+
+
+def _h_import(node: ast.AST, definitions: Set[str]) -> None:
+    for alias in node.names:
+        definitions.add(alias.asname or alias.name)
+
+
+def _h_for(node: ast.AST, definitions: Set[str]) -> None:
+    _add_target_names(node.target, definitions)
+
+
+# Definiciones locales por hash del snippet (LRU compartido entre instancias/threads)
+_LOCAL_DEFS_CACHE: "OrderedDict[bytes, frozenset]" = OrderedDict()
+_LOCAL_DEFS_CACHE_MAX = 256
+_LOCAL_DEFS_LOCK = threading.Lock()
+
+# Nodos que introducen definiciones locales -> handler (lookup O(1) por tipo)
+_DEFINITION_HANDLERS = {
+    ast.Assign: _h_assign,
+    ast.FunctionDef: _h_named,
+    ast.AsyncFunctionDef: _h_named,
+    ast.ClassDef: _h_named,
+    ast.Import: _h_import,
+    ast.ImportFrom: _h_import,
+    ast.For: _h_for,
+    ast.AsyncFor: _h_for,
+    ast.comprehension: _h_for,
+}
+
+
+# Nombres built-in de Python que no necesitan dependencias
+_BUILTIN_NAMES: frozenset = frozenset({
+    # Funciones built-in
+    'abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytearray', 'bytes',
+    'callable', 'chr', 'classmethod', 'compile', 'complex', 'delattr',
+    'dict', 'dir', 'divmod', 'enumerate', 'eval', 'exec', 'filter',
+    'float', 'format', 'frozenset', 'getattr', 'globals', 'hasattr',
+    'hash', 'help', 'hex', 'id', 'input', 'int', 'isinstance',
+    'issubclass', 'iter', 'len', 'list', 'locals', 'map', 'max',
+    'memoryview', 'min', 'next', 'object', 'oct', 'open', 'ord',
+    'pow', 'print', 'property', 'range', 'repr', 'reversed', 'round',
+    'set', 'setattr', 'slice', 'sorted', 'staticmethod', 'str', 'sum',
+    'super', 'tuple', 'type', 'vars', 'zip',
+    
+    # Excepciones built-in
+    'Exception', 'ValueError', 'TypeError', 'KeyError', 'IndexError',
+    'AttributeError', 'ImportError', 'RuntimeError', 'StopIteration',
+    
+    # Constantes
+    'True', 'False', 'None', '__name__', '__main__', '__debug__'
+})
+
+_DUNDER_METHODS: frozenset = frozenset({'__init__', '__str__', '__repr__', '__len__', '__iter__'})
+
+
 @dataclass
 class FilterRule:
     """Regla de filtrado con metadatos"""
@@ -24,6 +100,8 @@ class FilterRule:
     confidence_threshold: float
     applies_to: List[str]  # ['variables', 'classes', 'imports', 'functions']
     enabled: bool = True
+    # check(rule, name, details, category, confidence, local_definitions) -> (should_filter, reason)
+    check: Optional[Callable[..., Tuple[bool, str]]] = None
 
 
 class PrecisionFilter:
@@ -31,82 +109,132 @@ class PrecisionFilter:
     Sistema de filtrado inteligente para mejorar precisión
     """
     
+    # Fallback sin AST: asignaciones, def, class, import y from-import en una sola pasada
+    _DEF_RE = re.compile(
+        r'(?m)^[ \t]*(?:(?P<assign>\w+)\s*=|def\s+(?P<func>\w+)|class\s+(?P<cls>\w+)'
+        r'|import\s+(?P<imp>\w+)|from\s+\w+\s+import\s+(?P<frm>\w+))'
+    )
+    
+    _CATEGORIES = ('variables', 'classes', 'imports', 'functions')
+    
     def __init__(self):
-        self.builtin_names = self._load_python_builtins()
+        self.builtin_names = _BUILTIN_NAMES
         self.common_patterns = self._load_common_patterns()
         self.filter_rules = self._initialize_filter_rules()
+        self._index_rules()
     
-    def _load_python_builtins(self) -> Set[str]:
-        """Carga nombres built-in de Python que no necesitan dependencias"""
-        return {
-            # Funciones built-in
-            'abs', 'all', 'any', 'ascii', 'bin', 'bool', 'bytearray', 'bytes',
-            'callable', 'chr', 'classmethod', 'compile', 'complex', 'delattr',
-            'dict', 'dir', 'divmod', 'enumerate', 'eval', 'exec', 'filter',
-            'float', 'format', 'frozenset', 'getattr', 'globals', 'hasattr',
-            'hash', 'help', 'hex', 'id', 'input', 'int', 'isinstance',
-            'issubclass', 'iter', 'len', 'list', 'locals', 'map', 'max',
-            'memoryview', 'min', 'next', 'object', 'oct', 'open', 'ord',
-            'pow', 'print', 'property', 'range', 'repr', 'reversed', 'round',
-            'set', 'setattr', 'slice', 'sorted', 'staticmethod', 'str', 'sum',
-            'super', 'tuple', 'type', 'vars', 'zip',
+    def _rules_key(self) -> Tuple[Tuple[int, bool, Tuple[str, ...]], ...]:
+        """Identidad, enabled y categorías de las reglas, para detectar un índice obsoleto"""
+        return tuple((id(rule), rule.enabled, tuple(rule.applies_to)) for rule in self.filter_rules)
+    
+    def _ensure_rule_index(self) -> None:
+        """Reindexa (reglas por item, exclusiones y regla local) si cambiaron las reglas"""
+        if self._rules_key() != self._indexed_rules_key:
+            self._index_rules()
+    
+    def _index_rules(self) -> None:
+        """
+        Agrupa las reglas habilitadas por categoría
+        
+        filter_dependencies_with_stats() lo vuelve a llamar si cambian las reglas.
+        """
+        self._indexed_rules_key = self._rules_key()
+        self._rules_by_category: Dict[str, Tuple[FilterRule, ...]] = {}
+        self._excluded_by_category: Dict[str, frozenset] = {}
+        self._local_rule_by_category: Dict[str, Optional[FilterRule]] = {}
+        
+        for category in self._CATEGORIES:
+            excluded = set()
+            local_rule = None
+            item_rules = []
             
-            # Excepciones built-in
-            'Exception', 'ValueError', 'TypeError', 'KeyError', 'IndexError',
-            'AttributeError', 'ImportError', 'RuntimeError', 'StopIteration',
+            for rule in self.filter_rules:
+                if not rule.enabled or rule.check is None or category not in rule.applies_to:
+                    continue
+                # Reglas de pertenencia pura: se resuelven en bloque con conjuntos
+                if rule.check == self._check_builtin:
+                    excluded |= self.builtin_names
+                elif rule.check == self._check_self:
+                    excluded.add('self')
+                elif rule.check == self._check_local_definition:
+                    local_rule = rule
+                else:
+                    item_rules.append(rule)
             
-            # Constantes
-            'True', 'False', 'None', '__name__', '__main__', '__debug__'
-        }
+            self._rules_by_category[category] = tuple(item_rules)
+            self._excluded_by_category[category] = frozenset(excluded)
+            self._local_rule_by_category[category] = local_rule
+    
+    @classmethod
+    def _cat_items(cls, dependency_map: DependencyMap) -> Iterator[Tuple[str, Dict[str, Dict]]]:
+        """Itera (categoría, items) leyendo los campos del modelo una sola vez"""
+        fields = dependency_map.__dict__
+        for category in cls._CATEGORIES:
+            yield category, fields[category]
     
-    def _load_common_patterns(self) -> Dict[str, List[str]]:
+    def _load_python_builtins(self) -> Set[str]:
+        """Carga nombres built-in de Python que no necesitan dependencias"""
+        return _BUILTIN_NAMES
+    
+    def _load_common_patterns(self) -> Dict[str, Any]:
         """Patrones comunes que suelen generar falsos positivos"""
         return {
             'loop_variables': ['i', 'j', 'k', 'idx', 'index', 'item', 'elem', 'x', 'y', 'z'],
             'temp_variables': ['temp', 'tmp', 'result', 'output', 'data', 'value', 'val'],
             'common_aliases': ['pd', 'np', 'plt', 'sns', 'tf', 'cv2', 'sk'],
-            'dunder_methods': ['__init__', '__str__', '__repr__', '__len__', '__iter__'],
+            'dunder_methods': _DUNDER_METHODS,
             'test_variables': ['test_', 'mock_', 'fake_', 'dummy_', 'sample_']
         }
     
     def _initialize_filter_rules(self) -> List[FilterRule]:
         """Inicializa reglas de filtrado"""
+        # Orden por selectividad/costo: el filtrado se detiene en la primera regla
+        # que aplica, así que las más baratas y que más descartan van primero.
+        # Reglas nuevas: insertarlas según su costo (pertenencia a conjuntos
+        # pequeños antes que comparaciones por item; búsquedas en conjuntos
+        # grandes por snippet al final).
         return [
+            FilterRule(
+                name="self_parameter",
+                description="Filtra parámetro 'self' de métodos",
+                confidence_threshold=0.0,
+                applies_to=['variables'],
+                check=self._check_self
+            ),
             FilterRule(
                 name="builtin_filter",
                 description="Filtra nombres built-in de Python",
                 confidence_threshold=0.0,
-                applies_to=['variables', 'functions']
+                applies_to=['variables', 'functions'],
+                check=self._check_builtin
+            ),
+            FilterRule(
+                name="low_confidence",
+                description="Filtra dependencias con confianza muy baja",
+                confidence_threshold=0.3,
+                applies_to=['variables', 'classes', 'imports', 'functions'],
+                check=self._check_low_confidence
             ),
             FilterRule(
                 name="single_letter_variables",
                 description="Filtra variables de una sola letra (probable loop vars)",
                 confidence_threshold=0.7,
-                applies_to=['variables']
+                applies_to=['variables'],
+                check=self._check_single_letter
             ),
             FilterRule(
                 name="dunder_methods",
                 description="Filtra métodos dunder comunes",
                 confidence_threshold=0.8,
-                applies_to=['functions']
-            ),
-            FilterRule(
-                name="self_parameter",
-                description="Filtra parámetro 'self' de métodos",
-                confidence_threshold=0.0,
-                applies_to=['variables']
+                applies_to=['functions'],
+                check=self._check_dunder
             ),
             FilterRule(
                 name="local_definitions",
                 description="Filtra definiciones que están en el mismo snippet",
                 confidence_threshold=0.9,
-                applies_to=['variables', 'functions', 'classes']
-            ),
-            FilterRule(
-                name="low_confidence",
-                description="Filtra dependencias con confianza muy baja",
-                confidence_threshold=0.3,
-                applies_to=['variables', 'classes', 'imports', 'functions']
+                applies_to=['variables', 'functions', 'classes'],
+                check=self._check_local_definition
             )
         ]
     
@@ -125,66 +253,105 @@ class PrecisionFilter:
         Returns:
             DependencyMap filtrado con mejor precisión
         """
-        filtered_map = DependencyMap(
-            variables={},
-            classes={},
-            imports={},
-            functions={},
-            confidence=dependency_map.confidence,
-            error=dependency_map.error
-        )
+        return self.filter_dependencies_with_stats(
+            dependency_map, snippet_content, context_analysis
+        )[0]
+    
+    def filter_dependencies_with_stats(self,
+                                       dependency_map: DependencyMap,
+                                       snippet_content: str,
+                                       context_analysis: Optional[Dict] = None
+                                       ) -> Tuple[DependencyMap, Dict[str, Any]]:
+        """
+        Aplica filtros y recolecta las estadísticas en la misma pasada
+        
+        Equivale a filter_dependencies() seguido de analyze_filter_effectiveness(),
+        sin volver a recorrer las categorías.
+        
+        Args:
+            dependency_map: Mapa de dependencias original
+            snippet_content: Contenido del snippet analizado
+            context_analysis: Análisis adicional del contexto
+            
+        Returns:
+            Tuple de (DependencyMap filtrado, estadísticas del filtrado)
+        """
+        # rule.enabled y rule.applies_to pueden cambiar entre llamadas
+        self._ensure_rule_index()
         
         # Análisis del snippet para identificar definiciones locales
         local_definitions = self._extract_local_definitions(snippet_content)
         
         # Filtrar cada categoría
-        filtered_map.variables = self._filter_category(
-            dependency_map.variables, 'variables', snippet_content, local_definitions
-        )
-        
-        filtered_map.classes = self._filter_category(
-            dependency_map.classes, 'classes', snippet_content, local_definitions
-        )
-        
-        filtered_map.imports = self._filter_category(
-            dependency_map.imports, 'imports', snippet_content, local_definitions
-        )
-        
-        filtered_map.functions = self._filter_category(
-            dependency_map.functions, 'functions', snippet_content, local_definitions
-        )
+        stats: Dict[str, Any] = {}
+        filtered = {
+            category: self._filter_category(
+                items, category, snippet_content, local_definitions, stats
+            )
+            for category, items in self._cat_items(dependency_map)
+        }
         
         # Ajustar confianza basado en el filtrado
-        original_count = sum(len(getattr(dependency_map, attr, {})) for attr in ['variables', 'classes', 'imports', 'functions'])
-        filtered_count = sum(len(getattr(filtered_map, attr, {})) for attr in ['variables', 'classes', 'imports', 'functions'])
+        original_count = sum(cat_stats['before_count'] for cat_stats in stats.values())
+        filtered_count = sum(cat_stats['after_count'] for cat_stats in stats.values())
         
+        confidence = dependency_map.confidence
         if original_count > 0:
             filter_ratio = filtered_count / original_count
             # Si filtramos mucho, aumentamos la confianza (menos ruido)
             if filter_ratio < 0.7:
-                filtered_map.confidence = min(1.0, filtered_map.confidence + 0.1)
+                confidence = min(1.0, confidence + 0.1)
+        
+        filtered_map = DependencyMap(
+            **filtered,
+            confidence=confidence,
+            error=dependency_map.error
+        )
         
-        return filtered_map
+        stats['overall'] = self._overall_filter_stats(
+            original_count, filtered_count, filtered_map.confidence - dependency_map.confidence
+        )
+        return filtered_map, stats
     
     def _filter_category(self, 
                         items: Dict[str, Dict], 
                         category: str, 
                         snippet_content: str,
-                        local_definitions: Set[str]) -> Dict[str, Dict]:
-        """Filtra una categoría específica de dependencias"""
+                        local_definitions: Set[str],
+                        stats: Optional[Dict[str, Any]] = None) -> Dict[str, Dict]:
+        """
+        Filtra una categoría específica de dependencias
+        
+        Si se pasa stats, agrega allí las estadísticas de la categoría.
+        """
         filtered_items = {}
+        filtered_out = []
+        
+        rules = self._rules_by_category.get(category, ())
+        
+        # Built-ins, 'self' y definiciones locales: diferencia de conjuntos en bloque
+        dropped = items.keys() & self._excluded_by_category.get(category, frozenset())
+        local_rule = self._local_rule_by_category.get(category)
+        if local_rule is not None:
+            threshold = local_rule.confidence_threshold
+            dropped.update(name for name in items.keys() & local_definitions
+                           if items[name].get('confidence', 0.5) > threshold)
+        if dropped:
+            logger.debug("Filtered %s %s: built-in, 'self' or defined locally", category, sorted(dropped))
         
         for name, details in items.items():
+            if name in dropped:
+                filtered_out.append(name)
+                continue
+            
             # Aplicar cada regla de filtrado
             keep_item = True
             filter_reason = None
+            confidence = details.get('confidence', 0.5)
             
-            for rule in self.filter_rules:
-                if not rule.enabled or category not in rule.applies_to:
-                    continue
-                
-                should_filter, reason = self._apply_filter_rule(
-                    rule, name, details, category, snippet_content, local_definitions
+            for rule in rules:
+                should_filter, reason = rule.check(
+                    rule, name, details, category, confidence, local_definitions
                 )
                 
                 if should_filter:
@@ -196,55 +363,77 @@ class PrecisionFilter:
             if keep_item:
                 filtered_items[name] = details
             else:
+                filtered_out.append(name)
                 logger.debug(f"Filtered {category} '{name}': {filter_reason}")
         
+        if stats is not None:
+            before_count = len(items)
+            stats[category] = {
+                'before_count': before_count,
+                'after_count': len(filtered_items),
+                'filtered_count': len(filtered_out),
+                'filter_rate': len(filtered_out) / before_count if before_count > 0 else 0,
+                'filtered_items': filtered_out
+            }
+        
         return filtered_items
     
-    def _apply_filter_rule(self, 
-                          rule: FilterRule, 
-                          name: str, 
-                          details: Dict, 
-                          category: str,
-                          snippet_content: str,
-                          local_definitions: Set[str]) -> Tuple[bool, str]:
+    def _check_builtin(self, rule, name, details, category, confidence, local_definitions):
+        if name in self.builtin_names:
+            return True, f"Built-in Python name"
+        return False, ""
+    
+    def _check_single_letter(self, rule, name, details, category, confidence, local_definitions):
+        if len(name) == 1 and confidence < rule.confidence_threshold:
+            return True, f"Single letter variable with low confidence"
+        return False, ""
+    
+    def _check_dunder(self, rule, name, details, category, confidence, local_definitions):
+        if name in _DUNDER_METHODS and confidence < rule.confidence_threshold:
+            return True, f"Common dunder method with low confidence"
+        return False, ""
+    
+    def _check_self(self, rule, name, details, category, confidence, local_definitions):
+        if name == 'self':
+            return True, f"Method 'self' parameter"
+        return False, ""
+    
+    def _check_local_definition(self, rule, name, details, category, confidence, local_definitions):
+        if name in local_definitions and confidence > rule.confidence_threshold:
+            return True, f"Defined locally in same snippet"
+        return False, ""
+    
+    def _check_low_confidence(self, rule, name, details, category, confidence, local_definitions):
+        if confidence < rule.confidence_threshold:
+            return True, f"Confidence too low ({confidence:.2f})"
+        return False, ""
+    
+    def _extract_local_definitions(self, snippet_content: str) -> frozenset:
         """
-        Aplica una regla de filtrado específica
+        Extrae nombres definidos localmente en el snippet
         
-        Returns:
-            Tuple de (should_filter, reason)
+        El resultado se memoiza por hash del contenido: un mismo snippet
+        filtrado con distintos mapas se parsea una sola vez.
         """
-        confidence = details.get('confidence', 0.5)
-        
-        if rule.name == "builtin_filter":
-            if name in self.builtin_names:
-                return True, f"Built-in Python name"
+        key = hashlib.blake2b(snippet_content.encode('utf-8'), digest_size=8).digest()
+        with _LOCAL_DEFS_LOCK:
+            cached = _LOCAL_DEFS_CACHE.get(key)
+            if cached is not None:
+                _LOCAL_DEFS_CACHE.move_to_end(key)
+                return cached
         
-        elif rule.name == "single_letter_variables":
-            if category == 'variables' and len(name) == 1 and confidence < rule.confidence_threshold:
-                return True, f"Single letter variable with low confidence"
+        definitions = frozenset(self._parse_local_definitions(snippet_content))
         
-        elif rule.name == "dunder_methods":
-            if category == 'functions' and name.startswith('__') and name.endswith('__'):
-                if name in self.common_patterns['dunder_methods'] and confidence < rule.confidence_threshold:
-                    return True, f"Common dunder method with low confidence"
+        with _LOCAL_DEFS_LOCK:
+            _LOCAL_DEFS_CACHE[key] = definitions
+            if len(_LOCAL_DEFS_CACHE) > _LOCAL_DEFS_CACHE_MAX:
+                _LOCAL_DEFS_CACHE.popitem(last=False)
         
-        elif rule.name == "self_parameter":
-            if category == 'variables' and name == 'self':
-                return True, f"Method 'self' parameter"
-        
-        elif rule.name == "local_definitions":
-            if name in local_definitions and confidence > rule.confidence_threshold:
-                return True, f"Defined locally in same snippet"
-        
-        elif rule.name == "low_confidence":
-            if confidence < rule.confidence_threshold:
-                return True, f"Confidence too low ({confidence:.2f})"
-        
-        return False, ""
+        return definitions
     
-    def _extract_local_definitions(self, snippet_content: str) -> Set[str]:
+    def _parse_local_definitions(self, snippet_content: str) -> Set[str]:
         """
-        Extrae nombres definidos localmente en el snippet
+        Parsea el snippet (AST, o regex si no compila) y extrae sus definiciones
         """
         definitions = set()
         
@@ -252,54 +441,18 @@ class PrecisionFilter:
             # Usar AST para análisis preciso
             tree = ast.parse(snippet_content)
             
+            handlers = _DEFINITION_HANDLERS
             for node in ast.walk(tree):
-                # Variables asignadas
-                if isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            definitions.add(target.id)
-                
-                # Funciones definidas
-                elif isinstance(node, ast.FunctionDef):
-                    definitions.add(node.name)
-                
-                # Clases definidas
-                elif isinstance(node, ast.ClassDef):
-                    definitions.add(node.name)
-                
-                # Imports
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        definitions.add(alias.asname or alias.name)
-                
-                elif isinstance(node, ast.ImportFrom):
-                    for alias in node.names:
-                        definitions.add(alias.asname or alias.name)
-                
-                # Variables en list comprehensions, loops, etc.
-                elif isinstance(node, (ast.For, ast.comprehension)):
-                    if isinstance(node.target, ast.Name):
-                        definitions.add(node.target.id)
+                handler = handlers.get(type(node))
+                if handler is not None:
+                    handler(node, definitions)
         
         except SyntaxError:
             # Si hay errores de sintaxis, usar regex como fallback
             logger.debug("Using regex fallback for local definitions")
             
-            # Patrones de definición
-            patterns = [
-                r'^(\w+)\s*=',  # Asignaciones
-                r'^def\s+(\w+)',  # Definiciones de función
-                r'^class\s+(\w+)',  # Definiciones de clase
-                r'^import\s+(\w+)',  # Imports simples
-                r'^from\s+\w+\s+import\s+(\w+)',  # From imports
-            ]
-            
-            for line in snippet_content.split('\n'):
-                line = line.strip()
-                for pattern in patterns:
-                    match = re.match(pattern, line)
-                    if match:
-                        definitions.add(match.group(1))
+            for match in self._DEF_RE.finditer(snippet_content):
+                definitions.add(next(group for group in match.groups() if group))
         
         return definitions
     
@@ -314,10 +467,8 @@ class PrecisionFilter:
         """
         stats = {}
         
-        for category in ['variables', 'classes', 'imports', 'functions']:
-            before_items = getattr(before, category, {})
-            after_items = getattr(after, category, {})
-            
+        for (category, before_items), (_, after_items) in zip(self._cat_items(before),
+                                                              self._cat_items(after)):
             before_count = len(before_items)
             after_count = len(after_items)
             filtered_count = before_count - after_count
@@ -327,22 +478,31 @@ class PrecisionFilter:
                 'after_count': after_count,
                 'filtered_count': filtered_count,
                 'filter_rate': filtered_count / before_count if before_count > 0 else 0,
-                'filtered_items': list(set(before_items.keys()) - set(after_items.keys()))
+                'filtered_items': [name for name in before_items if name not in after_items]
             }
         
         # Estadísticas generales
         total_before = sum(stats[cat]['before_count'] for cat in stats)
         total_after = sum(stats[cat]['after_count'] for cat in stats)
         
-        stats['overall'] = {
+        stats['overall'] = self._overall_filter_stats(
+            total_before, total_after, after.confidence - before.confidence
+        )
+        
+        return stats
+    
+    @staticmethod
+    def _overall_filter_stats(total_before: int,
+                              total_after: int,
+                              confidence_improvement: float) -> Dict[str, Any]:
+        """Estadísticas generales a partir de los totales por categoría"""
+        return {
             'total_before': total_before,
             'total_after': total_after,
             'total_filtered': total_before - total_after,
             'overall_filter_rate': (total_before - total_after) / total_before if total_before > 0 else 0,
-            'confidence_improvement': after.confidence - before.confidence
+            'confidence_improvement': confidence_improvement
         }
-        
-        return stats
     
     def get_filter_recommendations(self, 
                                  dependency_map: DependencyMap,
@@ -352,11 +512,12 @@ class PrecisionFilter:
         """
         recommendations = []
         
-        # Analizar patrones en las dependencias encontradas
+        # Analizar patrones y confianza en las dependencias encontradas
         all_names = []
-        for category in ['variables', 'classes', 'imports', 'functions']:
-            items = getattr(dependency_map, category, {})
+        confidences = []
+        for _, items in self._cat_items(dependency_map):
             all_names.extend(items.keys())
+            confidences.extend(item.get('confidence', 0.5) for item in items.values())
         
         # Detectar patrones sospechosos
         builtin_count = sum(1 for name in all_names if name in self.builtin_names)
@@ -375,11 +536,6 @@ class PrecisionFilter:
             )
         
         # Analizar confianza promedio
-        confidences = []
-        for category in ['variables', 'classes', 'imports', 'functions']:
-            items = getattr(dependency_map, category, {})
-            confidences.extend(item.get('confidence', 0.5) for item in items.values())
-        
         if confidences:
             avg_confidence = sum(confidences) / len(confidences)
             if avg_confidence < 0.5:
@@ -414,10 +570,13 @@ class PrecisionFilter:
             name=f"custom_{name}",
             description=description,
             confidence_threshold=0.5,
-            applies_to=applies_to
+            applies_to=applies_to,
+            check=lambda rule, item_name, details, category, confidence, local_definitions:
+                filter_function(item_name, details, category)
         )
         
         self.filter_rules.append(rule)
+        self._index_rules()
         return rule
 
 
@@ -10,13 +10,102 @@ comunes y fallbacks progresivos.
 import json
 import re
 import logging
+from collections import Counter
+from functools import lru_cache
 from typing import Dict, Any, Optional, List, Union, Tuple
 from dataclasses import dataclass
 
+try:
+    import orjson
+    _json_loads = orjson.loads  # Sus errores heredan de json.JSONDecodeError
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+try:
+    from json_repair import loads as _json_repair_loads
+except ImportError:
+    _json_repair_loads = None
+
+try:
+    import json5
+except ImportError:
+    json5 = None
+
 logger = logging.getLogger(__name__)
 
+# Patrones precompilados de las estrategias de limpieza
+_RE_JSON_BLOCK = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+_RE_GENERIC_BLOCK = re.compile(r'```\s*(\{.*?\})\s*```', re.DOTALL)
+_RE_FIRST_OBJ = re.compile(r'(\{.*?\})', re.DOTALL)
+
+# Texto explicativo alrededor del objeto JSON
+_RE_PREAMBLE_ANCHORS = (
+    re.compile(r'^[^{]*(\{.*\})[^}]*$', re.DOTALL | re.IGNORECASE),  # Extraer solo el objeto JSON
+    re.compile(r'(?:Here\'s the JSON|Here is the JSON|The JSON response is)[:\s]*(\{.*\})',
+               re.DOTALL | re.IGNORECASE),
+    re.compile(r'(\{.*\})(?:\s*(?:This|That|The above).*)?$', re.DOTALL | re.IGNORECASE),
+)
+
+# Tokens que _normalize_fast reescribe; los strings JSON se consumen enteros
+# para que su contenido no se modifique
+_RE_NORMALIZE_TOKEN = re.compile(
+    r'"(?:[^"\\]|\\.)*"'         # String JSON: se copia tal cual
+    r"|'([^']*)':"                  # Clave con comillas simples
+    r'|\b(True|False|None)\b'       # Literales de Python
+    r'|//[^\n]*'                    # Comentario de línea
+    r'|/\*.*?\*/',                  # Comentario de bloque
+    re.DOTALL
+)
+_PY_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+def _normalize_token(match: re.Match) -> str:
+    key, literal = match.groups()
+    if key is not None:
+        return f'"{key}":'
+    if literal is not None:
+        return _PY_LITERALS[literal]
+    token = match.group(0)
+    return token if token[0] == '"' else ''
+
+
+def _normalize_fast(content: str) -> str:
+    """
+    Normaliza sintaxis Python/JS a JSON en una sola pasada
+    
+    Convierte claves con comillas simples y True/False/None, y elimina
+    comentarios // y /* */, sin tocar el contenido de strings JSON.
+    """
+    return _RE_NORMALIZE_TOKEN.sub(_normalize_token, content)
+
+_RE_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+_RE_TRAILING_COMMA_NEWLINE = re.compile(r',(\s*\n\s*[}\]])')
+_RE_STRING_VALUE = re.compile(r'"([^"]+)":\s*"([^"]*(?:[^"\\][^"])*)"')
+_RE_MULTILINE_VALUE = re.compile(r'"([^"]+)":\s*"([^"]*\n[^"]*)"', re.DOTALL)
+_RE_LONE_BACKSLASH = re.compile(r'(?<!\\)\\(?!["\\/bfnrtu])')
 
-@dataclass
+# Llaves fuera de strings; un string sin cerrar consume el resto del contenido
+_RE_BRACE_OR_STRING = re.compile(r'"(?:[^"\\]|\\.)*("?)|[{}]', re.DOTALL)
+
+# Estrategias a probar primero según el prefijo del contenido; si fallan se
+# sigue con la secuencia completa de RobustJSONParser._STRATEGIES
+_FAST_PATHS = (
+    ('```', ('_extract_json_blocks',)),
+    ('{', ('_fix_trailing_commas', '_fix_common_llm_errors')),
+)
+_DEFAULT_FAST_PATH = ('_fix_common_llm_errors',)  # Texto explicativo antes del JSON
+
+# Secciones de dependencias de la respuesta del LLM
+_DEPENDENCY_SECTIONS = ("variables", "classes", "imports", "functions")
+
+# Mismo patrón para las cuatro categorías de dependencias
+_RE_DEFINED_IN_SNIPPET = re.compile(r'"([^"]+)":\s*\{\s*"defined_in_snippet":\s*(\d+)')
+_RE_OVERALL_CONF = re.compile(r'"overall_confidence":\s*([\d.]+)')
+
+
+@dataclass(slots=True)
 class ParseResult:
     """Resultado del parsing JSON"""
     success: bool
@@ -31,22 +120,64 @@ class ParseResult:
             self.errors = []
 
 
+class IncrementalConfidenceScanner:
+    """
+    Detecta "overall_confidence" en una respuesta JSON que llega por fragmentos
+    
+    Solo conserva una cola corta del texto ya visto, así que cada fragmento se
+    procesa en tiempo proporcional a su tamaño.
+    """
+    
+    _CONFIDENCE_PATTERN = re.compile(r'"overall_confidence"\s*:\s*(-?[0-9]+(?:\.[0-9]+)?)\s*[,}\n]')
+    _TAIL_SIZE = 64
+    
+    def __init__(self):
+        self.confidence: Optional[float] = None
+        self._tail = ""
+    
+    def feed(self, chunk: str) -> Optional[float]:
+        """
+        Procesa un fragmento
+        
+        Returns:
+            La confianza la primera vez que se completa su valor, si no None
+        """
+        if self.confidence is not None:
+            return None
+        
+        window = self._tail + chunk
+        match = self._CONFIDENCE_PATTERN.search(window)
+        if match:
+            self.confidence = float(match.group(1))
+            return self.confidence
+        
+        self._tail = window[-self._TAIL_SIZE:]
+        return None
+
+
 class RobustJSONParser:
     """
     Parser JSON extremadamente robusto con múltiples estrategias de recuperación
     """
     
     def __init__(self):
-        self.cleaning_strategies = [
-            self._extract_json_blocks,
-            self._fix_common_llm_errors,
-            self._fix_trailing_commas,
-            self._fix_quotes,
-            self._fix_multiline_strings,
-            self._fix_unescaped_chars,
-            self._extract_partial_json,
-            self._build_json_from_patterns
-        ]
+        positions = {strategy.__name__: i for i, strategy in enumerate(self._STRATEGIES)}
+        self._fast_paths = tuple(
+            (prefix, tuple(positions[name] for name in names))
+            for prefix, names in _FAST_PATHS
+        )
+        self._default_fast_path = tuple(positions[name] for name in _DEFAULT_FAST_PATH)
+        
+        # Reparaciones memoizadas por contenido (reintentos y respuestas repetidas)
+        self._repair_cached = lru_cache(maxsize=1024)(self._repair)
+    
+    def cache_info(self):
+        """Estadísticas del cache de reparaciones (hits, misses, tamaño)"""
+        return self._repair_cached.cache_info()
+    
+    def clear_cache(self) -> None:
+        """Vacía el cache de reparaciones"""
+        self._repair_cached.cache_clear()
     
     def parse(self, content: str) -> ParseResult:
         """
@@ -62,7 +193,7 @@ class RobustJSONParser:
         
         # Estrategia 1: Parsing directo
         try:
-            data = json.loads(original_content)
+            data = _json_loads(original_content)
             return ParseResult(
                 success=True,
                 data=data,
@@ -72,35 +203,65 @@ class RobustJSONParser:
         except json.JSONDecodeError as e:
             logger.debug(f"Direct parsing failed: {e}")
         
+        # Los datos se guardan serializados: cada llamada recibe objetos nuevos
+        success, data_json, method_used, cleaned_content, errors = self._repair_cached(original_content)
+        return ParseResult(
+            success=success,
+            data=_json_loads(data_json),
+            method_used=method_used,
+            original_content=original_content,
+            cleaned_content=cleaned_content,
+            errors=list(errors)
+        )
+    
+    def _repair(self, original_content: str) -> Tuple[bool, Union[str, bytes], str, Optional[str], Tuple[str, ...]]:
+        """Repara el contenido y devuelve las partes inmutables del ParseResult"""
+        result = self._repair_uncached(original_content)
+        return (result.success, _json_dumps(result.data), result.method_used,
+                result.cleaned_content, tuple(result.errors))
+    
+    def _repair_uncached(self, original_content: str) -> ParseResult:
+        """
+        Aplica las estrategias de reparación a contenido que no es JSON válido
+        
+        Args:
+            original_content: Contenido ya sin espacios alrededor
+            
+        Returns:
+            ParseResult con el resultado del parsing
+        """
+        # Contenido limpio por estrategia, reutilizado por el fallback JSON5
+        cleaned_by_index: Dict[int, str] = {}
+        
+        # Estrategias dirigidas según el prefijo (markdown, objeto, texto)
+        fast_path = self._select_fast_path(original_content)
+        for i in fast_path:
+            result = self._try_strategy(i, original_content, cleaned_by_index)
+            if result is not None:
+                return result
+        
+        # Reparación genérica con json_repair, si está instalado, antes de que
+        # el fallback de patrones reconstruya el JSON
+        if _json_repair_loads is not None:
+            result = self._try_json_repair(original_content)
+            if result is not None:
+                return result
+        
         # Estrategias progresivas de limpieza
-        for i, strategy in enumerate(self.cleaning_strategies):
-            try:
-                cleaned_content = strategy(original_content)
-                if cleaned_content and cleaned_content != original_content:
-                    
-                    # Intentar parsear el contenido limpio
-                    data = json.loads(cleaned_content)
-                    return ParseResult(
-                        success=True,
-                        data=data,
-                        method_used=f"strategy_{i+1}_{strategy.__name__}",
-                        original_content=original_content,
-                        cleaned_content=cleaned_content
-                    )
-                    
-            except json.JSONDecodeError as e:
-                logger.debug(f"Strategy {strategy.__name__} failed: {e}")
-                continue
-            except Exception as e:
-                logger.debug(f"Strategy {strategy.__name__} error: {e}")
+        for i in range(len(self._STRATEGIES)):
+            if i in fast_path:
                 continue
+            result = self._try_strategy(i, original_content, cleaned_by_index)
+            if result is not None:
+                return result
         
         # Estrategia final: JSON5 (más permisivo)
-        try:
-            import json5
-            for strategy in self.cleaning_strategies[:4]:  # Usar solo las primeras estrategias
+        if json5 is not None:
+            for i, strategy in enumerate(self._STRATEGIES[:4]):  # Usar solo las primeras estrategias
                 try:
-                    cleaned = strategy(original_content)
+                    cleaned = cleaned_by_index.get(i)
+                    if cleaned is None:
+                        cleaned = strategy(original_content)
                     if cleaned:
                         data = json5.loads(cleaned)
                         return ParseResult(
@@ -112,8 +273,8 @@ class RobustJSONParser:
                         )
                 except:
                     continue
-        except ImportError:
-            logger.warning("json5 not available for enhanced parsing")
+        else:
+            logger.debug("json5 not available for enhanced parsing")
         
         # Fallback: Estructura vacía válida
         return ParseResult(
@@ -130,88 +291,144 @@ class RobustJSONParser:
             errors=["All parsing strategies failed"]
         )
     
-    def _extract_json_blocks(self, content: str) -> str:
+    def _try_json_repair(self, original_content: str) -> Optional[ParseResult]:
+        """
+        Repara el JSON con la librería json_repair
+        
+        Returns:
+            ParseResult exitoso, o None si el resultado no tiene el esquema de
+            dependencias (json_repair acepta casi cualquier texto)
+        """
+        try:
+            data = _json_repair_loads(original_content)
+        except Exception as e:
+            logger.debug(f"json_repair failed: {e}")
+            return None
+        
+        if not self._has_dependency_schema(data):
+            logger.debug("json_repair result lacks the dependency sections")
+            return None
+        
+        return ParseResult(
+            success=True,
+            data=data,
+            method_used="json_repair",
+            original_content=original_content
+        )
+    
+    @staticmethod
+    def _has_dependency_schema(data: Any) -> bool:
+        """Objeto con alguna sección de dependencias y confianza numérica"""
+        if not isinstance(data, dict):
+            return False
+        sections = [data[name] for name in _DEPENDENCY_SECTIONS if name in data]
+        if not sections or not all(isinstance(section, dict) for section in sections):
+            return False
+        # json_repair convierte NaN y valores rotos en None
+        confidence = data.get("overall_confidence", 0.0)
+        return isinstance(confidence, (int, float)) and not isinstance(confidence, bool)
+    
+    def _select_fast_path(self, content: str) -> Tuple[int, ...]:
+        """Índices de las estrategias más probables según el inicio del contenido"""
+        for prefix, indices in self._fast_paths:
+            if content.startswith(prefix):
+                return indices
+        return self._default_fast_path
+    
+    def _try_strategy(self, index: int, original_content: str,
+                      cleaned_by_index: Optional[Dict[int, str]] = None) -> Optional[ParseResult]:
+        """
+        Aplica una estrategia de limpieza e intenta parsear el resultado
+        
+        Args:
+            index: Posición de la estrategia en _STRATEGIES
+            original_content: Contenido a limpiar
+            cleaned_by_index: Si se da, guarda aquí el contenido limpio
+        
+        Returns:
+            ParseResult exitoso, o None si la estrategia no aplica o falla
+        """
+        strategy = self._STRATEGIES[index]
+        try:
+            cleaned_content = strategy(original_content)
+            if cleaned_by_index is not None:
+                cleaned_by_index[index] = cleaned_content
+            if cleaned_content and cleaned_content != original_content:
+                
+                # Intentar parsear el contenido limpio
+                data = _json_loads(cleaned_content)
+                return ParseResult(
+                    success=True,
+                    data=data,
+                    method_used=f"strategy_{index+1}_{strategy.__name__}",
+                    original_content=original_content,
+                    cleaned_content=cleaned_content
+                )
+                
+        except json.JSONDecodeError as e:
+            logger.debug(f"Strategy {strategy.__name__} failed: {e}")
+        except Exception as e:
+            logger.debug(f"Strategy {strategy.__name__} error: {e}")
+        
+        return None
+    
+    @staticmethod
+    def _extract_json_blocks(content: str) -> str:
         """Extrae bloques JSON de respuestas con formato markdown"""
         # Patrón 1: Bloque ```json
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', content, re.DOTALL)
+        json_match = _RE_JSON_BLOCK.search(content)
         if json_match:
             return json_match.group(1).strip()
         
         # Patrón 2: Bloque ``` genérico
-        json_match = re.search(r'```\s*(\{.*?\})\s*```', content, re.DOTALL)
+        json_match = _RE_GENERIC_BLOCK.search(content)
         if json_match:
             return json_match.group(1).strip()
         
         # Patrón 3: Primer objeto JSON completo
-        json_match = re.search(r'(\{.*?\})', content, re.DOTALL)
+        json_match = _RE_FIRST_OBJ.search(content)
         if json_match:
             candidate = json_match.group(1).strip()
-            if self._looks_like_json(candidate):
+            if RobustJSONParser._looks_like_json(candidate):
                 return candidate
         
         return content
     
-    def _fix_common_llm_errors(self, content: str) -> str:
+    @staticmethod
+    def _fix_common_llm_errors(content: str) -> str:
         """Corrige errores comunes de LLMs"""
-        # Remover texto explicativo antes y después
-        patterns = [
-            r'^[^{]*(\{.*\})[^}]*$',  # Extraer solo el objeto JSON
-            r'(?:Here\'s the JSON|Here is the JSON|The JSON response is)[:\s]*(\{.*\})',
-            r'(\{.*\})(?:\s*(?:This|That|The above).*)?$'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-            if match:
-                content = match.group(1).strip()
-                break
-        
-        # Correcciones específicas
-        corrections = [
-            # Comillas simples a dobles
-            (r"'([^']*)':", r'"\1":'),
-            # True/False de Python a JSON
-            (r'\bTrue\b', 'true'),
-            (r'\bFalse\b', 'false'),
-            (r'\bNone\b', 'null'),
-            # Remover comentarios de línea
-            (r'//.*$', '', re.MULTILINE),
-            # Remover comentarios de bloque  
-            (r'/\*.*?\*/', '', re.DOTALL),
-        ]
-        
-        for pattern, replacement, *flags in corrections:
-            flag = flags[0] if flags else 0
-            content = re.sub(pattern, replacement, content, flags=flag)
+        # Remover texto explicativo antes y después (innecesario si ya es {...})
+        if not (content.startswith('{') and content.endswith('}')):
+            for pattern in _RE_PREAMBLE_ANCHORS:
+                match = pattern.search(content)
+                if match:
+                    content = match.group(1).strip()
+                    break
         
-        return content
+        # Comillas, literales de Python y comentarios en una sola pasada
+        return _normalize_fast(content)
     
-    def _fix_trailing_commas(self, content: str) -> str:
+    @staticmethod
+    def _fix_trailing_commas(content: str) -> str:
         """Remueve comas finales que causan errores de JSON"""
         # Comas antes de } o ]
-        content = re.sub(r',(\s*[}\]])', r'\1', content)
+        content = _RE_TRAILING_COMMA.sub(r'\1', content)
         
         # Comas al final de líneas antes de cerrar
-        content = re.sub(r',(\s*\n\s*[}\]])', r'\1', content)
+        content = _RE_TRAILING_COMMA_NEWLINE.sub(r'\1', content)
         
         return content
     
-    def _fix_quotes(self, content: str) -> str:
+    @staticmethod
+    def _fix_quotes(content: str) -> str:
         """Corrige problemas con comillas"""
-        # Escapar comillas dentro de strings
-        def fix_inner_quotes(match):
-            key = match.group(1)
-            value = match.group(2)
-            # Escapar comillas dobles dentro del valor
-            value = value.replace('"', '\\"')
-            return f'"{key}": "{value}"'
-        
-        # Solo aplicar a strings obvios (no números o booleanos)
-        content = re.sub(r'"([^"]+)":\s*"([^"]*(?:[^"\\][^"])*)"', fix_inner_quotes, content)
-        
-        return content
+        # Solo aplicar a strings obvios (no números o booleanos). El patrón no
+        # admite comillas dentro del valor, así que basta una plantilla sin
+        # callback: normaliza el separador "clave": "valor"
+        return _RE_STRING_VALUE.sub(r'"\1": "\2"', content)
     
-    def _fix_multiline_strings(self, content: str) -> str:
+    @staticmethod
+    def _fix_multiline_strings(content: str) -> str:
         """Convierte strings multilínea en strings de una línea"""
         def fix_multiline(match):
             key = match.group(1)
@@ -221,15 +438,15 @@ class RobustJSONParser:
             return f'"{key}": "{value}"'
         
         # Buscar strings que contengan saltos de línea
-        pattern = r'"([^"]+)":\s*"([^"]*\n[^"]*)"'
-        content = re.sub(pattern, fix_multiline, content, flags=re.DOTALL)
+        content = _RE_MULTILINE_VALUE.sub(fix_multiline, content)
         
         return content
     
-    def _fix_unescaped_chars(self, content: str) -> str:
+    @staticmethod
+    def _fix_unescaped_chars(content: str) -> str:
         """Escapa caracteres especiales no escapados"""
         # Escapar backslashes no escapados
-        content = re.sub(r'(?<!\\)\\(?!["\\/bfnrtu])', r'\\\\', content)
+        content = _RE_LONE_BACKSLASH.sub(r'\\\\', content)
         
         # Escapar comillas no escapadas en strings
         def escape_quotes_in_strings(match):
@@ -237,75 +454,68 @@ class RobustJSONParser:
         
         return content
     
-    def _extract_partial_json(self, content: str) -> str:
+    @staticmethod
+    def _extract_partial_json(content: str) -> str:
         """Intenta construir JSON válido de contenido parcial"""
-        lines = content.split('\n')
-        json_lines = []
-        brace_count = 0
-        in_json = False
-        
-        for line in lines:
-            stripped = line.strip()
-            
-            if '{' in stripped:
-                in_json = True
-                brace_count += stripped.count('{')
-                brace_count -= stripped.count('}')
-                json_lines.append(line)
-            elif in_json:
-                brace_count += stripped.count('{')
-                brace_count -= stripped.count('}')
-                json_lines.append(line)
-                
-                if brace_count <= 0:
-                    break
+        start = content.find('{')
+        if start == -1:
+            return content
         
-        if json_lines:
-            partial_json = '\n'.join(json_lines)
-            # Asegurar que termine con }
-            if not partial_json.rstrip().endswith('}'):
-                partial_json += '\n}'
-            return partial_json
+        # Seguir la profundidad de llaves saltando el contenido de strings
+        depth = 0
+        open_string = False
+        for match in _RE_BRACE_OR_STRING.finditer(content, start):
+            token = match.group(0)
+            if token[0] == '"':
+                open_string = not match.group(1)
+            elif token == '{':
+                depth += 1
+            elif token == '}':
+                depth -= 1
+                if depth == 0:
+                    return content[start:match.end()]
         
-        return content
+        # Objeto sin cerrar: completar el string y las llaves que faltan
+        return content[start:] + ('"' if open_string else '') + '}' * depth
     
-    def _build_json_from_patterns(self, content: str) -> str:
+    @staticmethod
+    def _build_json_from_patterns(content: str) -> str:
         """Como último recurso, construye JSON basado en patrones reconocidos"""
-        result = {
-            "variables": {},
-            "classes": {},
-            "imports": {},
-            "functions": {},
-            "overall_confidence": 0.0
-        }
-        
-        # Patrones para extraer información
-        patterns = {
-            'variables': r'"([^"]+)":\s*\{\s*"defined_in_snippet":\s*(\d+)',
-            'classes': r'"([^"]+)":\s*\{\s*"defined_in_snippet":\s*(\d+)',
-            'imports': r'"([^"]+)":\s*\{\s*"defined_in_snippet":\s*(\d+)',
-            'functions': r'"([^"]+)":\s*\{\s*"defined_in_snippet":\s*(\d+)'
+        # El patrón es el mismo para todas las secciones: se busca una sola vez
+        entries = {
+            name: {"defined_in_snippet": int(snippet_index), "confidence": 0.5}
+            for name, snippet_index in _RE_DEFINED_IN_SNIPPET.findall(content)
         }
         
-        for section, pattern in patterns.items():
-            matches = re.findall(pattern, content)
-            for name, snippet_index in matches:
-                result[section][name] = {
-                    "defined_in_snippet": int(snippet_index),
-                    "confidence": 0.5
-                }
-        
         # Buscar confianza general
-        conf_match = re.search(r'"overall_confidence":\s*([\d.]+)', content)
+        overall_confidence = 0.0
+        conf_match = _RE_OVERALL_CONF.search(content)
         if conf_match:
             try:
-                result["overall_confidence"] = float(conf_match.group(1))
+                overall_confidence = float(conf_match.group(1))
             except ValueError:
                 pass
         
-        return json.dumps(result, indent=2)
+        # Esquema fijo: las cuatro secciones comparten el texto serializado una vez
+        section = json.dumps(entries)
+        return (f'{{"variables": {section}, "classes": {section}, '
+                f'"imports": {section}, "functions": {section}, '
+                f'"overall_confidence": {json.dumps(overall_confidence)}}}')
+    
+    # Estrategias de limpieza en orden de aplicación; no dependen de la instancia
+    _STRATEGIES = (
+        _extract_json_blocks,
+        _fix_common_llm_errors,
+        _fix_trailing_commas,
+        _fix_quotes,
+        _fix_multiline_strings,
+        _fix_unescaped_chars,
+        _extract_partial_json,
+        _build_json_from_patterns
+    )
     
-    def _looks_like_json(self, content: str) -> bool:
+    @staticmethod
+    def _looks_like_json(content: str) -> bool:
         """Verifica si el contenido parece ser JSON"""
         content = content.strip()
         return (
@@ -319,19 +529,18 @@ class RobustJSONParser:
             return {}
         
         total = len(results)
-        successful = len([r for r in results if r.success])
-        
-        methods_used = {}
+        successful = 0
+        methods_used = Counter()
         for result in results:
-            method = result.method_used
-            methods_used[method] = methods_used.get(method, 0) + 1
+            methods_used[result.method_used] += 1
+            successful += result.success
         
         return {
             'total_attempts': total,
             'successful_parses': successful,
             'success_rate': successful / total,
-            'methods_breakdown': methods_used,
-            'most_successful_method': max(methods_used.items(), key=lambda x: x[1])[0] if methods_used else None
+            'methods_breakdown': dict(methods_used),
+            'most_successful_method': methods_used.most_common(1)[0][0]
         }
 
 
@@ -19,8 +19,30 @@ from .agents import ContextAnalyzer, Snippet, get_llm_client, LLMConfig
 
 logger = logging.getLogger(__name__)
 
+# Secciones de dependencias en orden de emisión y la clave con su código
+_CONTEXT_SECTIONS = (
+    ('imports', 'import_statement'),
+    ('functions', 'definition'),
+    ('classes', 'definition'),
+    ('variables', 'definition'),
+)
 
-@dataclass 
+
+def _as_snippet_index(value: Any) -> Optional[int]:
+    """Índice de snippet no negativo (int o string de dígitos), o None"""
+    if isinstance(value, str) and value.isdecimal():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    return None
+
+
+def _to_snippet_objects(all_snippets: List[str]) -> List[Snippet]:
+    """Convierte los contenidos a objetos Snippet indexados"""
+    return [Snippet(content=content, index=i) for i, content in enumerate(all_snippets)]
+
+
+@dataclass(slots=True)
 class EnhancedValidationResult:
     """Resultado de validación mejorada con información de agentes LLM"""
     
@@ -71,7 +93,8 @@ class EnhancedValidator:
     def __init__(self, 
                  enable_agents: bool = True,
                  llm_config: Optional[LLMConfig] = None,
-                 window_size: int = 20):
+                 window_size: int = 20,
+                 max_concurrency: int = 8):
         """
         Initialize enhanced validator
         
@@ -79,9 +102,12 @@ class EnhancedValidator:
             enable_agents: Si usar agentes LLM
             llm_config: Configuración LLM opcional
             window_size: Ventana de análisis contextual
+            max_concurrency: Máximo de snippets validándose a la vez en un lote
         """
-        self.enable_agents = enable_agents
+        # Agentes pedidos y aún no descartados; se crean en el primer uso (ver ensure_agents)
+        self._agents_requested = enable_agents
         self.window_size = window_size
+        self._sem = asyncio.Semaphore(max_concurrency)
         
         # Contadores para estadísticas
         self.stats = {
@@ -92,32 +118,86 @@ class EnhancedValidator:
             'processing_time': 0.0
         }
         
-        if self.enable_agents:
-            try:
-                # Configurar cliente LLM con límites apropiados
-                if llm_config is None:
-                    llm_config = LLMConfig(
-                        model="llama-3.1-70b-versatile",
-                        temperature=0.1,
-                        max_tokens=800,
-                        max_cost_per_session=5.0,
-                        cache_enabled=True
-                    )
-                
-                self.llm_client = get_llm_client(llm_config)
-                self.context_analyzer = ContextAnalyzer(
-                    self.llm_client, 
-                    window_size=window_size
-                )
-                
-                logger.info(f"Enhanced validator initialized with LLM agents (window_size={window_size})")
-                
-            except Exception as e:
-                logger.warning(f"Failed to initialize LLM agents: {e}")
-                self.enable_agents = False
+        self._llm_client = None
+        self._context_analyzer: Optional[ContextAnalyzer] = None
+        
+        self._llm_config = llm_config
+        if not self._agents_requested:
+            logger.info("Enhanced validator running in heuristic-only mode")
+    
+    def ensure_agents(self) -> bool:
+        """
+        Crea el cliente LLM y el Context Analyzer si aún no existen
+        
+        Returns:
+            True si los agentes están disponibles
+        """
+        if self._context_analyzer is not None:
+            return True
+        if not self._agents_requested:
+            return False
+        
+        if self._llm_config is None:
+            # Configurar cliente LLM con límites apropiados
+            self._llm_config = LLMConfig(
+                model="llama-3.1-70b-versatile",
+                temperature=0.1,
+                max_tokens=800,
+                max_cost_per_session=5.0,
+                cache_enabled=True
+            )
         
-        if not self.enable_agents:
+        try:
+            self._llm_client = get_llm_client(self._llm_config)
+            self._context_analyzer = ContextAnalyzer(
+                self._llm_client, 
+                window_size=self.window_size
+            )
+            logger.info(f"Enhanced validator initialized with LLM agents (window_size={self.window_size})")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Failed to initialize LLM agents: {e}")
             logger.info("Enhanced validator running in heuristic-only mode")
+            self._llm_client = None
+            self._agents_requested = False
+            return False
+    
+    @property
+    def agents_status(self) -> str:
+        """'ready' si los agentes existen, 'pending' si se crearán en el primer uso, o 'disabled'"""
+        if self._context_analyzer is not None:
+            return 'ready'
+        return 'pending' if self._agents_requested else 'disabled'
+    
+    @property
+    def enable_agents(self) -> bool:
+        """True si se pidieron agentes y no fallaron al crearse; ver agents_status"""
+        return self._agents_requested
+    
+    @enable_agents.setter
+    def enable_agents(self, value: bool) -> None:
+        self._agents_requested = value
+        if not value:
+            self._llm_client = None
+            self._context_analyzer = None
+    
+    def _require_agents_requested(self, name: str) -> None:
+        # Sin agentes el atributo no existe, como antes de la creación diferida
+        if not self._agents_requested and self._context_analyzer is None:
+            raise AttributeError(f"{name} not available: LLM agents are disabled")
+    
+    @property
+    def llm_client(self):
+        """Cliente LLM, o None hasta que ensure_agents() lo cree"""
+        self._require_agents_requested('llm_client')
+        return self._llm_client
+    
+    @property
+    def context_analyzer(self) -> Optional[ContextAnalyzer]:
+        """Context Analyzer, o None hasta que ensure_agents() lo cree"""
+        self._require_agents_requested('context_analyzer')
+        return self._context_analyzer
     
     async def validate_single(self,
                              snippet_content: str,
@@ -136,7 +216,30 @@ class EnhancedValidator:
         Returns:
             EnhancedValidationResult con resultados
         """
-        start_time = time.time()
+        return await self._validate_single_with_objects(
+            snippet_content, snippet_index, all_snippets, None, **kwargs
+        )
+
+    async def _validate_single_with_objects(self,
+                                            snippet_content: str,
+                                            snippet_index: int,
+                                            all_snippets: Optional[List[str]],
+                                            snippet_objects: Optional[List[Snippet]],
+                                            **kwargs) -> EnhancedValidationResult:
+        """
+        Cuerpo de validate_single con los objetos Snippet ya construidos
+
+        Args:
+            snippet_content: Contenido del snippet
+            snippet_index: Índice del snippet
+            all_snippets: Lista completa de snippets para contexto
+            snippet_objects: Snippets convertidos, o None para construirlos al vuelo
+            **kwargs: Argumentos adicionales (timeout_sec, normalize, etc.)
+
+        Returns:
+            EnhancedValidationResult con resultados
+        """
+        start_time = time.perf_counter()
         self.stats['total_validations'] += 1
         
         # Paso 1: Validación heurística base (Fase 2)
@@ -147,15 +250,13 @@ class EnhancedValidator:
         )
         
         # Preparar resultado inicial
-        enhanced_result = EnhancedValidationResult(
-            base_result=base_result,
-            processing_time=time.time() - start_time
-        )
+        enhanced_result = EnhancedValidationResult(base_result=base_result)
         
         # Paso 2: Si el resultado base es exitoso o no hay agentes, retornar
         if (base_result.status == 'ok' or 
-            not self.enable_agents or
-            all_snippets is None):
+            all_snippets is None or
+            not self.ensure_agents()):
+            enhanced_result.processing_time = time.perf_counter() - start_time
             return enhanced_result
         
         # Paso 3: Análisis contextual LLM para snippets fallidos
@@ -163,23 +264,21 @@ class EnhancedValidator:
             self.stats['llm_analyses'] += 1
             enhanced_result.llm_analysis_used = True  # Marcar como usado ANTES del análisis
             
-            # Convertir snippets a formato Snippet
-            snippet_objects = [
-                Snippet(content=content, index=i) 
-                for i, content in enumerate(all_snippets)
-            ]
+            # Convertir snippets a formato Snippet (validate_batch ya los trae)
+            if snippet_objects is None:
+                snippet_objects = _to_snippet_objects(all_snippets)
             
             current_snippet = snippet_objects[snippet_index]
             
-            # Analizar dependencias contextualmente
-            llm_start = time.time()
-            analysis_result = await self.context_analyzer.analyze(
-                snippet=current_snippet,
-                all_snippets=snippet_objects,
-                snippet_index=snippet_index,
-                **kwargs
-            )
-            llm_time = time.time() - llm_start
+            # Analizar dependencias contextualmente; el semáforo limita solo
+            # las llamadas LLM, la validación local no ocupa un cupo
+            async with self._sem:
+                analysis_result = await self.context_analyzer.analyze(
+                    snippet=current_snippet,
+                    all_snippets=snippet_objects,
+                    snippet_index=snippet_index,
+                    **kwargs
+                )
             
             # Actualizar resultado con info de análisis LLM
             enhanced_result.llm_analysis_success = analysis_result.success
@@ -210,18 +309,18 @@ class EnhancedValidator:
                     if enhanced_result.success_improved:
                         self.stats['llm_improvements'] += 1
                         logger.info(f"LLM improved snippet {snippet_index}: {base_result.status} -> {enhanced_validation.status}")
-            
+        
         except Exception as e:
             logger.warning(f"LLM analysis failed for snippet {snippet_index}: {e}")
             enhanced_result.error_message = str(e)
             self.stats['fallbacks_used'] += 1
         
         # Actualizar tiempo total
-        enhanced_result.processing_time = time.time() - start_time
+        enhanced_result.processing_time = time.perf_counter() - start_time
         self.stats['processing_time'] += enhanced_result.processing_time
         
         return enhanced_result
-    
+
     def _build_context_from_dependencies(self,
                                        dependencies: Dict[str, Any],
                                        all_snippets: List[Snippet]) -> Optional[str]:
@@ -235,52 +334,22 @@ class EnhancedValidator:
         Returns:
             Código de contexto construido o None
         """
+        n_snippets = len(all_snippets)
         context_lines = []
+        # La respuesta viene del LLM: se ignoran entradas con tipos inesperados
+        for section, code_key in _CONTEXT_SECTIONS:
+            entries = dependencies.get(section)
+            if not isinstance(entries, dict):
+                continue
+            for info in entries.values():
+                if not isinstance(info, dict):
+                    continue
+                snippet_idx = _as_snippet_index(info.get('defined_in_snippet'))
+                code = info.get(code_key)
+                if snippet_idx is not None and snippet_idx < n_snippets and code and isinstance(code, str):
+                    context_lines.append(code)
         
-        try:
-            # Añadir imports necesarios
-            if 'imports' in dependencies:
-                for import_name, import_info in dependencies['imports'].items():
-                    snippet_idx = import_info.get('defined_in_snippet')
-                    if snippet_idx is not None and snippet_idx < len(all_snippets):
-                        import_statement = import_info.get('import_statement', '')
-                        if import_statement:
-                            context_lines.append(import_statement)
-            
-            # Añadir definiciones de funciones
-            if 'functions' in dependencies:
-                for func_name, func_info in dependencies['functions'].items():
-                    snippet_idx = func_info.get('defined_in_snippet')
-                    if snippet_idx is not None and snippet_idx < len(all_snippets):
-                        func_definition = func_info.get('definition', '')
-                        if func_definition:
-                            context_lines.append(func_definition)
-            
-            # Añadir definiciones de clases
-            if 'classes' in dependencies:
-                for class_name, class_info in dependencies['classes'].items():
-                    snippet_idx = class_info.get('defined_in_snippet')
-                    if snippet_idx is not None and snippet_idx < len(all_snippets):
-                        class_definition = class_info.get('definition', '')
-                        if class_definition:
-                            context_lines.append(class_definition)
-            
-            # Añadir definiciones de variables
-            if 'variables' in dependencies:
-                for var_name, var_info in dependencies['variables'].items():
-                    snippet_idx = var_info.get('defined_in_snippet')
-                    if snippet_idx is not None and snippet_idx < len(all_snippets):
-                        var_definition = var_info.get('definition', '')
-                        if var_definition:
-                            context_lines.append(var_definition)
-            
-            if context_lines:
-                return '\n'.join(context_lines)
-                
-        except Exception as e:
-            logger.error(f"Error building context: {e}")
-        
-        return None
+        return '\n'.join(context_lines) or None
     
     async def validate_batch(self,
                             snippets: List[str],
@@ -295,18 +364,17 @@ class EnhancedValidator:
         Returns:
             Lista de EnhancedValidationResult
         """
-        results = []
-        
-        for i, snippet_content in enumerate(snippets):
-            result = await self.validate_single(
-                snippet_content=snippet_content,
-                snippet_index=i,
-                all_snippets=snippets,
-                **kwargs
+        # Los análisis LLM son I/O: se solapan, acotados por self._sem.
+        # self.stats se actualiza sin awaits intermedios, así que los
+        # incrementos no se pisan entre tareas del mismo event loop.
+        # Los Snippet se construyen una vez por lote y se comparten entre tareas
+        snippet_objects = _to_snippet_objects(snippets) if self._agents_requested else None
+        return list(await asyncio.gather(*(
+            self._validate_single_with_objects(
+                snippet_content, i, snippets, snippet_objects, **kwargs
             )
-            results.append(result)
-        
-        return results
+            for i, snippet_content in enumerate(snippets)
+        )))
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -329,10 +397,11 @@ class EnhancedValidator:
         
         # Añadir info de configuración
         stats['agents_enabled'] = self.enable_agents
+        stats['agents_status'] = self.agents_status
         stats['window_size'] = self.window_size
         
-        if hasattr(self, 'llm_client'):
-            stats['llm_stats'] = self.llm_client.get_session_stats()
+        if self._llm_client is not None:
+            stats['llm_stats'] = self._llm_client.get_session_stats()
         
         return stats
     
@@ -346,8 +415,8 @@ class EnhancedValidator:
             'processing_time': 0.0
         }
         
-        if hasattr(self, 'llm_client'):
-            self.llm_client.reset_session_stats()
+        if self._llm_client is not None:
+            self._llm_client.reset_session_stats()
 
 
 # Factory function para crear validador configurado
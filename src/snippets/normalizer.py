@@ -1,6 +1,41 @@
 import ast
 import re
-from typing import Dict, List, Any, Set
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, List, Any, Set, Tuple
+
+# Indentación de la primera línea que no está vacía ni es un comentario
+_FIRST_CODE_INDENT_RE = re.compile(r'^([^\S\n]*)[^\s#]', re.MULTILINE)
+# Líneas que solo contienen espacios, y líneas con código sin indentación de 4 espacios
+_BLANK_LINE_RE = re.compile(r'^[^\S\n]+$', re.MULTILINE)
+_UNINDENTED_LINE_RE = re.compile(r'^(?!    )(?=[^\n]*\S)', re.MULTILINE)
+# Patrones comunes de variables no definidas en el archivo de referencia
+_VAR_RE = re.compile(r'\b(var\d+|nombre|edad|total|resultado)\b', re.IGNORECASE)
+# Clases como Vehicle(), Triangle()
+_CLASS_RE = re.compile(r'\b([A-Z][a-zA-Z]*)\s*\(')
+# Constantes del lenguaje que _CLASS_RE puede capturar pero nunca faltan
+_PY_KEYWORDS = frozenset({'True', 'False', 'None'})
+
+# Módulos comunes que se usan sin importar: (módulo, sentencia import, patrones de uso)
+_COMMON_MODULES = (
+    ('random', 'import random', ('random.', 'randint(', 'choice(', 'shuffle(')),
+    ('math', 'import math', ('math.', ' sqrt(', ' pi', ' sin(', ' cos(', 'sqrt(', 'sin(', 'cos(')),
+    ('datetime', 'import datetime', ('datetime.', 'date.', 'time.now')),
+    ('os', 'import os', ('os.path', 'os.remove', 'os.system')),
+    ('sys', 'import sys', ('sys.exit', 'sys.argv')),
+)
+_MODULE_BY_PATTERN = {
+    pattern: module
+    for module, _, patterns in _COMMON_MODULES
+    for pattern in patterns
+}
+# Una regex por carácter inicial: empezar por un literal activa la búsqueda
+# rápida del prefijo en _sre. El resto va en un lookahead para admitir
+# coincidencias solapadas, igual que comprobar cada patrón con `in`
+_MODULE_USAGE_RES = tuple(
+    (first, re.compile(re.escape(first) + '(?=(' + '|'.join(re.escape(p[1:]) for p in group) + '))'))
+    for first, group in groupby(sorted(_MODULE_BY_PATTERN), key=lambda p: p[0])
+)
 
 
 def analyze_snippet(code: str) -> Dict[str, Any]:
@@ -10,137 +45,117 @@ def analyze_snippet(code: str) -> Dict[str, Any]:
     Returns:
         Dict con flags: has_orphan_indent, needs_wrapper, undefined_names, missing_imports
     """
-    lines = code.split('\n')
-    
-    # Detectar indentación orphan (código indentado sin contexto)
-    has_orphan_indent = False
-    first_code_line = None
-    for line in lines:
-        if line.strip() and not line.strip().startswith('#'):
-            first_code_line = line
-            break
-    
-    if first_code_line and first_code_line.startswith('    '):
-        # Si la primera línea de código está indentada, es orphan
-        has_orphan_indent = True
-    
-    # Detectar nombres potencialmente no definidos
-    undefined_names = detect_undefined_names(code)
-    
-    # Detectar imports faltantes comunes
-    missing_imports = detect_missing_imports(code)
+    # El análisis se cachea; cada llamada recibe su propio dict y listas
+    has_orphan_indent, undefined_names, missing_imports = _analyze(code)
     
     return {
         'has_orphan_indent': has_orphan_indent,
         'needs_wrapper': has_orphan_indent,
-        'undefined_names': undefined_names,
-        'missing_imports': missing_imports
+        'undefined_names': list(undefined_names),
+        'missing_imports': list(missing_imports)
     }
 
 
+@lru_cache(maxsize=4096)
+def _analyze(code: str) -> Tuple[bool, Tuple[str, ...], Tuple[str, ...]]:
+    """Análisis inmutable de un snippet: (has_orphan_indent, undefined, missing)"""
+    # Detectar indentación orphan (código indentado sin contexto)
+    # (solo se captura la indentación, sin recorrer el resto de la línea)
+    first_code_indent = _FIRST_CODE_INDENT_RE.search(code)
+    # Si la primera línea de código está indentada, es orphan
+    has_orphan_indent = bool(first_code_indent and first_code_indent.group(1).startswith('    '))
+    
+    # Detectar nombres potencialmente no definidos e imports faltantes comunes
+    undefined_names, missing_imports = _detect_all(code)
+    
+    return has_orphan_indent, tuple(undefined_names), tuple(missing_imports)
+
+
+def _detect_all(code: str) -> Tuple[List[str], List[str]]:
+    """Detecta nombres no definidos e imports faltantes: (undefined, missing)"""
+    return detect_undefined_names(code), detect_missing_imports(code)
+
+
 def detect_undefined_names(code: str) -> List[str]:
     """Detecta nombres que probablemente no están definidos"""
-    # Patrones comunes de variables no definidas en el archivo de referencia
-    common_undefined = []
-    
-    # Buscar patrones como "var1", "var2", etc.
-    var_pattern = r'\b(var\d+|nombre|edad|total|resultado)\b'
-    matches = re.findall(var_pattern, code, re.IGNORECASE)
-    common_undefined.extend(matches)
+    # Buscar patrones como "var1", "var2", etc. (el set elimina duplicados)
+    found = set(_VAR_RE.findall(code))
     
     # Buscar clases que pueden no estar definidas
-    class_pattern = r'\b([A-Z][a-zA-Z]*)\s*\('  # Clases como Vehicle(), Triangle()
-    class_matches = re.findall(class_pattern, code)
-    common_undefined.extend([c for c in class_matches if c not in ['True', 'False', 'None']])
+    found.update(_CLASS_RE.findall(code))
+    found -= _PY_KEYWORDS
     
-    return list(set(common_undefined))  # Eliminar duplicados
+    return list(found)
 
 
 def detect_missing_imports(code: str) -> List[str]:
     """Detecta imports comunes que faltan"""
-    missing = []
-    
-    # Módulos comunes que se usan sin importar
-    common_modules = {
-        'random': ['random.', 'randint(', 'choice(', 'shuffle('],
-        'math': ['math.', ' sqrt(', ' pi', ' sin(', ' cos(', 'sqrt(', 'sin(', 'cos('],
-        'datetime': ['datetime.', 'date.', 'time.now'],
-        'os': ['os.path', 'os.remove', 'os.system'],
-        'sys': ['sys.exit', 'sys.argv']
+    used = {
+        _MODULE_BY_PATTERN[first + match.group(1)]
+        for first, pattern in _MODULE_USAGE_RES
+        for match in pattern.finditer(code)
     }
+    if not used:
+        return []
     
-    for module, patterns in common_modules.items():
-        for pattern in patterns:
-            if pattern in code and f'import {module}' not in code:
-                missing.append(module)
-                break
-    
-    return missing
+    return [
+        module for module, import_statement, _ in _COMMON_MODULES
+        if module in used and import_statement not in code
+    ]
 
 
 def wrap_orphan_indent(code: str) -> str:
     """
     Envuelve código indentado en una función para hacerlo sintácticamente válido
     """
-    lines = code.split('\n')
-    
-    # Crear función wrapper
-    wrapped_lines = ['def snippet_function():']
+    # Líneas solo con espacios quedan vacías; las no indentadas reciben la
+    # indentación de la función y las ya indentadas se mantienen
+    body = _BLANK_LINE_RE.sub('', code)
+    body = _UNINDENTED_LINE_RE.sub('    ', body)
     
-    for line in lines:
-        if line.strip():  # Solo líneas no vacías
-            # Si ya está indentada, mantener indentación
-            if line.startswith('    '):
-                wrapped_lines.append(line)
-            else:
-                # Si no está indentada, agregarle indentación de función
-                wrapped_lines.append('    ' + line)
-        else:
-            wrapped_lines.append('')
-    
-    # Agregar llamada a la función
-    wrapped_lines.extend(['', 'snippet_function()'])
-    
-    return '\n'.join(wrapped_lines)
+    # Crear función wrapper y agregar la llamada
+    return 'def snippet_function():\n' + body + '\n\nsnippet_function()'
 
 
 def create_context(undefined_names: List[str] = None, missing_imports: List[str] = None) -> str:
     """
     Crea contexto (imports + variables) necesario para que el snippet funcione
     """
-    context_lines = []
-    
-    # Agregar imports
-    if missing_imports:
-        for module in missing_imports:
-            context_lines.append(f'import {module}')
+    # Las listas no son hashables: la versión cacheada recibe tuplas
+    return _create_context(tuple(undefined_names or ()), tuple(missing_imports or ()))
+
+
+@lru_cache(maxsize=4096)
+def _create_context(undefined_names: Tuple[str, ...], missing_imports: Tuple[str, ...]) -> str:
+    """Contexto para nombres e imports dados como tuplas"""
+    sections = []
     
-    # Agregar línea vacía si hay imports
+    # Agregar imports (cada bloque termina en salto de línea; el join deja la línea vacía)
     if missing_imports:
-        context_lines.append('')
+        sections.append(''.join(f'import {module}\n' for module in missing_imports))
     
-    # Agregar variables con valores por defecto  
+    # Agregar variables con valores por defecto
     if undefined_names:
-        for name in undefined_names:
-            # Valores por defecto basados en patterns comunes
-            if 'var' in name.lower() or name.lower() in ['total', 'resultado']:
-                context_lines.append(f'{name} = 10')  # Números
-            elif name.lower() in ['nombre']:
-                context_lines.append(f'{name} = "ejemplo"')  # Strings
-            elif name.lower() == 'edad':
-                context_lines.append(f'{name} = 25')
-            elif name[0].isupper():  # Clases
-                context_lines.append(f'class {name}: pass')
-            else:
-                context_lines.append(f'{name} = 1')  # Default genérico
-    
-    # Agregar línea vacía si hay variables
-    if undefined_names:
-        context_lines.append('')
+        sections.append(''.join(f'{_default_definition(name)}\n' for name in undefined_names))
     
-    return '\n'.join(context_lines)
+    return '\n'.join(sections)
+
+
+def _default_definition(name: str) -> str:
+    """Definición por defecto de un nombre, basada en patterns comunes"""
+    lowered = name.lower()
+    if 'var' in lowered or lowered in ('total', 'resultado'):
+        return f'{name} = 10'  # Números
+    if lowered == 'nombre':
+        return f'{name} = "ejemplo"'  # Strings
+    if lowered == 'edad':
+        return f'{name} = 25'
+    if name[0].isupper():  # Clases
+        return f'class {name}: pass'
+    return f'{name} = 1'  # Default genérico
 
 
+@lru_cache(maxsize=4096)
 def normalize_snippet(code: str) -> str:
     """
     Normaliza un snippet aplicando todas las transformaciones necesarias
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List, Dict, Any
 import re
+import sys
 
 
 def normalize_content(content: str) -> str:
@@ -10,16 +11,21 @@ def normalize_content(content: str) -> str:
     - Convierte tabs a espacios (tabsize=4)
     - Maneja caracteres problemáticos sin romper el contenido
     """
-    # Normalizar line endings
-    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    # Normalizar line endings (solo si hay \r: el caso habitual no copia).
+    # Un archivo solo CRLF queda limpio tras el primer replace y no se copia otra vez
+    if '\r' in content:
+        content = content.replace('\r\n', '\n')
+        if '\r' in content:
+            content = content.replace('\r', '\n')
     
     # Convertir tabs a espacios (tabsize=4)
-    content = content.expandtabs(4)
+    if '\t' in content:
+        content = content.expandtabs(4)
     
     return content
 
 
-@dataclass
+@dataclass(slots=True)
 class Snippet:
     index: int
     title: str
@@ -36,41 +42,49 @@ def parse_snippets(file_path: str, strict: bool = True) -> List[Snippet]:
     If strict=False: allow leading whitespace before '#'.
     A snippet ends right before the next snippet start or end of file.
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    snippets: List[Snippet] = []
+    title = None
+    start = end = 0
+    body: List[str] = []
+    # Identical snippet bodies share one string object
+    contents: Dict[str, str] = {}
 
-    # Detect starts
-    starts: List[int] = []
-    titles: List[str] = []
-    for i, line in enumerate(lines, start=1):
-        if strict:
-            if line.startswith('#'):
-                starts.append(i)
-                titles.append(line[1:].strip())
-        else:
-            stripped = line.lstrip()
+    # Single pass: buffer the current snippet body until the next start
+    with open(file_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+        for i, line in enumerate(f, start=1):
+            stripped = line if strict else line.lstrip()
             if stripped.startswith('#'):
-                starts.append(i)
-                titles.append(stripped[1:].strip())
+                if title is not None:
+                    snippets.append(_make_snippet(len(snippets) + 1, title, start, end, body, contents))
+                # Repeated titles ("ejercicio N") share one interned string
+                title = sys.intern(stripped[1:].strip())
+                start = end = i
+                body = []
+            elif title is not None:
+                body.append(line)
+                # Trailing blank lines stay outside the snippet range
+                # (lines read from a file are never empty; isspace doesn't copy)
+                if not line.isspace():
+                    end = i
 
-    snippets: List[Snippet] = []
-    for idx, start in enumerate(starts):
-        end = (starts[idx + 1] - 1) if (idx + 1) < len(starts) else len(lines)
-        # Trim trailing blank lines
-        while end >= start and lines[end - 1].strip() == '':
-            end -= 1
-        title = titles[idx]
-        # Exclude the title line from content, but keep range lines in metadata
-        # Convert 1-indexed line numbers to 0-indexed for slicing
-        body_lines = lines[start-1:end]
-        content = ''.join(body_lines[1:]) if len(body_lines) > 1 else ''
-        # Normalizar el contenido del snippet
-        normalized_content = normalize_content(content)
-        snippets.append(Snippet(index=idx + 1, title=title, start_line=start, end_line=end, content=normalized_content))
+    if title is not None:
+        snippets.append(_make_snippet(len(snippets) + 1, title, start, end, body, contents))
 
     return snippets
 
 
+def _make_snippet(index: int, title: str, start: int, end: int, body: List[str],
+                  contents: Dict[str, str]) -> Snippet:
+    """Build a Snippet from the body lines up to its last non-blank line (end)."""
+    # Exclude the title line from content, but keep range lines in metadata
+    # Normalizar el contenido del snippet
+    content = normalize_content(''.join(body[:end - start]))
+    # Reuse the first equal body seen in this file
+    content = contents.setdefault(content, content)
+    return Snippet(index=index, title=title, start_line=start, end_line=end,
+                   content=content)
+
+
 def to_dict(snippet: Snippet) -> Dict[str, Any]:
     return {
         'index': snippet.index,
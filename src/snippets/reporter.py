@@ -1,22 +1,36 @@
 import json
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, TextIO
+
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+_BAD_STATUSES = frozenset({'syntax_error', 'runtime_error', 'timeout'})
+_MAX_EXAMPLES = 5
 
 
 def to_json_report(results: List[Dict[str, Any]]) -> str:
-    return json.dumps({'results': results}, ensure_ascii=False, indent=2)
+    return _JSON_ENCODER.encode({'results': results})
+
+
+def write_json_report(results: List[Dict[str, Any]], fp: TextIO) -> None:
+    # Escribe el informe por fragmentos, sin construir el JSON completo en memoria
+    for chunk in _JSON_ENCODER.iterencode({'results': results}):
+        fp.write(chunk)
 
 
 def to_markdown_summary(results: List[Dict[str, Any]]) -> str:
     total = len(results)
-    by_status: Dict[str, int] = {}
+    # Una sola pasada: conteo por estado y primeros ejemplos de fallos
+    by_status: Counter = Counter()
+    examples: List[Dict[str, Any]] = []
     for r in results:
         s = r.get('status', 'unknown')
-        by_status[s] = by_status.get(s, 0) + 1
+        by_status[s] += 1
+        if s in _BAD_STATUSES and len(examples) < _MAX_EXAMPLES:
+            examples.append(r)
     lines = [f'# Snippets Report', f'- Total: {total}']
-    for k in sorted(by_status.keys()):
+    for k in sorted(by_status):
         lines.append(f'- {k}: {by_status[k]}')
     # add examples of failures
-    examples = [r for r in results if r.get('status') in ('syntax_error', 'runtime_error', 'timeout')][:5]
     if examples:
         lines.append('\n## Ejemplos fallidos')
         for e in examples:
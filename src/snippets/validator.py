@@ -1,14 +1,32 @@
-import ast
 import builtins
 import io
+import os
+import re
+import signal
 import sys
 import threading
-from contextlib import contextmanager, redirect_stdout, redirect_stderr
+import time
+import types
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any
+from functools import lru_cache, partial
+from types import CodeType
+from typing import Dict, Any, Iterable, List, Optional
 from .normalizer import normalize_snippet
 
 
+_WRITE_MODE_RE = re.compile(r"""(['"])[wa]\1""")  # 'w', "w", 'a' o "a"
+_NETWORK_RE = re.compile(r'requests\.|urllib\.|http\.client|socket\.')
+_DANGEROUS_RE = re.compile(r'os\.remove|shutil\.rmtree|subprocess\.|os\.system')
+# Alguna línea con código (no vacía ni comentario) y alguna línea con un import
+_CODE_LINE_RE = re.compile(r'^[^\S\n]*[^\s#]', re.MULTILINE)
+_IMPORT_LINE_RE = re.compile(r'^[^\S\n]*(?:import |from )', re.MULTILINE)
+# Construcciones con las que un snippet puede capturar una BaseException (y con ella
+# la alarma del timeout); esos snippets se ejecutan en un hilo con plazo estricto
+_CATCHES_BASE_RE = re.compile(r'except\s*:|BaseException|__exit__')
+
+
 @dataclass
 class ValidationResult:
     status: str  # ok | syntax_error | timeout | runtime_error | no_code
@@ -20,14 +38,13 @@ class ValidationResult:
 
 def classify(code: str) -> Dict[str, bool]:
     text = code or ''
-    lines = [ln for ln in (text.splitlines())]
-    non_comment = [ln for ln in lines if ln.strip() and not ln.strip().startswith('#')]
-    has_code = any(non_comment)
+    # Búsquedas sobre el texto completo, sin partirlo en líneas
+    has_code = _CODE_LINE_RE.search(text) is not None
+    has_imports = _IMPORT_LINE_RE.search(text) is not None
     uses_input = 'input(' in text
-    has_imports = any(ln.lstrip().startswith('import ') or ln.lstrip().startswith('from ') for ln in lines)
-    writes_file = 'open(' in text and any(m in text for m in ["'w'", '"w"', "'a'", '"a"'])
-    uses_network = any(tok in text for tok in ['requests.', 'urllib.', 'http.client', 'socket.'])
-    dangerous = any(tok in text for tok in ['os.remove', 'shutil.rmtree', 'subprocess.', 'os.system'])
+    writes_file = 'open(' in text and _WRITE_MODE_RE.search(text) is not None
+    uses_network = _NETWORK_RE.search(text) is not None
+    dangerous = _DANGEROUS_RE.search(text) is not None
     return {
         'has_code': has_code,
         'uses_input': uses_input,
@@ -38,57 +55,126 @@ def classify(code: str) -> Dict[str, bool]:
     }
 
 
-@contextmanager
-def sandbox_env(stub_input: bool = True):
-    # Patch builtins.input and open (write/append) to avoid blocking/side-effects
-    original_input = builtins.input
-    original_open = builtins.open
+@lru_cache(maxsize=4096)
+def _compile_snippet(code: str) -> CodeType:
+    # Snippets repetidos (duplicados, re-ejecuciones) no se vuelven a compilar;
+    # un SyntaxError no se cachea y se propaga igual que con ast.parse
+    return compile(code, '<snippet>', 'exec')
+
+
+class _SnippetTimeout(BaseException):
+    # BaseException: un `except Exception` del snippet no debe tragarse el timeout
+    pass
+
 
-    def safe_input(prompt: str = '') -> str:
-        return ''
+def _raise_timeout(state: Dict[str, bool], signum, frame):
+    # Se marca antes de lanzar: si el snippet captura la excepción, sigue siendo timeout
+    state['fired'] = True
+    raise _SnippetTimeout()
 
-    def safe_open(file, mode='r', *args, **kwargs):
-        if any(m in mode for m in ('w', 'a', '+')):
-            raise PermissionError('File write disabled in sandbox')
-        return original_open(file, mode, *args, **kwargs)
 
+def _can_use_alarm(code: str, timeout_sec: float) -> bool:
+    # SIGALRM solo existe en POSIX y sus handlers solo se instalan en el hilo principal;
+    # un snippet que puede tragarse la alarma necesita el plazo estricto del hilo
+    return (os.name == 'posix' and timeout_sec > 0
+            and threading.current_thread() is threading.main_thread()
+            and _CATCHES_BASE_RE.search(code) is None)
+
+
+def _run_with_alarm(runner, timeout_sec: float) -> bool:
+    # Ejecuta en el hilo actual y lo interrumpe con SIGALRM; True si terminó a tiempo.
+    # Un ITIMER_REAL previo (p. ej. pytest-timeout) se reanuda con el tiempo que le quede
+    state = {'fired': False}
+    outer_delay, outer_interval = signal.getitimer(signal.ITIMER_REAL)
+    started = time.monotonic()
+    previous = signal.signal(signal.SIGALRM, partial(_raise_timeout, state))
     try:
-        if stub_input:
-            builtins.input = safe_input
-        builtins.open = safe_open
-        yield
+        try:
+            signal.setitimer(signal.ITIMER_REAL, timeout_sec)
+            runner()
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except _SnippetTimeout:
+        return False
     finally:
-        builtins.input = original_input
-        builtins.open = original_open
+        signal.signal(signal.SIGALRM, previous)
+        if outer_delay > 0:
+            remaining = outer_delay - (time.monotonic() - started)
+            signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6), outer_interval)
+    return not state['fired']
+
+
+def _run_in_thread(runner, timeout_sec: float) -> bool:
+    # Fallback (Windows, hilos secundarios): el hilo sigue vivo si se agota el tiempo
+    t = threading.Thread(target=runner)
+    t.daemon = True
+    t.start()
+    t.join(timeout=timeout_sec)
+    return not t.is_alive()
+
+
+def _safe_input(prompt: str = '') -> str:
+    return ''
+
+
+def _safe_open(file, mode='r', *args, **kwargs):
+    if any(m in mode for m in ('w', 'a', '+')):
+        raise PermissionError('File write disabled in sandbox')
+    return builtins.open(file, mode, *args, **kwargs)
+
+
+def _sandbox_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # `import builtins` dentro del snippet recibe el módulo del sandbox
+    if name == 'builtins' and level == 0:
+        return _SANDBOX_BUILTINS_MODULE
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+# Builtins del sandbox, construidos una vez: input no bloquea y open no escribe.
+# Se pasan como __builtins__ de cada exec en lugar de parchear el módulo builtins,
+# y `import builtins` devuelve un módulo con el mismo contenido. El módulo real
+# sigue accesible por sys.modules o importlib, igual que io.open y os.open
+_SANDBOX_BUILTINS: Dict[str, Any] = {
+    **vars(builtins),
+    'input': _safe_input,
+    'open': _safe_open,
+    '__import__': _sandbox_import,
+}
+_SANDBOX_BUILTINS_MODULE = types.ModuleType('builtins')
+vars(_SANDBOX_BUILTINS_MODULE).update(_SANDBOX_BUILTINS)
 
 
 def validate(code: str, timeout_sec: float = 3.0, normalize: bool = True) -> ValidationResult:
-    original_code = code
+    cls = classify(code)
     
-    # Try normalization if requested and original code has issues
-    normalized_code = code
-    if normalize:
-        try:
-            # Quick syntax check to see if normalization is needed
-            ast.parse(code)
-        except SyntaxError:
-            # Code has syntax errors, try normalizing
-            normalized_code = normalize_snippet(code)
-    
-    # Use normalized code for validation
-    code_to_validate = normalized_code
-    cls = classify(code_to_validate)
-    
-    # If no code (only comments/blank), consider valid but mark no_code
-    stripped = '\n'.join(ln for ln in code_to_validate.splitlines() if ln.strip())
+    # If no code (only comments/blank), consider valid but mark no_code;
+    # there is nothing to compile or normalize
     if not cls['has_code']:
         return ValidationResult(status='no_code', details='Only comments/blank', stdout='', stderr='', classification=cls)
 
-    # Syntax check on the code we'll actually execute
+    # Syntax check (compiled once and cached; the code object is reused by exec)
+    source = code
     try:
-        ast.parse(code_to_validate)
+        code_obj = _compile_snippet(code)
+        syntax_error = None
     except SyntaxError as e:
-        return ValidationResult(status='syntax_error', details=str(e), stdout='', stderr='', classification=cls)
+        syntax_error = e
+
+    # Try normalization if requested and original code has issues
+    if syntax_error is not None and normalize:
+        normalized_code = normalize_snippet(code)
+        # Unchanged code would fail again: keep the error we already have
+        if normalized_code != code:
+            cls = classify(normalized_code)
+            try:
+                code_obj = _compile_snippet(normalized_code)
+                source = normalized_code
+                syntax_error = None
+            except SyntaxError as e:
+                syntax_error = e
+
+    if syntax_error is not None:
+        return ValidationResult(status='syntax_error', details=str(syntax_error), stdout='', stderr='', classification=cls)
 
     # Execute with timeout in sandbox
     stdout_io, stderr_io = io.StringIO(), io.StringIO()
@@ -96,20 +182,23 @@ def validate(code: str, timeout_sec: float = 3.0, normalize: bool = True) -> Val
 
     def runner():
         try:
-            with sandbox_env(), redirect_stdout(stdout_io), redirect_stderr(stderr_io):
+            with redirect_stdout(stdout_io), redirect_stderr(stderr_io):
                 # Isolated globals/locals
-                g: Dict[str, Any] = {'__name__': '__snippet__'}
+                g: Dict[str, Any] = {'__builtins__': _SANDBOX_BUILTINS, '__name__': '__snippet__'}
                 l: Dict[str, Any] = {}
-                exec(compile(code_to_validate, '<snippet>', 'exec'), g, l)
-        except Exception as ex:  # capture for reporting
+                exec(code_obj, g, l)
+        except SystemExit as ex:
+            # sys.exit() del snippet: solo un código distinto de 0 es un error
+            if ex.code not in (None, 0):
+                result_container['exc'] = ex
+        except (Exception, _SnippetTimeout) as ex:  # capture for reporting
+            # KeyboardInterrupt se propaga: un Ctrl-C real debe detener el lote
             result_container['exc'] = ex
 
-    t = threading.Thread(target=runner)
-    t.daemon = True
-    t.start()
-    t.join(timeout=timeout_sec)
-
-    if t.is_alive():
+    # redirect_stdout/stderr cambian sys.stdout de todo el proceso, así que ejecutar
+    # en el hilo actual con SIGALRM evita además crear un hilo por snippet
+    run = _run_with_alarm if _can_use_alarm(source, timeout_sec) else _run_in_thread
+    if not run(runner, timeout_sec):
         return ValidationResult(status='timeout', details=f'Timed out after {timeout_sec}s', stdout=stdout_io.getvalue(), stderr=stderr_io.getvalue(), classification=cls)
 
     exc = result_container['exc']
@@ -117,3 +206,15 @@ def validate(code: str, timeout_sec: float = 3.0, normalize: bool = True) -> Val
         return ValidationResult(status='runtime_error', details=f'{type(exc).__name__}: {exc}', stdout=stdout_io.getvalue(), stderr=stderr_io.getvalue(), classification=cls)
 
     return ValidationResult(status='ok', details='Executed successfully', stdout=stdout_io.getvalue(), stderr=stderr_io.getvalue(), classification=cls)
+
+
+def validate_many(codes: Iterable[str], timeout_sec: float = 3.0, normalize: bool = True,
+                  workers: Optional[int] = None, chunksize: int = 32) -> List[ValidationResult]:
+    # validate() cambia estado global del proceso (stdout, SIGALRM), así que el
+    # paralelismo seguro es por procesos; cada worker ejecuta en su hilo principal
+    codes = list(codes)
+    run = partial(validate, timeout_sec=timeout_sec, normalize=normalize)
+    if workers == 1 or len(codes) <= 1:
+        return [run(code) for code in codes]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, codes, chunksize=chunksize))
@@ -6,20 +6,118 @@ Este script valida las mejoras implementadas específicamente para código educa
 basadas en el análisis del archivo "Referencia Python.py"
 """
 
+import io
 import sys
-from pathlib import Path
+from contextlib import redirect_stdout
 
-# Agregar src al path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
-
-from snippets.agents.educational_enhancements import (
+from src.snippets.agents.educational_enhancements import (
     CommentContextDetector, 
     EducationalSnippetClassifier, 
     OOPPatternDetector,
     EducationalLevel,
     CommentType
 )
-from snippets.agents.base_agent import Snippet
+from src.snippets.agents.base_agent import Snippet
+
+# Instancias compartidas: los patrones se compilan una vez para todos los tests
+_DETECTOR = CommentContextDetector()
+_CLASSIFIER = EducationalSnippetClassifier()
+_OOP = OOPPatternDetector()
+
+# Snippets con diferentes patrones POO del archivo de referencia
+# (los snippets fijos se construyen una vez al importar el módulo)
+OOP_SNIPPETS = (
+    Snippet("""
+class Animal:
+    def __init__(self, nombre):
+        self.nombre = nombre
+    
+    def comer(self):
+        print(f"{self.nombre} está comiendo")
+        """, 0),
+
+    Snippet("""
+class Dog(Animal):
+    def ladrar(self):
+        print(f"{self.nombre} está ladrando")
+    
+    def comer(self):  # Override del método padre
+        print(f"{self.nombre} está comiendo croquetas")
+        """, 1),
+
+    Snippet("""
+class Cat(Animal):
+    def maullar(self):
+        print(f"{self.nombre} está maullando")
+        """, 2)
+)
+
+# Algunos snippets extraídos directamente del archivo de referencia
+REAL_SNIPPETS = tuple(
+    (description, Snippet(content, 0))
+    for description, content in (
+        (
+            "Lista básica con comentarios",
+            """
+# Listas: -----------------------------------------------------------------------------------------
+lista = [1,2,3]
+
+# Imprimir el primer número de la lista (print):
+lista[0]
+
+# Imprimir un rango de la lista (print):
+lista[0:3]
+            """
+        ),
+        (
+            "Función con explicación detallada",
+            """
+# Retorno de valores en funciones:
+# La formas más básicas:
+
+# Devolviendo una cadena
+def estudiante():
+    return "Estudiantes genios"
+
+# La salida se puede almacenar en una variable:
+salida = estudiante()
+            """
+        ),
+        (
+            "Clase con herencia y métodos",
+            """
+# Using super() - HERENCIA ESPECIFICA super()
+class Polygon:
+    def __init__(self, sides):
+        self.sides = sides
+
+    def display_info(self):
+        print("A polygon is a two dimensional shape with straight lines.")
+
+class Triangle(Polygon):
+    def display_info(self):
+        print("A triangle is a polygon with 3 edges.")
+        
+        # call the display_info() method of Polygon  
+        super().display_info()  # Aquí se usa Super()
+            """
+        ),
+    )
+)
+
+# Secuencia de snippets en orden de dificultad creciente
+PROGRESSION_SNIPPETS = tuple(
+    (description, Snippet(code, 0))
+    for description, code in (
+        ("Variables", "nombre = 'Juan'"),
+        ("Variables + Operaciones", "edad = 25\nedad_en_10_anos = edad + 10"),
+        ("Listas", "numeros = [1, 2, 3, 4, 5]\nprint(len(numeros))"),
+        ("Bucles", "for numero in numeros:\n    print(numero * 2)"),
+        ("Funciones", "def duplicar(x):\n    return x * 2"),
+        ("Funciones + Listas", "def procesar_lista(lista):\n    return [duplicar(x) for x in lista]"),
+        ("Clases", "class Calculadora:\n    def sumar(self, a, b):\n        return a + b"),
+    )
+)
 
 
 def test_comment_detection():
@@ -43,16 +141,17 @@ float(numero) + 5
 # NOTA: Cuidado con los tipos de datos
 """
     
-    detector = CommentContextDetector()
-    analysis = detector.detect_educational_comments(test_content)
+    analysis = _DETECTOR.detect_educational_comments(test_content)
     
-    print(f"✅ Total comentarios: {analysis['total_comments']}")
-    print(f"✅ Comentarios educativos: {analysis['educational_comments']}")
-    print(f"✅ Tipos encontrados: {analysis['comment_types']}")
-    print(f"✅ Tiene explicaciones: {analysis['has_explanations']}")
-    print(f"✅ Tiene ejemplos: {analysis['has_examples']}")
-    print(f"✅ Score de calidad: {analysis['comment_quality_score']:.2f}/10")
-    print()
+    sys.stdout.write(
+        f"✅ Total comentarios: {analysis['total_comments']}\n"
+        f"✅ Comentarios educativos: {analysis['educational_comments']}\n"
+        f"✅ Tipos encontrados: {analysis['comment_types']}\n"
+        f"✅ Tiene explicaciones: {analysis['has_explanations']}\n"
+        f"✅ Tiene ejemplos: {analysis['has_examples']}\n"
+        f"✅ Score de calidad: {analysis['comment_quality_score']:.2f}/10\n"
+        "\n"
+    )
 
 
 def test_concept_detection():
@@ -71,13 +170,9 @@ def test_concept_detection():
         ("Imports", "import math\nfrom datetime import datetime")
     ]
     
-    detector = CommentContextDetector()
-    
-    for description, code in test_snippets:
-        concepts = detector.detect_educational_concepts(code)
-        print(f"✅ {description}: {concepts}")
-    
-    print()
+    results = [(description, _DETECTOR.detect_educational_concepts(code))
+               for description, code in test_snippets]
+    sys.stdout.write("\n".join(f"✅ {description}: {concepts}" for description, concepts in results) + "\n\n")
 
 
 def test_educational_classification():
@@ -135,11 +230,9 @@ print(perro.hacer_sonido())
         }
     ]
     
-    classifier = EducationalSnippetClassifier()
-    
     for case in test_cases:
         snippet = Snippet(case["content"], 0)
-        context = classifier.classify_snippet(snippet)
+        context = _CLASSIFIER.classify_snippet(snippet)
         
         print(f"📚 {case['description']}")
         print(f"   Nivel: {context.level.value}")
@@ -155,35 +248,7 @@ def test_oop_detection():
     print("🏗️ Testing OOP Pattern Detection")  
     print("-" * 40)
     
-    # Snippets con diferentes patrones POO del archivo de referencia
-    oop_snippets = [
-        Snippet("""
-class Animal:
-    def __init__(self, nombre):
-        self.nombre = nombre
-    
-    def comer(self):
-        print(f"{self.nombre} está comiendo")
-        """, 0),
-        
-        Snippet("""
-class Dog(Animal):
-    def ladrar(self):
-        print(f"{self.nombre} está ladrando")
-    
-    def comer(self):  # Override del método padre
-        print(f"{self.nombre} está comiendo croquetas")
-        """, 1),
-        
-        Snippet("""
-class Cat(Animal):
-    def maullar(self):
-        print(f"{self.nombre} está maullando")
-        """, 2)
-    ]
-    
-    detector = OOPPatternDetector()
-    relationships = detector.detect_class_relationships(oop_snippets)
+    relationships = _OOP.detect_class_relationships(OOP_SNIPPETS)
     
     print(f"✅ Clases encontradas: {list(relationships['classes'].keys())}")
     print(f"✅ Cadenas de herencia: {relationships['inheritance_chains']}")
@@ -198,72 +263,23 @@ def test_real_reference_file_snippets():
     print("📄 Testing Real Reference File Snippets")
     print("-" * 40)
     
-    # Algunos snippets extraídos directamente del archivo de referencia
-    real_snippets = [
-        {
-            "description": "Lista básica con comentarios",
-            "content": """
-# Listas: -----------------------------------------------------------------------------------------
-lista = [1,2,3]
-
-# Imprimir el primer número de la lista (print):
-lista[0]
-
-# Imprimir un rango de la lista (print):
-lista[0:3]
-            """
-        },
-        {
-            "description": "Función con explicación detallada", 
-            "content": """
-# Retorno de valores en funciones:
-# La formas más básicas:
-
-# Devolviendo una cadena
-def estudiante():
-    return "Estudiantes genios"
-
-# La salida se puede almacenar en una variable:
-salida = estudiante()
-            """
-        },
-        {
-            "description": "Clase con herencia y métodos",
-            "content": """
-# Using super() - HERENCIA ESPECIFICA super()
-class Polygon:
-    def __init__(self, sides):
-        self.sides = sides
-
-    def display_info(self):
-        print("A polygon is a two dimensional shape with straight lines.")
-
-class Triangle(Polygon):
-    def display_info(self):
-        print("A triangle is a polygon with 3 edges.")
-        
-        # call the display_info() method of Polygon  
-        super().display_info()  # Aquí se usa Super()
-            """
-        }
-    ]
-    
-    classifier = EducationalSnippetClassifier()
-    
-    for case in real_snippets:
-        print(f"📝 {case['description']}")
+    # Se arma el informe completo y se escribe de una sola vez
+    rows = []
+    for description, snippet in REAL_SNIPPETS:
+        context = _CLASSIFIER.classify_snippet(snippet)
         
-        snippet = Snippet(case["content"], 0)
-        context = classifier.classify_snippet(snippet)
-        
-        print(f"   📊 Nivel educativo: {context.level.value}")
-        print(f"   🎯 Temas: {', '.join(context.topics)}")
-        print(f"   ⚡ Prerequisitos: {', '.join(context.prerequisites)}")
-        print(f"   📈 Dificultad: {context.difficulty_score:.2f}/10")
-        print(f"   💬 Tiene explicaciones: {context.has_explanations}")
-        print(f"   📚 Tiene ejemplos: {context.has_examples}")
-        print(f"   ⭐ Calidad comentarios: {context.comment_quality:.2f}/10")
-        print()
+        rows += [
+            f"📝 {description}",
+            f"   📊 Nivel educativo: {context.level.value}",
+            f"   🎯 Temas: {', '.join(context.topics)}",
+            f"   ⚡ Prerequisitos: {', '.join(context.prerequisites)}",
+            f"   📈 Dificultad: {context.difficulty_score:.2f}/10",
+            f"   💬 Tiene explicaciones: {context.has_explanations}",
+            f"   📚 Tiene ejemplos: {context.has_examples}",
+            f"   ⭐ Calidad comentarios: {context.comment_quality:.2f}/10",
+            "",
+        ]
+    sys.stdout.write("\n".join(rows) + "\n")
 
 
 def test_progression_logic():
@@ -271,30 +287,16 @@ def test_progression_logic():
     print("🚀 Testing Educational Progression Logic")
     print("-" * 40)
     
-    # Secuencia de snippets en orden de dificultad creciente
-    progression_snippets = [
-        ("Variables", "nombre = 'Juan'"),
-        ("Variables + Operaciones", "edad = 25\nedad_en_10_anos = edad + 10"),
-        ("Listas", "numeros = [1, 2, 3, 4, 5]\nprint(len(numeros))"),
-        ("Bucles", "for numero in numeros:\n    print(numero * 2)"),
-        ("Funciones", "def duplicar(x):\n    return x * 2"),
-        ("Funciones + Listas", "def procesar_lista(lista):\n    return [duplicar(x) for x in lista]"),
-        ("Clases", "class Calculadora:\n    def sumar(self, a, b):\n        return a + b"),
-    ]
-    
-    classifier = EducationalSnippetClassifier()
-    
-    print("📈 Progresión de dificultad:")
-    for description, code in progression_snippets:
-        snippet = Snippet(code, 0)
-        context = classifier.classify_snippet(snippet)
+    rows = ["📈 Progresión de dificultad:"]
+    for description, snippet in PROGRESSION_SNIPPETS:
+        context = _CLASSIFIER.classify_snippet(snippet)
         
-        print(f"   {description:20} | "
-              f"Nivel: {context.level.value:12} | "
-              f"Dificultad: {context.difficulty_score:4.1f} | "
-              f"Conceptos: {len(context.topics):2}")
-    
-    print()
+        rows.append(f"   {description:20} | "
+                    f"Nivel: {context.level.value:12} | "
+                    f"Dificultad: {context.difficulty_score:4.1f} | "
+                    f"Conceptos: {len(context.topics):2}")
+    rows.append("")
+    sys.stdout.write("\n".join(rows) + "\n")
 
 
 def main():
@@ -304,12 +306,16 @@ def main():
     print("Validando mejoras basadas en el archivo 'Referencia Python.py'")
     print()
     
-    test_comment_detection()
-    test_concept_detection() 
-    test_educational_classification()
-    test_oop_detection()
-    test_real_reference_file_snippets()
-    test_progression_logic()
+    # Los tests son CPU (regex) bajo el GIL, así que en hilos no se solapan, y
+    # redirect_stdout es global al proceso. Se ejecutan en orden y su salida
+    # se acumula en memoria para escribirla de una sola vez
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        for test in (test_comment_detection, test_concept_detection,
+                     test_educational_classification, test_oop_detection,
+                     test_real_reference_file_snippets, test_progression_logic):
+            test()
+    sys.stdout.write(buffer.getvalue())
     
     print("✅ Todos los tests de mejoras educativas completados!")
     print("\n📊 RESULTADOS SUMMARY:")
@@ -4,17 +4,14 @@ Test completo de integración con Groq API
 """
 
 import asyncio
-import sys
-from pathlib import Path
+from functools import lru_cache
+from types import CodeType
 import pytest
 
-# Agregar src al path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
-
-from snippets.agents.context_analyzer import ContextAnalyzer
-from snippets.agents.context_builder import ContextBuilder
-from snippets.agents.llm_client import LLMConfig
-from snippets.agents.base_agent import Snippet
+from src.snippets.agents.context_analyzer import ContextAnalyzer
+from src.snippets.agents.context_builder import ContextBuilder
+from src.snippets.agents.llm_client import LLMConfig
+from src.snippets.agents.base_agent import Snippet
 
 @pytest.mark.asyncio
 async def test_full_integration():
@@ -49,9 +46,14 @@ async def test_full_integration():
     print("🔍 STEP 1: Context Analysis")
     print("-" * 30)
     
+    builder_task = None
     try:
         analyzer = ContextAnalyzer()
-        analysis_result = await analyzer.analyze(target_snippet, snippets, 3)
+        analysis_task = asyncio.create_task(analyzer.analyze(target_snippet, snippets, 3))
+        # Crear el builder (cliente LLM, plantilla leída de disco) no depende del
+        # análisis: se hace en un hilo mientras la llamada al LLM está en curso
+        builder_task = asyncio.create_task(asyncio.to_thread(ContextBuilder, enable_llm=True))
+        analysis_result = await analysis_task
         
         if analysis_result.success:
             print(f"✅ Analysis successful! (confidence: {analysis_result.confidence:.2f})")
@@ -86,7 +88,7 @@ async def test_full_integration():
     print("-" * 30)
     
     try:
-        builder = ContextBuilder(enable_llm=True)
+        builder = await builder_task if builder_task else ContextBuilder(enable_llm=True)
         build_result = await builder.analyze(
             target_snippet, snippets, 3, 
             dependencies=dependencies
@@ -114,6 +116,12 @@ async def test_full_integration():
         print(f"❌ Context building error: {e}")
         return None
 
+@lru_cache(maxsize=256)
+def _compile_complete_code(complete_code: str) -> CodeType:
+    """Compila contexto + snippet una vez por texto distinto"""
+    # Sin optimize=2: quitaría los assert, que forman parte de lo que se ejecuta
+    return compile(complete_code, '<snippet>', 'exec')
+
 async def execute_code_helper(context_code, target_snippet):
     """Test de ejecución del código completo"""
     print("\n🚀 STEP 3: Code Execution Test")
@@ -133,9 +141,9 @@ async def execute_code_helper(context_code, target_snippet):
             print(f"{i:2d}. {line}")
         print("```")
         
-        # Ejecutar
+        # Ejecutar (el code object compilado se reutiliza si el código se repite)
         exec_globals = {}
-        exec(complete_code, exec_globals)
+        exec(_compile_complete_code(complete_code), exec_globals)
         
         print("\n✅ Execution successful!")
         
@@ -0,0 +1,90 @@
+"""
+Tests para mejoras educativas - clasificación de snippets
+"""
+
+import pytest
+
+from src.snippets.agents.base_agent import Snippet
+from src.snippets.agents.educational_enhancements import (
+    CommentContextDetector, EducationalLevel, EducationalSnippetClassifier, OOPPatternDetector
+)
+
+
+@pytest.fixture
+def classifier():
+    return EducationalSnippetClassifier()
+
+
+class TestClassifySnippet:
+
+    def test_complexity_is_computed_once_per_snippet(self, classifier, monkeypatch):
+        calls = []
+        original = classifier._calculate_code_complexity
+        monkeypatch.setattr(classifier, "_calculate_code_complexity",
+                            lambda content: calls.append(content) or original(content))
+
+        context = classifier.classify_snippet(
+            Snippet("class Calculadora:\n    def sumar(self, a, b):\n        return a + b", 0)
+        )
+
+        assert len(calls) == 1
+        assert context.level == EducationalLevel.ADVANCED
+        # 2 conceptos * 0.5 + complejidad 4 * 0.3 + 1 concepto avanzado * 0.8
+        assert context.difficulty_score == pytest.approx(3.0)
+
+    def test_precomputed_analyses_are_reused(self, classifier, monkeypatch):
+        snippet = Snippet("# Ejemplo de uso:\nlista = [1, 2]\nlista.append(3)", 0)
+        expected = classifier.classify_snippet(snippet)
+        detector = classifier.comment_detector
+        comments = detector.detect_educational_comments(snippet.content)
+        concepts = detector.detect_educational_concepts(snippet.content)
+
+        monkeypatch.setattr(detector, "detect_educational_comments",
+                            lambda content: pytest.fail("comments analysed twice"))
+        monkeypatch.setattr(detector, "detect_educational_concepts",
+                            lambda content: pytest.fail("concepts analysed twice"))
+
+        assert classifier.classify_snippet(snippet, comments, concepts) == expected
+
+
+class TestConceptDetection:
+
+    @pytest.mark.parametrize("content, expected", [
+        ("# Uso de un BUCLE y una LISTA", ["loops", "lists"]),
+        ("total  = 1", ["variables"]),
+        ("def saludar():\n    print('Hola')", ["functions", "strings"]),
+        ("from os import path", ["imports"]),
+        ("", []),
+    ])
+    def test_keywords_are_case_insensitive_and_regexes_still_apply(self, content, expected):
+        assert CommentContextDetector().detect_educational_concepts(content) == expected
+
+    def test_pattern_tables_are_built_once_per_class(self):
+        detector = CommentContextDetector()
+
+        assert vars(detector) == {}
+        assert detector.CONCEPT_PATTERNS is CommentContextDetector.CONCEPT_PATTERNS
+        assert vars(EducationalSnippetClassifier()).keys() == {'comment_detector'}
+
+
+class TestOOPPatternDetector:
+
+    def test_classes_nested_in_statements_are_found_in_walk_order(self):
+        code = (
+            "class Base:\n"
+            "    def hablar(self): pass\n"
+            "try:\n"
+            "    import x\n"
+            "except ImportError:\n"
+            "    class Hija(Base):\n"
+            "        def hablar(self): return [lambda: 1]\n"
+            "def fabrica():\n"
+            "    class Local: pass\n"
+        )
+
+        classes = OOPPatternDetector()._extract_classes(code)
+
+        # Mismo orden que ast.walk (por niveles): Local está menos anidada que Hija
+        assert list(classes) == ['Base', 'Local', 'Hija']
+        assert classes['Hija']['parent'] == 'Base'
+        assert classes['Hija']['methods'] == ['hablar']
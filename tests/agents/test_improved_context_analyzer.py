@@ -0,0 +1,381 @@
+"""
+Tests para Improved Context Analyzer - estrategias con LLM simulado
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from src.snippets.agents.base_agent import Snippet, DependencyMap
+from src.snippets.agents.enhanced_analyzer import CodeComplexity
+from src.snippets.agents.improved_context_analyzer import ImprovedContextAnalyzer
+
+
+class SlowAttempts:
+    """Intentos LLM simulados con latencia y confianza configurables"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.cancelled = []
+
+    def attempt(self, name):
+        async def _run(snippet, formatted_context, on_confidence=None):
+            delay, confidence = self.delays[name]
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(name)
+                raise
+            return DependencyMap(confidence=confidence)
+        return _run
+
+
+def _analyzer(attempts: SlowAttempts) -> ImprovedContextAnalyzer:
+    analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+    analyzer._analyze_with_complex_template = attempts.attempt("complex")
+    analyzer._analyze_with_standard_template = attempts.attempt("standard")
+    analyzer._analyze_framework_patterns = attempts.attempt("framework")
+    return analyzer
+
+
+@pytest.fixture
+def snippet():
+    return Snippet("print(lista[0])", 0)
+
+
+class TestUltraComplexAnalysis:
+    """Intentos concurrentes del análisis ultra-complejo"""
+
+    @pytest.mark.asyncio
+    async def test_returns_first_high_confidence_and_cancels_rest(self, snippet):
+        attempts = SlowAttempts({"complex": (0.01, 0.9), "standard": (5.0, 0.95)})
+        analyzer = _analyzer(attempts)
+
+        start = time.perf_counter()
+        result = await analyzer._ultra_complex_analysis(snippet, "", CodeComplexity())
+        elapsed = time.perf_counter() - start
+
+        assert result.confidence == pytest.approx(0.9)
+        assert elapsed < 1.0
+        await asyncio.sleep(0)
+        assert attempts.cancelled == ["standard"]
+
+    @pytest.mark.asyncio
+    async def test_keeps_best_result_when_none_is_confident(self, snippet):
+        attempts = SlowAttempts({"complex": (0.02, 0.6), "standard": (0.01, 0.4)})
+        analyzer = _analyzer(attempts)
+
+        result = await analyzer._ultra_complex_analysis(snippet, "", CodeComplexity())
+
+        assert result.confidence == pytest.approx(0.6)
+
+    @pytest.mark.asyncio
+    async def test_ast_baseline_runs_off_loop_and_does_not_skip_llm(self, snippet):
+        import threading
+
+        attempts = SlowAttempts({"complex": (0.01, 0.2), "standard": (0.01, 0.9)})
+        analyzer = _analyzer(attempts)
+        ast_threads = []
+        ast_fallback = analyzer._enhanced_ast_fallback_wrapper
+
+        def recording_fallback(*args):
+            ast_threads.append(threading.current_thread())
+            return ast_fallback(*args)
+
+        analyzer._enhanced_ast_fallback_wrapper = recording_fallback
+
+        # Con la configuración por defecto el LLM siempre se consulta
+        result = await analyzer._ultra_complex_analysis(snippet, "", CodeComplexity())
+
+        assert result.confidence == pytest.approx(0.9)
+        assert ast_threads and threading.main_thread() not in ast_threads
+
+    @pytest.mark.asyncio
+    async def test_ast_baseline_wins_over_weaker_llm_attempts(self, snippet):
+        attempts = SlowAttempts({"complex": (0.01, 0.2), "standard": (0.01, 0.3)})
+        analyzer = _analyzer(attempts)
+
+        result = await analyzer._ultra_complex_analysis(snippet, "", CodeComplexity())
+
+        # Fallback AST base: 0.3, empata con el mejor intento LLM y gana
+        assert result.confidence == pytest.approx(0.3)
+        assert result.error.startswith("LLM failed, using enhanced AST fallback")
+
+
+class StreamingLLMClient:
+    """Cliente LLM falso: el intento complejo emite la confianza antes de terminar"""
+
+    SUPPORTS_STREAMING = True
+
+    def __init__(self):
+        self.cancelled = []
+
+    async def generate(self, prompt, system_message=None):
+        raise AssertionError("ultra-complex attempts should stream")
+
+    async def generate_stream(self, prompt, system_message=None, on_chunk=None):
+        name = "complex" if "complex" in system_message else "standard"
+        chunks = ['{"overall_confidence": 0.9, ', '"variables": {}}'] if name == "complex" else ['{}']
+        try:
+            for chunk in chunks:
+                on_chunk(chunk)
+                await asyncio.sleep(0.2 if name == "complex" else 5.0)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        return Mock(content="".join(chunks))
+
+
+class TestStreamedUltraComplexAnalysis:
+
+    @pytest.mark.asyncio
+    async def test_streamed_confidence_cancels_other_attempts_early(self, snippet):
+        client = StreamingLLMClient()
+        analyzer = ImprovedContextAnalyzer(llm_client=client)
+
+        result = await analyzer._ultra_complex_analysis(snippet, "", CodeComplexity())
+
+        assert result.confidence == pytest.approx(0.9)
+        assert client.cancelled == ["standard"]
+
+    @pytest.mark.asyncio
+    async def test_mock_clients_use_plain_generate(self):
+        from unittest.mock import AsyncMock
+
+        client = Mock(generate=AsyncMock(return_value=Mock(content="{}")))
+        analyzer = ImprovedContextAnalyzer(llm_client=client)
+
+        response = await analyzer._generate("p", "s", on_confidence=lambda confidence: None)
+
+        assert response.content == "{}"
+        assert not client.generate_stream.called
+
+
+class TestMultiPassAnalysis:
+    """Pasadas general y de framework en paralelo"""
+
+    @pytest.mark.asyncio
+    async def test_general_and_framework_passes_overlap(self, snippet):
+        attempts = SlowAttempts({"complex": (0.2, 0.6), "framework": (0.2, 0.7)})
+        analyzer = _analyzer(attempts)
+        complexity = CodeComplexity(framework_patterns=["flask"])
+
+        start = time.perf_counter()
+        result = await analyzer._multi_pass_analysis(snippet, "", complexity)
+        elapsed = time.perf_counter() - start
+
+        assert result.confidence == pytest.approx(0.7)
+        assert elapsed < 0.35
+
+    @pytest.mark.asyncio
+    async def test_framework_pass_is_cancelled_when_general_pass_fails(self, snippet):
+        attempts = SlowAttempts({"framework": (5.0, 0.7)})
+        analyzer = _analyzer(attempts)
+
+        async def failing_general(snippet, formatted_context, on_confidence=None):
+            raise RuntimeError("general pass failed")
+
+        analyzer._analyze_with_complex_template = failing_general
+
+        with pytest.raises(RuntimeError):
+            await analyzer._multi_pass_analysis(snippet, "", CodeComplexity(framework_patterns=["flask"]))
+        await asyncio.sleep(0)
+
+        assert attempts.cancelled == ["framework"]
+
+    @pytest.mark.asyncio
+    async def test_framework_pass_is_not_cut_by_agent_timeout(self, snippet):
+        attempts = SlowAttempts({"complex": (0.01, 0.6), "framework": (0.2, 0.7)})
+        analyzer = _analyzer(attempts)
+        analyzer.timeout_seconds = 0.05
+
+        result = await analyzer._multi_pass_analysis(snippet, "", CodeComplexity(framework_patterns=["flask"]))
+
+        assert result.confidence == pytest.approx(0.7)
+
+
+class TestResultCache:
+    """Cache de DependencyMaps por snippet/contexto/estrategia"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_analysis_hits_cache(self, snippet):
+        attempts = SlowAttempts({"standard": (0.0, 0.7)})
+        analyzer = _analyzer(attempts)
+        context = [{"index": 0, "content": snippet.content,
+                    "relative_position": 0, "is_target": True}]
+
+        first = await analyzer._execute_analysis_strategy(
+            "standard_improved", snippet, context, CodeComplexity())
+        first.variables["mutated"] = {}
+        second = await analyzer._execute_analysis_strategy(
+            "standard_improved", snippet, context, CodeComplexity())
+
+        assert second.confidence == pytest.approx(0.7)
+        assert "mutated" not in second.variables
+        cache_stats = analyzer.get_performance_stats()['result_cache']
+        assert (cache_stats['hits'], cache_stats['misses']) == (1, 1)
+
+        analyzer.clear_cache()
+        assert analyzer.get_performance_stats()['result_cache']['size'] == 0
+
+
+class TestPerformanceStats:
+    """Estadísticas acotadas con agregados acumulados"""
+
+    def test_filter_stats_are_bounded_but_averages_cover_all(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        analyzer.filter_stats = type(analyzer.filter_stats)(maxlen=2)
+
+        for rate in (0.1, 0.2, 0.3, 0.4):
+            analyzer._record_filter_stats(
+                {'overall': {'overall_filter_rate': rate, 'confidence_improvement': 0.1}}
+            )
+
+        summary = analyzer.get_performance_stats()['filter_stats_summary']
+        assert len(analyzer.filter_stats) == 2
+        assert summary['total_filters_applied'] == 4
+        assert summary['avg_filter_rate'] == pytest.approx(0.25)
+
+        analyzer.reset_performance_stats()
+        assert analyzer.get_performance_stats()['filter_stats_summary']['avg_filter_rate'] == 0
+
+
+class TestMergeDependencyMaps:
+
+    def test_primary_entries_win_and_inputs_are_untouched(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        low = DependencyMap(variables={'x': {'source': 'low'}, 'y': {}}, confidence=0.4)
+        high = DependencyMap(variables={'x': {'source': 'high'}},
+                             imports={'os': {}}, confidence=0.9)
+
+        merged = analyzer._merge_dependency_maps(low, high, prefer_higher_confidence=True)
+
+        assert merged.variables == {'x': {'source': 'high'}, 'y': {}}
+        assert merged.imports == {'os': {}}
+        assert merged.confidence == pytest.approx(0.9)
+        assert low.variables == {'x': {'source': 'low'}, 'y': {}}
+
+    def test_identical_key_sets_return_primary_without_merging(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        first = DependencyMap(variables={'x': {'v': 1}}, confidence=0.8)
+        second = DependencyMap(variables={'x': {'v': 2}}, confidence=0.8)
+
+        assert analyzer._merge_dependency_maps(first, second) is first
+
+
+class TestPostProcessing:
+
+    @pytest.mark.asyncio
+    async def test_precision_filter_runs_and_records_stats(self, snippet):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        noisy = DependencyMap(
+            variables={'print': {'confidence': 0.9}, 'lista': {'confidence': 0.9}},
+            confidence=0.7
+        )
+
+        filtered = await analyzer._post_process_dependencies(noisy, snippet, CodeComplexity())
+
+        assert list(filtered.variables) == ['lista']
+        assert len(analyzer.filter_stats) == 1
+
+
+class TestTemplateRendering:
+
+    def test_compiled_templates_match_str_format(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        values = {"target_snippet": "d = {'k': 1}", "context_snippets": "## Snippet 0"}
+
+        for template in (analyzer.complex_template, analyzer.prompt_template):
+            assert analyzer._render_template(template, **values) == template.format(**values)
+
+    def test_templates_with_format_specs_fall_back_to_format(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+
+        assert analyzer._render_template("{value!r:>6}", value="x") == "   'x'"
+
+
+class TestAnalysisMetadata:
+
+    def test_metadata_is_a_plain_dict_that_validates_into_agent_result(self):
+        from src.snippets.agents.base_agent import AgentResult
+
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        metadata = analyzer._build_analysis_metadata(
+            CodeComplexity(has_decorators=True, framework_patterns=["flask"]), "pattern_aware", 0.5
+        )
+
+        assert type(metadata) is dict
+        assert metadata['analysis_strategy'] == "pattern_aware"
+        assert metadata['has_frameworks'] is True
+
+        result = AgentResult(metadata=metadata)
+        assert result.metadata['analysis_version'] == 'improved_v1.0'
+        assert list(result.metadata)[:2] == ['analysis_version', 'complexity_score']
+
+
+class TestLLMConcurrencyLimit:
+
+    @pytest.mark.asyncio
+    async def test_semaphore_caps_concurrent_llm_calls(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock())
+        analyzer._llm_semaphore = asyncio.Semaphore(2)
+        running, peak = 0, 0
+
+        async def fake_call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(analyzer._with_llm_limit(fake_call()) for _ in range(6)))
+
+        assert results == ["ok"] * 6
+        assert peak == 2
+
+
+class TestBatchedClientLifecycle:
+
+    @pytest.mark.asyncio
+    async def test_aclose_leaves_no_pending_batch_worker(self):
+        from unittest.mock import AsyncMock
+
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock(spec=["generate"], generate=AsyncMock(return_value="r")))
+
+        assert await analyzer.batched_client.submit("prompt") == "r"
+        await analyzer.aclose()
+
+        assert analyzer.batched_client._worker is None
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        assert pending == []
+
+
+class TestContextAndComplexity:
+
+    def test_window_data_and_complexity_cover_the_same_snippets(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock(), window_size=1)
+        snippets = [
+            Snippet("import pandas as pd", 0),
+            Snippet("@app.route('/')\ndef home():\n    pass", 1),
+            Snippet("with open('f') as fh:\n    data = [x for x in fh]", 2),
+            Snippet("print(f'{data}')", 3),
+        ]
+
+        context_data, complexity = analyzer._context_and_complexity(snippets[2], snippets, 2)
+
+        assert [cs['index'] for cs in context_data] == [1, 2, 3]
+        assert [cs['is_target'] for cs in context_data] == [False, True, False]
+        assert complexity.framework_patterns == ['flask']
+        assert complexity.has_decorators and complexity.has_f_strings
+
+    def test_lone_snippet_matches_complexity_without_context(self):
+        analyzer = ImprovedContextAnalyzer(llm_client=Mock(), window_size=3)
+        snippet = Snippet("@app.route('/')\ndef home():\n    pass", 0)
+
+        context_data, complexity = analyzer._context_and_complexity(snippet, [snippet], 0)
+
+        assert [cs['is_target'] for cs in context_data] == [True]
+        assert complexity == analyzer._analyze_code_complexity(snippet, [])
@@ -0,0 +1,389 @@
+"""
+Tests para el cliente LLM - agrupación de requests sin API real
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.snippets.agents.llm_client import (
+    BatchedLLMClient, GroqLLMClient, LLMConfig, create_cache_backend
+)
+
+
+class EchoBatchClient:
+    """Cliente falso con API de batch que registra el tamaño de cada lote"""
+
+    SUPPORTS_BATCH = True
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    async def generate_batch(self, prompts, system_messages):
+        self.batch_sizes.append(len(prompts))
+        return [f"{system}:{prompt}" for prompt, system in zip(prompts, system_messages)]
+
+
+class EchoClient:
+    """Cliente falso sin API de batch"""
+
+    async def generate(self, prompt, system_message=None):
+        if prompt == "boom":
+            raise RuntimeError("backend error")
+        return prompt.upper()
+
+
+class TestBatchedLLMClient:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_submits_share_one_batch(self):
+        backend = EchoBatchClient()
+        client = BatchedLLMClient(backend, max_wait=0.05)
+
+        results = await asyncio.gather(
+            *(client.submit(f"p{i}", system_message="s") for i in range(5))
+        )
+        await client.close()
+
+        assert results == [f"s:p{i}" for i in range(5)]
+        assert backend.batch_sizes == [5]
+
+    @pytest.mark.asyncio
+    async def test_mock_clients_are_not_taken_for_batch_clients(self):
+        from unittest.mock import AsyncMock, Mock
+
+        backend = Mock(generate=AsyncMock(return_value="r"))
+        client = BatchedLLMClient(backend)
+
+        assert await client.submit("p") == "r"
+        assert not backend.generate_batch.called
+
+    @pytest.mark.asyncio
+    async def test_max_batch_splits_batches(self):
+        backend = EchoBatchClient()
+        client = BatchedLLMClient(backend, max_batch=2, max_wait=0.05)
+
+        await asyncio.gather(*(client.submit(f"p{i}") for i in range(5)))
+        await client.close()
+
+        assert backend.batch_sizes == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_fallback_to_generate_keeps_errors_per_prompt(self):
+        client = BatchedLLMClient(EchoClient())
+
+        results = await asyncio.gather(
+            client.submit("ok"), client.submit("boom"), return_exceptions=True
+        )
+        await client.close()
+
+        assert results[0] == "OK"
+        assert isinstance(results[1], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_worker_stops_when_queue_drains_and_restarts_on_submit(self):
+        backend = EchoBatchClient()
+        client = BatchedLLMClient(backend, max_wait=0.01)
+
+        assert await client.submit("a") == "None:a"
+        await asyncio.sleep(0.02)
+        assert client._worker.done()
+
+        assert await client.submit("b") == "None:b"
+        assert backend.batch_sizes == [1, 1]
+
+
+async def _echo_completion(**kwargs):
+    """Respuesta falsa de chat.completions.create que repite el prompt"""
+    await asyncio.sleep(0.01)
+    message = SimpleNamespace(content=kwargs["messages"][-1]["content"])
+    usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                           usage=usage, model=kwargs["model"])
+
+
+@pytest.fixture
+def groq_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    return GroqLLMClient(LLMConfig(cache_dir=str(tmp_path / "cache")))
+
+
+class TestCacheWrites:
+
+    @pytest.mark.asyncio
+    async def test_writes_are_buffered_until_flush_threshold(self, groq_client):
+        groq_client._save_to_cache("k1", {"content": "a"})
+
+        await groq_client._maybe_flush_cache()
+        assert not os.path.exists(groq_client._cache_backend.path("k1"))
+        assert groq_client._load_from_cache("k1") == {"content": "a"}
+
+        for i in range(GroqLLMClient.CACHE_FLUSH_MAX_PENDING):
+            groq_client._save_to_cache(f"k{i + 2}", {"content": str(i)})
+        await groq_client._maybe_flush_cache()
+
+        assert groq_client._pending_writes == {}
+        assert os.path.exists(groq_client._cache_backend.path("k1"))
+        assert groq_client._load_from_cache("k2") == {"content": "0"}
+
+    def test_sync_flush_writes_everything_pending(self, groq_client):
+        groq_client._save_to_cache("k", {"content": "a"})
+
+        groq_client._flush_cache_sync()
+
+        assert os.path.exists(groq_client._cache_backend.path("k"))
+
+    @pytest.mark.asyncio
+    async def test_exit_hook_flushes_live_clients_without_keeping_them_alive(self, groq_client):
+        import gc
+        import weakref
+
+        from src.snippets.agents import llm_client
+
+        groq_client._save_to_cache("k", {"content": "a"})
+        llm_client._flush_all_caches()
+        assert os.path.exists(groq_client._cache_backend.path("k"))
+
+        groq_client._save_to_cache("k2", {"content": "b"})
+        await groq_client.flush_cache()
+        assert os.path.exists(groq_client._cache_backend.path("k2"))
+
+        client = GroqLLMClient(LLMConfig(cache_dir=groq_client.config.cache_dir))
+        ref = weakref.ref(client)
+        del client
+        gc.collect()
+        assert ref() is None
+
+    def test_cache_files_are_sharded_by_key_prefix(self, groq_client):
+        key = groq_client._generate_cache_key("hola")
+        groq_client._save_to_cache(key, {"content": "a"})
+
+        groq_client._flush_cache_sync()
+
+        assert (groq_client.cache_dir / key[:2] / f"{key[2:]}.json").exists()
+
+    def test_client_works_with_any_cache_backend(self, monkeypatch):
+        class DictBackend:
+            def __init__(self):
+                self.store = {}
+
+            def get(self, key):
+                return self.store.get(key)
+
+            def set(self, key, value):
+                self.store[key] = value
+
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_enabled=False))
+        client.config.cache_enabled = True
+        client._cache_backend = DictBackend()
+
+        client._save_to_cache("k", {"content": "a"})
+        client._flush_cache_sync()
+        client._mem_cache.clear()
+
+        assert client._load_from_cache("k") == {"content": "a"}
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError):
+            create_cache_backend(LLMConfig(cache_backend="sqlite"))
+
+
+class TestMemoryCache:
+
+    def test_disk_hits_are_promoted_and_lru_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_dir=str(tmp_path / "cache"), mem_cache_max=2))
+        disk_file = Path(client._cache_backend.path("disk"))
+        disk_file.parent.mkdir()
+        disk_file.write_text('{"content": "d"}', encoding="utf-8")
+
+        assert client._load_from_cache("disk") == {"content": "d"}
+        disk_file.unlink()
+        assert client._load_from_cache("disk") == {"content": "d"}
+
+        client._save_to_cache("a", {"content": "a"})
+        client._load_from_cache("disk")
+        client._save_to_cache("b", {"content": "b"})
+
+        assert list(client._mem_cache) == ["disk", "b"]
+
+
+class TestCacheKey:
+
+    def test_key_depends_on_prompt_and_parameters(self, groq_client):
+        key = groq_client._generate_cache_key("hola", system="s")
+
+        assert len(key) == 32
+        assert key == groq_client._generate_cache_key("hola", system="s")
+        assert key != groq_client._generate_cache_key("hola", system=None)
+        assert key != groq_client._generate_cache_key("hola", system="None")
+        assert key != groq_client._generate_cache_key("hola2", system="s")
+
+
+class TestDisabledCache:
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_skips_key_generation(self, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_enabled=False))
+        monkeypatch.setattr(client, "_generate_cache_key",
+                            lambda *args, **kwargs: pytest.fail("cache key computed"))
+        monkeypatch.setattr(client.client.chat.completions, "create", _echo_completion)
+
+        response = await client.generate("hola")
+
+        assert response.content == "hola"
+
+
+class TestRequestPool:
+
+    @pytest.mark.asyncio
+    async def test_pool_size_caps_in_flight_requests(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_enabled=False, pool_size=2))
+        running, peak = 0, 0
+
+        async def create(**kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            response = await _echo_completion(**kwargs)
+            running -= 1
+            return response
+
+        monkeypatch.setattr(client.client.chat.completions, "create", create)
+
+        responses = await client.generate_batch([f"p{i}" for i in range(6)])
+
+        assert [r.content for r in responses] == [f"p{i}" for i in range(6)]
+        assert peak == 2
+
+    def test_sdk_client_owns_retries_and_timeout(self, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_enabled=False, max_retries=5, timeout=12.0))
+
+        assert client.client.max_retries == 5
+        assert client.client.timeout == 12.0
+
+
+class TestCostTracking:
+
+    def test_cost_uses_precomputed_per_token_price(self, groq_client):
+        from src.snippets.agents.llm_client import TokenUsage
+
+        price = GroqLLMClient.PRICING[groq_client.config.model]
+
+        assert groq_client._calculate_cost(TokenUsage(total_tokens=1500)) == pytest.approx(1.5 * price)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_cannot_overshoot_the_session_limit(self, monkeypatch):
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        client = GroqLLMClient(LLMConfig(cache_enabled=False, max_cost_per_session=2e-7))
+        client._tokenizer = None
+        monkeypatch.setattr(client.client.chat.completions, "create", _echo_completion)
+
+        results = await client.generate_batch(["a", "b"])
+
+        assert results[0].content == "a"
+        assert isinstance(results[1], ValueError)
+        assert client.session_requests == 1
+        assert client.session_cost == pytest.approx(2e-7)
+
+    @pytest.mark.asyncio
+    async def test_failed_request_releases_its_reservation(self, groq_client, monkeypatch):
+        async def fail(**kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(groq_client.client.chat.completions, "create", fail)
+
+        with pytest.raises(RuntimeError):
+            await groq_client.generate("hola")
+
+        assert groq_client.session_cost == 0.0
+        assert groq_client.session_requests == 0
+
+    def test_prompt_estimate_uses_tokenizer_when_available(self, groq_client):
+        groq_client._tokenizer = None
+        assert groq_client._estimate_prompt_tokens("uno dos tres") == pytest.approx(4.5)
+
+        groq_client._tokenizer = SimpleNamespace(encode=lambda text: list(text))
+        assert groq_client._estimate_prompt_tokens("uno dos tres") == 12 * GroqLLMClient.TOKEN_ESTIMATE_MARGIN
+
+    @pytest.mark.asyncio
+    async def test_tokenizer_is_loaded_once_on_first_request(self, groq_client, monkeypatch):
+        from src.snippets.agents import llm_client
+
+        loads = []
+        encoding = SimpleNamespace(encode=lambda text: list(text))
+        monkeypatch.setattr(llm_client, "tiktoken",
+                            SimpleNamespace(get_encoding=lambda name: loads.append(name) or encoding))
+        monkeypatch.setattr(groq_client.client.chat.completions, "create", _echo_completion)
+
+        assert groq_client._estimate_prompt_tokens("uno dos tres") == pytest.approx(4.5)
+        await groq_client.generate("a")
+        await groq_client.generate("b")
+
+        assert loads == ["cl100k_base"]
+        assert groq_client._tokenizer is encoding
+
+    def test_usage_round_trips_through_the_cache(self, groq_client):
+        from src.snippets.agents.llm_client import TokenUsage
+
+        usage = TokenUsage(prompt_tokens=3, completion_tokens=2, total_tokens=5, estimated_cost=0.1)
+        groq_client._save_to_cache("u", {"content": "c", "usage": usage.dict(), "model": "m"})
+
+        assert TokenUsage(**groq_client._load_from_cache("u")["usage"]) == usage
+
+
+class TestStreaming:
+
+    @pytest.mark.asyncio
+    async def test_stream_shares_cost_and_cache_handling_with_generate(self, groq_client, monkeypatch):
+        async def stream(**kwargs):
+            assert kwargs["stream"] is True
+            assert kwargs["messages"] == [{"role": "system", "content": "s"},
+                                          {"role": "user", "content": "hola"}]
+            usage = SimpleNamespace(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+            for text, x_groq in (("ho", None), ("la", SimpleNamespace(usage=usage))):
+                yield SimpleNamespace(model="m", x_groq=x_groq,
+                                      choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        async def create(**kwargs):
+            return stream(**kwargs)
+
+        monkeypatch.setattr(groq_client.client.chat.completions, "create", create)
+        chunks = []
+
+        response = await groq_client.generate_stream("hola", system_message="s", on_chunk=chunks.append)
+
+        assert (response.content, chunks, response.cached) == ("hola", ["ho", "la"], False)
+        assert groq_client.session_cost == pytest.approx(groq_client._calculate_cost(response.usage))
+        assert groq_client.session_requests == 1
+
+        cached = await groq_client.generate("hola", system_message="s")
+        assert (cached.content, cached.cached, cached.usage.total_tokens) == ("hola", True, 3)
+
+    @pytest.mark.asyncio
+    async def test_stream_without_usage_settles_an_estimate_not_zero(self, groq_client, monkeypatch):
+        async def stream():
+            for text in ("uno dos", " tres"):
+                yield SimpleNamespace(model="m", choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        async def create(**kwargs):
+            return stream()
+
+        monkeypatch.setattr(groq_client.client.chat.completions, "create", create)
+
+        response = await groq_client.generate_stream("hola")
+
+        assert response.usage.prompt_tokens > 0
+        assert response.usage.completion_tokens > 0
+        assert groq_client.session_cost == pytest.approx(response.usage.estimated_cost)
+        assert groq_client.session_cost > 0
+
+        cached = await groq_client.generate("hola")
+        assert cached.usage.total_tokens == response.usage.total_tokens
@@ -0,0 +1,175 @@
+"""
+Tests para PrecisionFilter - filtrado de falsos positivos
+"""
+
+import pytest
+
+from src.snippets.agents.base_agent import DependencyMap
+from src.snippets.agents.precision_filter import PrecisionFilter
+
+
+@pytest.fixture
+def precision_filter():
+    return PrecisionFilter()
+
+
+class TestLocalDefinitions:
+
+    def test_regex_fallback_on_syntax_errors(self, precision_filter):
+        snippet = (
+            "import os\n"
+            "from typing import List\n"
+            "total = 0\n"
+            "def compute(:\n"
+            "    inner = 1\n"
+            "class Model:\n"
+        )
+
+        definitions = precision_filter._extract_local_definitions(snippet)
+
+        assert definitions == {'os', 'List', 'total', 'compute', 'inner', 'Model'}
+
+    def test_ast_walk_unpacks_tuple_targets(self, precision_filter):
+        snippet = (
+            "import numpy as np\n"
+            "a, (b, *rest) = 1, (2, 3)\n"
+            "async def fetch():\n"
+            "    return [k for k, v in {}.items()]\n"
+            "for i, item in enumerate([]):\n"
+            "    pass\n"
+        )
+
+        definitions = precision_filter._extract_local_definitions(snippet)
+
+        assert definitions == {'np', 'a', 'b', 'rest', 'fetch', 'k', 'v', 'i', 'item'}
+
+    def test_definitions_are_memoized_by_content(self, precision_filter, monkeypatch):
+        snippet = "cached_name = 1  # memo test"
+        first = precision_filter._extract_local_definitions(snippet)
+
+        monkeypatch.setattr(precision_filter, "_parse_local_definitions",
+                            lambda content: pytest.fail("snippet parsed twice"))
+
+        assert precision_filter._extract_local_definitions(snippet) is first
+        assert PrecisionFilter()._extract_local_definitions(snippet) == {'cached_name'}
+
+
+class TestFilterRules:
+
+    def test_rules_are_indexed_by_category(self, precision_filter):
+        names = [rule.name for rule in precision_filter._rules_by_category['imports']]
+
+        assert names == ['low_confidence']
+
+    def test_per_item_rules_run_most_selective_first(self, precision_filter):
+        names = [rule.name for rule in precision_filter._rules_by_category['variables']]
+
+        assert names == ['low_confidence', 'single_letter_variables']
+
+    def test_custom_rule_is_applied(self, precision_filter):
+        precision_filter.create_custom_filter_rule(
+            "no_temp", "Filtra temporales",
+            lambda name, details, category: (name.startswith('tmp'), "temporary"),
+            ['variables']
+        )
+        dependency_map = DependencyMap(
+            variables={'tmp_value': {'confidence': 0.9}, 'users': {'confidence': 0.9}}
+        )
+
+        filtered = precision_filter.filter_dependencies(dependency_map, "print(users)")
+
+        assert list(filtered.variables) == ['users']
+
+    def test_builtin_rules_filter_noise_and_keep_real_dependencies(self, precision_filter):
+        dependency_map = DependencyMap(
+            variables={
+                'i': {'confidence': 0.4},
+                'self': {'confidence': 0.9},
+                'print': {'confidence': 0.8},
+                'user_data': {'confidence': 0.9},
+            },
+            functions={
+                '__init__': {'confidence': 0.5},
+                'len': {'confidence': 0.7},
+                'process_data': {'confidence': 0.85},
+            },
+            imports={'os': {'confidence': 0.2}, 'json': {'confidence': 0.6}},
+            confidence=0.7
+        )
+
+        filtered = precision_filter.filter_dependencies(dependency_map, "for i in user_data: pass")
+
+        assert list(filtered.variables) == ['user_data']
+        assert list(filtered.functions) == ['process_data']
+        assert list(filtered.imports) == ['json']
+
+    def test_membership_rules_respect_enabled_flag_and_thresholds(self, precision_filter):
+        next(r for r in precision_filter.filter_rules if r.name == "builtin_filter").enabled = False
+        dependency_map = DependencyMap(
+            variables={'print': {'confidence': 0.8}, 'total': {'confidence': 0.95},
+                       'count': {'confidence': 0.85}}
+        )
+
+        filtered = precision_filter.filter_dependencies(dependency_map, "total = 0\ncount = 1")
+
+        assert list(filtered.variables) == ['print', 'count']
+
+    def test_item_rules_follow_enabled_flag_between_calls(self, precision_filter):
+        single_letter = next(r for r in precision_filter.filter_rules if r.name == "single_letter_variables")
+        dependency_map = DependencyMap(variables={'x': {'confidence': 0.5}})
+
+        single_letter.enabled = False
+        assert list(precision_filter.filter_dependencies(dependency_map, "").variables) == ['x']
+        single_letter.enabled = True
+        assert list(precision_filter.filter_dependencies(dependency_map, "").variables) == []
+
+    def test_category_tables_follow_rule_changes_between_calls(self, precision_filter):
+        rules = {r.name: r for r in precision_filter.filter_rules}
+        dependency_map = DependencyMap(
+            variables={'self': {'confidence': 0.9}, 'total': {'confidence': 0.95}},
+            functions={'len': {'confidence': 0.9}}
+        )
+
+        filtered = precision_filter.filter_dependencies(dependency_map, "total = 0")
+        assert (list(filtered.variables), list(filtered.functions)) == ([], [])
+
+        rules['self_parameter'].enabled = False
+        rules['local_definitions'].enabled = False
+        rules['builtin_filter'].applies_to = ['variables']
+        filtered = precision_filter.filter_dependencies(dependency_map, "total = 0")
+        assert (list(filtered.variables), list(filtered.functions)) == (['self', 'total'], ['len'])
+
+
+class TestFilterStats:
+
+    def test_fused_stats_match_separate_analysis(self, precision_filter):
+        dependency_map = DependencyMap(
+            variables={'self': {'confidence': 0.9}, 'x': {'confidence': 0.5},
+                       'users': {'confidence': 0.9}},
+            imports={'os': {'confidence': 0.1}},
+            confidence=0.6
+        )
+
+        filtered, stats = precision_filter.filter_dependencies_with_stats(dependency_map, "print(users)")
+        expected = precision_filter.analyze_filter_effectiveness(dependency_map, filtered)
+
+        for category in ('variables', 'imports', 'overall'):
+            fused = dict(stats[category])
+            separate = dict(expected[category])
+            if category != 'overall':
+                assert sorted(fused.pop('filtered_items')) == sorted(separate.pop('filtered_items'))
+            assert fused == pytest.approx(separate)
+        assert stats['overall']['total_filtered'] == 3
+
+
+    def test_recommendations_flag_builtins_and_low_confidence(self, precision_filter):
+        dependency_map = DependencyMap(
+            variables={'print': {'confidence': 0.2}, 'len': {'confidence': 0.2}},
+            functions={'open': {'confidence': 0.2}}
+        )
+
+        recommendations = precision_filter.get_filter_recommendations(dependency_map, "")
+
+        assert len(recommendations) == 2
+        assert "3 nombres built-in" in recommendations[0]
+        assert "0.20" in recommendations[1]
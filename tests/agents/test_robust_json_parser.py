@@ -0,0 +1,212 @@
+"""
+Tests para RobustJSONParser - estrategias de recuperación de JSON de LLMs
+"""
+
+import pytest
+
+from src.snippets.agents import robust_json_parser
+from src.snippets.agents.robust_json_parser import (
+    IncrementalConfidenceScanner, ParseResult, RobustJSONParser
+)
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    # Ejercitar las estrategias propias aunque json_repair esté instalado
+    monkeypatch.setattr(robust_json_parser, "_json_repair_loads", None)
+    return RobustJSONParser()
+
+
+def _without_pattern_fallback(monkeypatch):
+    """Registra las estrategias llamadas y hace fallar la de patrones"""
+    calls = []
+
+    def spy(strategy):
+        def wrapper(text):
+            calls.append(strategy.__name__)
+            if strategy.__name__ == "_build_json_from_patterns":
+                raise ValueError("no patterns")
+            return strategy(text)
+        wrapper.__name__ = strategy.__name__
+        return wrapper
+
+    monkeypatch.setattr(RobustJSONParser, "_STRATEGIES",
+                        tuple(spy(strategy) for strategy in RobustJSONParser._STRATEGIES))
+    return calls
+
+class TestRobustJSONParser:
+
+    def test_valid_json_uses_direct_parsing(self, parser):
+        result = parser.parse('{"variables": {"x": {"defined_in_snippet": 1}}}')
+
+        assert result.success
+        assert result.method_used == "direct_parsing"
+        assert result.data["variables"]["x"]["defined_in_snippet"] == 1
+
+    def test_markdown_block_with_trailing_comma(self, parser):
+        result = parser.parse('```json\n{"variables": {"x": {"defined_in_snippet": 1}},}\n```')
+
+        assert result.success
+        assert result.data["variables"]["x"]["defined_in_snippet"] == 1
+
+    def test_python_literals_and_explanation_text(self, parser):
+        result = parser.parse("Here is the JSON: {'ok': True, 'missing': None}")
+
+        assert result.success
+        assert result.data == {"ok": True, "missing": None}
+
+    def test_unparseable_content_yields_empty_structure(self, parser):
+        result = parser.parse("no json here at all")
+
+        assert result.method_used.endswith("_build_json_from_patterns")
+        assert result.data["variables"] == {}
+        assert result.data["overall_confidence"] == 0.0
+
+    def test_pattern_fallback_fills_every_section_from_one_scan(self, parser):
+        result = parser.parse('broken: "x": {"defined_in_snippet": 2 "overall_confidence": 0.4')
+
+        assert result.method_used.endswith("_build_json_from_patterns")
+        for section in ("variables", "classes", "imports", "functions"):
+            assert result.data[section] == {"x": {"defined_in_snippet": 2, "confidence": 0.5}}
+        assert result.data["overall_confidence"] == pytest.approx(0.4)
+        result.data["variables"].clear()
+        assert result.data["classes"]
+
+
+    def test_llm_error_fixes_leave_string_contents_alone(self, parser):
+        result = parser.parse("{\"link\": \"http://a.io\", \"note\": \"None yet\", 'ok': True} // end")
+
+        assert result.success
+        assert result.data["link"] == "http://a.io"
+        assert result.data["note"] == "None yet"
+        assert result.data["ok"] is True
+
+    @pytest.mark.parametrize("content, method", [
+        ('```json\n{"a": 1}\n```', "strategy_1__extract_json_blocks"),
+        ('{"a": 1,}', "strategy_3__fix_trailing_commas"),
+        ('Sure! {"a": 1}', "strategy_2__fix_common_llm_errors"),
+    ])
+    def test_prefix_selects_the_first_strategy_to_try(self, parser, monkeypatch, content, method):
+        calls = []
+
+        def spy(strategy):
+            def wrapper(text):
+                calls.append(strategy.__name__)
+                return strategy(text)
+            wrapper.__name__ = strategy.__name__
+            return wrapper
+
+        monkeypatch.setattr(RobustJSONParser, "_STRATEGIES",
+                            tuple(spy(strategy) for strategy in RobustJSONParser._STRATEGIES))
+
+        result = parser.parse(content)
+
+        assert result.method_used == method
+        assert calls == [method.split("_", 2)[2]]
+
+    def test_json_repair_is_used_when_available(self, parser, monkeypatch):
+        repaired = {"variables": {"a": {"defined_in_snippet": 1}}, "overall_confidence": 0.7}
+        monkeypatch.setattr(robust_json_parser, "_json_repair_loads", lambda text: repaired)
+
+        result = parser.parse('broken: {"variables": {"a": {"defined_in_snippet": 1 "x"')
+
+        assert result.success
+        assert result.method_used == "json_repair"
+        assert result.data == repaired
+
+    def test_json_repair_runs_after_targeted_strategies(self, parser, monkeypatch):
+        calls = []
+        monkeypatch.setattr(robust_json_parser, "_json_repair_loads", lambda text: calls.append(text))
+
+        result = parser.parse('```json\n{"variables": {}, "overall_confidence": 0.5}\n```')
+
+        assert result.method_used == "strategy_1__extract_json_blocks"
+        assert calls == []
+
+    @pytest.mark.parametrize("repaired", [
+        {"defined_in_snippet": 2, "overall_confidence": 0.4},
+        {"variables": {}, "overall_confidence": None},
+        {"variables": ["x"]},
+    ])
+    def test_json_repair_results_without_dependency_schema_are_rejected(self, parser, monkeypatch, repaired):
+        monkeypatch.setattr(robust_json_parser, "_json_repair_loads", lambda text: repaired)
+
+        result = parser.parse('broken: "x": {"defined_in_snippet": 2 "overall_confidence": 0.4')
+
+        assert result.method_used.endswith("_build_json_from_patterns")
+        assert "x" in result.data["variables"]
+
+    def test_empty_json_repair_result_falls_back_to_strategies(self, parser, monkeypatch):
+        monkeypatch.setattr(robust_json_parser, "_json_repair_loads", lambda text: "")
+
+        result = parser.parse("no json here at all")
+
+        assert result.method_used.endswith("_build_json_from_patterns")
+
+    def test_repeated_repairs_are_cached_but_results_are_independent(self, parser):
+        content = "{'variables': {'x': {'defined_in_snippet': 1}}}"
+
+        first = parser.parse(content)
+        first.data["variables"].clear()
+        first.errors.append("mutated")
+        second = parser.parse(content)
+
+        assert second.data["variables"] == {"x": {"defined_in_snippet": 1}}
+        assert second.errors == []
+        assert parser.cache_info().hits == 1
+
+    def test_json5_fallback_reuses_cleaned_content(self, parser, monkeypatch):
+        pytest.importorskip("json5")
+        calls = _without_pattern_fallback(monkeypatch)
+
+        result = parser.parse("{a: 1}")
+
+        assert result.method_used.startswith("json5_")
+        assert result.data == {"a": 1}
+        assert len(calls) == len(set(calls)) == len(RobustJSONParser._STRATEGIES)
+
+    def test_missing_json5_falls_back_to_empty_structure(self, parser, monkeypatch):
+        monkeypatch.setattr(robust_json_parser, "json5", None)
+        _without_pattern_fallback(monkeypatch)
+
+        result = parser.parse("{a: 1}")
+
+        assert result.method_used == "fallback_empty"
+
+    def test_parsing_stats_count_methods_and_successes(self, parser):
+        failed = ParseResult(success=False, data={}, method_used="fallback_empty", original_content="")
+        results = [parser.parse('{"a": 1}'), parser.parse('{"b": 2}'), failed]
+
+        stats = parser.get_parsing_stats(results)
+
+        assert stats['total_attempts'] == 3
+        assert stats['successful_parses'] == 2
+        assert stats['methods_breakdown']['direct_parsing'] == 2
+        assert stats['most_successful_method'] == "direct_parsing"
+        assert parser.get_parsing_stats([]) == {}
+
+    def test_fix_quotes_normalizes_key_value_separators(self, parser):
+        content = '{"a":   "x\\ny", "b":"", "n": 1}'
+
+        assert parser._fix_quotes(content) == '{"a": "x\\ny", "b": "", "n": 1}'
+
+    @pytest.mark.parametrize("content, expected", [
+        ('Result: {"a": {"b": "}{"}} trailing', '{"a": {"b": "}{"}}'),
+        ('{"a": {"b": 1', '{"a": {"b": 1}}'),
+        ('{"a": "cut \\" off', '{"a": "cut \\" off"}'),
+        ('no braces', 'no braces'),
+    ])
+    def test_partial_json_tracks_braces_outside_strings(self, parser, content, expected):
+        assert parser._extract_partial_json(content) == expected
+
+
+class TestIncrementalConfidenceScanner:
+
+    def test_confidence_split_across_chunks(self):
+        scanner = IncrementalConfidenceScanner()
+        chunks = ['{"variables": {"x": {"confidence": 0.2}}, "overall_conf', 'idence": 0.', '87', ', "imports": {}}']
+
+        found = [scanner.feed(chunk) for chunk in chunks]
+
+        assert found == [None, None, None, pytest.approx(0.87)]
+        assert scanner.feed('}') is None
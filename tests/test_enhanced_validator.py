@@ -28,6 +28,8 @@ class TestEnhancedValidator:
         # Verificar configuración
         assert validator.enable_agents is False
         assert not hasattr(validator, 'context_analyzer')
+        assert validator.agents_status == 'disabled'
+        assert validator.ensure_agents() is False
         
         # Las estadísticas deben estar inicializadas
         stats = validator.get_stats()
@@ -91,6 +93,50 @@ class TestEnhancedValidator:
             # Estadísticas
             stats = validator.get_stats()
             assert stats['agents_enabled'] is True
+            
+            # Pendientes hasta el primer uso; consultarlos no los crea
+            assert stats['agents_status'] == 'pending'
+            assert validator.context_analyzer is None
+            assert not mock_llm.called
+            
+            assert validator.ensure_agents() is True
+            assert validator.context_analyzer is mock_analyzer.return_value
+            assert validator.get_stats()['agents_status'] == 'ready'
+    
+    @pytest.mark.asyncio
+    async def test_llm_agents_are_created_on_first_llm_analysis(self):
+        """Test de inicialización diferida del cliente LLM"""
+        with patch('src.snippets.enhanced_validator.get_llm_client') as mock_llm, \
+             patch('src.snippets.enhanced_validator.ContextAnalyzer') as mock_analyzer_class:
+            mock_analyzer_class.return_value = AsyncMock()
+            mock_analyzer_class.return_value.analyze.return_value = AgentResult(
+                success=False, confidence=0.0, data={}
+            )
+
+            validator = EnhancedValidator(enable_agents=True)
+            assert not mock_llm.called
+
+            await validator.validate_single("x = 1", 0, ["x = 1"])
+            assert not mock_llm.called
+
+            await validator.validate_single("print(y)", 0, ["print(y)"])
+            await validator.validate_single("print(z)", 0, ["print(z)"])
+            assert mock_llm.call_count == 1
+            assert validator.stats['llm_analyses'] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_lazy_init_falls_back_to_heuristics(self):
+        """Test de que un fallo al crear el cliente LLM desactiva los agentes"""
+        with patch('src.snippets.enhanced_validator.get_llm_client',
+                   side_effect=RuntimeError("no API key")):
+            validator = EnhancedValidator(enable_agents=True)
+
+            result = await validator.validate_single("print(y)", 0, ["print(y)"])
+
+        assert result.llm_analysis_used is False
+        assert validator.enable_agents is False
+        assert not hasattr(validator, 'context_analyzer')
+        assert validator.agents_status == 'disabled'
     
     @pytest.mark.asyncio
     async def test_enhanced_validator_llm_analysis_success(self):
@@ -334,6 +380,49 @@ class TestEnhancedValidator:
         assert 'def helper(): return 42' in context
         assert 'class Test: pass' in context
     
+    def test_context_skips_out_of_range_and_empty_definitions(self):
+        """Test de que el contexto omite índices fuera de rango y definiciones vacías"""
+        validator = EnhancedValidator(enable_agents=False)
+        from src.snippets.agents import Snippet
+        snippets = [Snippet("x = 1", 0)]
+
+        dependencies = {
+            'variables': {
+                'x': {'defined_in_snippet': 0, 'definition': 'x = 1'},
+                'y': {'defined_in_snippet': 5, 'definition': 'y = 2'},
+                'z': {'defined_in_snippet': None, 'definition': 'z = 3'},
+            },
+            'imports': {'os': {'defined_in_snippet': 0, 'import_statement': 'import os'}},
+            'functions': {'f': {'defined_in_snippet': 0}},
+        }
+
+        context = validator._build_context_from_dependencies(dependencies, snippets)
+
+        assert context == 'import os\nx = 1'
+        assert validator._build_context_from_dependencies({'functions': {}}, snippets) is None
+
+    def test_context_ignores_malformed_llm_entries(self):
+        """Test de que entradas con tipos inesperados no rompen el contexto"""
+        validator = EnhancedValidator(enable_agents=False)
+        from src.snippets.agents import Snippet
+        snippets = [Snippet("x = 1", 0), Snippet("y = 2", 1)]
+
+        dependencies = {
+            'variables': {
+                'x': None,
+                'y': {'defined_in_snippet': "1", 'definition': 'y = 2'},
+                'z': {'defined_in_snippet': -1, 'definition': 'z = 3'},
+                'w': {'defined_in_snippet': True, 'definition': 'w = 4'},
+                'v': {'defined_in_snippet': "uno", 'definition': 'v = 5'},
+            },
+            'imports': ['os'],
+            'functions': {'f': {'defined_in_snippet': 0, 'definition': ['def f(): pass']}},
+        }
+
+        context = validator._build_context_from_dependencies(dependencies, snippets)
+
+        assert context == 'y = 2'
+    
     def test_create_enhanced_validator_factory(self):
         """Test de la función factory"""
         validator = create_enhanced_validator(enable_agents=False, window_size=10)
@@ -385,6 +474,97 @@ class TestEnhancedValidator:
         assert result.final_result == enhanced_result_obj
         assert result.success_improved is True
 
+    @pytest.mark.asyncio
+    async def test_batch_llm_analyses_overlap_up_to_max_concurrency(self):
+        """Test de lote concurrente acotado por max_concurrency"""
+        running, peak = 0, 0
+
+        async def slow_analyze(snippet, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return AgentResult(success=False, confidence=0.0, data={})
+
+        failing = ValidationResult(status='runtime_error', details='NameError',
+                                   stdout='', stderr='', classification={'has_code': True})
+
+        with patch('src.snippets.enhanced_validator.get_llm_client') as mock_llm, \
+             patch('src.snippets.enhanced_validator.ContextAnalyzer') as mock_analyzer_class, \
+             patch('src.snippets.enhanced_validator.validate', return_value=failing):
+            mock_llm.return_value = Mock()
+            mock_analyzer_class.return_value = Mock(analyze=slow_analyze)
+
+            validator = EnhancedValidator(enable_agents=True, max_concurrency=3)
+            snippets = [f"print(v{i})" for i in range(7)]
+            results = await validator.validate_batch(snippets)
+
+        assert len(results) == 7
+        assert peak == 3
+        assert validator.stats['total_validations'] == 7
+        assert validator.stats['llm_analyses'] == 7
+
+    @pytest.mark.asyncio
+    async def test_local_validation_does_not_wait_for_llm_slots(self):
+        """Test de que los snippets sin LLM no ocupan el semáforo"""
+        release = asyncio.Event()
+
+        async def blocked_analyze(snippet, **kwargs):
+            await release.wait()
+            return AgentResult(success=False, confidence=0.0, data={})
+
+        with patch('src.snippets.enhanced_validator.get_llm_client') as mock_llm, \
+             patch('src.snippets.enhanced_validator.ContextAnalyzer') as mock_analyzer_class:
+            mock_llm.return_value = Mock()
+            mock_analyzer_class.return_value = Mock(analyze=blocked_analyze)
+
+            validator = EnhancedValidator(enable_agents=True, max_concurrency=1)
+            llm_task = asyncio.create_task(validator.validate_single("print(y)", 0, ["print(y)"]))
+            await asyncio.sleep(0)
+
+            result = await asyncio.wait_for(validator.validate_single("x = 1", 0, ["x = 1"]), timeout=1.0)
+            assert result.final_result.status == 'ok'
+
+            release.set()
+            assert (await llm_task).llm_analysis_used is True
+
+    @pytest.mark.asyncio
+    async def test_snippet_objects_are_built_once_per_batch(self):
+        """Test de que el lote no reconstruye los Snippet por cada elemento"""
+        from src.snippets.agents import Snippet
+
+        seen = []
+
+        async def analyze(snippet, all_snippets, **kwargs):
+            seen.append(all_snippets)
+            return AgentResult(success=False, confidence=0.0, data={})
+
+        failing = ValidationResult(status='runtime_error', details='NameError',
+                                   stdout='', stderr='', classification={'has_code': True})
+
+        with patch('src.snippets.enhanced_validator.get_llm_client') as mock_llm, \
+             patch('src.snippets.enhanced_validator.ContextAnalyzer') as mock_analyzer_class, \
+             patch('src.snippets.enhanced_validator.validate', return_value=failing), \
+             patch('src.snippets.enhanced_validator.Snippet', wraps=Snippet) as snippet_class:
+            mock_llm.return_value = Mock()
+            mock_analyzer_class.return_value = Mock(analyze=analyze)
+
+            validator = EnhancedValidator(enable_agents=True)
+            snippets = [f"print(v{i})" for i in range(5)]
+            await validator.validate_batch(snippets)
+            assert snippet_class.call_count == 5
+
+            # Fuera de un lote no se reutiliza nada: una lista editada en su
+            # sitio no devuelve Snippet obsoletos
+            snippets[0] = "print(w0)"
+            await validator.validate_single(snippets[0], 0, snippets)
+            assert snippet_class.call_count == 10
+
+        assert all(objects is seen[0] for objects in seen[:5])
+        assert [s.content for s in seen[0]] == [f"print(v{i})" for i in range(5)]
+        assert seen[5][0].content == "print(w0)"
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
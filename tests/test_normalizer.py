@@ -81,3 +81,56 @@ def test_normalize_snippet_preserves_working_code():
     
     # Código simple no debe ser modificado
     assert normalized == code
+
+
+def test_detect_missing_imports_single_pass_matches_substring_checks():
+    """Detecta módulos usados sin importar, en el orden de la tabla"""
+    from src.snippets.normalizer import detect_missing_imports
+
+    code = "import math\nprint(sys.argv, math.sqrt(4), os.path.join('a'), random.choice([1]))\n"
+
+    assert detect_missing_imports(code) == ['random', 'os', 'sys']
+    assert detect_missing_imports("x = 1\n") == []
+
+
+def test_detect_undefined_names_deduplicates_and_skips_literals():
+    """Cada nombre aparece una vez y True/False/None no cuentan como clases"""
+    from src.snippets.normalizer import detect_undefined_names
+
+    names = detect_undefined_names("var1 + var1\nVehicle()\nVehicle (1)\nNone (x)\n")
+
+    assert sorted(names) == ['Vehicle', 'var1']
+
+
+def test_wrap_orphan_indent_keeps_indented_lines_and_blank_lines():
+    """Solo indenta las líneas sin indentar y conserva las líneas vacías"""
+    code = "    x = 1\n\ny = 2\n   \n"
+
+    assert wrap_orphan_indent(code) == (
+        "def snippet_function():\n    x = 1\n\n    y = 2\n\n\n\nsnippet_function()"
+    )
+
+
+def test_create_context_separates_imports_and_variables():
+    """Imports y variables van separados por una línea vacía"""
+    context = create_context(undefined_names=['edad', 'Vehicle'], missing_imports=['math'])
+
+    assert context == 'import math\n\nedad = 25\nclass Vehicle: pass\n'
+
+
+def test_orphan_indent_looks_only_at_first_code_line():
+    assert analyze_snippet('# comentario\n\n    x = 1\ny = 2')['has_orphan_indent'] is True
+    assert analyze_snippet('    # comentario\nx = 1\n    y = 2')['has_orphan_indent'] is False
+    assert analyze_snippet('  \t x = 1')['has_orphan_indent'] is False
+    assert analyze_snippet('# solo comentarios\n   \n')['has_orphan_indent'] is False
+
+
+def test_cached_analysis_returns_independent_results():
+    code = 'print(var1)'
+
+    first = analyze_snippet(code)
+    first['undefined_names'].append('mutated')
+
+    assert analyze_snippet(code)['undefined_names'] == ['var1']
+    assert create_context(['var1'], ['math']) == create_context(('var1',), ('math',))
+    assert create_context() == ''
@@ -66,3 +66,44 @@ def test_parse_with_problematic_formatting(tmp_path):
     assert '\r' not in content
     assert "    print('hello')" in content
     assert "        print('indented')" in content
+
+
+def test_parse_trims_trailing_blanks_and_ignores_preamble(tmp_path):
+    content = (
+        "print('preamble')\n"
+        "  # Indented title\n"
+        "x = 1\n\n   \n"
+        "# Last\n"
+    )
+    p = tmp_path / 'ref.py'
+    p.write_text(content, encoding='utf-8')
+
+    strict = parse_snippets(str(p), strict=True)
+    assert [(s.title, s.start_line, s.end_line, s.content) for s in strict] == [('Last', 6, 6, '')]
+
+    loose = parse_snippets(str(p), strict=False)
+    assert [(s.index, s.title, s.start_line, s.end_line, s.content) for s in loose] == [
+        (1, 'Indented title', 2, 3, 'x = 1\n'),
+        (2, 'Last', 6, 6, ''),
+    ]
+
+
+def test_normalize_content_returns_clean_input_unchanged():
+    content = "print('ok')\n    x = 1\n"
+    assert normalize_content(content) is content
+
+
+def test_repeated_titles_and_bodies_share_strings(tmp_path):
+    p = tmp_path / 'ref.py'
+    p.write_text("# ejercicio\nx = 1\n# ejercicio\nx = 1\n# otro\ny = 2\n", encoding='utf-8')
+
+    first, second, third = parse_snippets(str(p))
+
+    assert first.title is second.title
+    assert first.content is second.content
+    assert not hasattr(first, '__dict__')
+    assert third.content == 'y = 2\n'
+
+
+def test_normalize_content_handles_lone_carriage_returns():
+    assert normalize_content("a\rb\r\nc\r") == "a\nb\nc\n"
@@ -0,0 +1,32 @@
+import io
+import json
+
+from src.snippets.reporter import to_json_report, write_json_report
+
+
+def test_streamed_json_report_matches_in_memory_report():
+    results = [
+        {'index': 1, 'title': 'Título', 'status': 'ok', 'classification': {'has_code': True}},
+        {'index': 2, 'title': 'B', 'status': 'runtime_error', 'details': 'ValueError: x'},
+    ]
+    buf = io.StringIO()
+
+    write_json_report(results, buf)
+
+    assert buf.getvalue() == to_json_report(results)
+    assert json.loads(buf.getvalue()) == {'results': results}
+    assert 'Título' in buf.getvalue()
+
+
+def test_markdown_summary_counts_statuses_and_lists_first_failures():
+    from src.snippets.reporter import to_markdown_summary
+
+    results = [{'index': i, 'title': f't{i}', 'status': 'timeout', 'details': 'd'} for i in range(7)]
+    results += [{'index': 7, 'status': 'ok'}, {'index': 8}]
+
+    summary = to_markdown_summary(results)
+
+    assert summary.splitlines()[:5] == ['# Snippets Report', '- Total: 9', '- ok: 1',
+                                        '- timeout: 7', '- unknown: 1']
+    assert summary.count('-> timeout') == 5
+    assert '#4 t4' in summary and '#5 t5' not in summary
@@ -31,3 +31,181 @@ def test_classification_flags():
     cls = classify(code)
     assert cls['has_code'] is True
     assert cls['has_imports'] is True
+
+
+def test_classification_flags_from_single_pass():
+    code = "# comment\n    from os import path\nopen('f', 'w')\nsocket.socket()\n"
+    cls = classify(code)
+    assert cls == {
+        'has_code': True,
+        'uses_input': False,
+        'has_imports': True,
+        'writes_file': True,
+        'uses_network': True,
+        'dangerous_calls': False,
+    }
+    assert classify("# solo comentarios\n\n")['has_code'] is False
+
+
+def test_line_flags_only_match_at_line_start():
+    cls = classify("x = 1  # import os\nimportar = 2\n    \t# from x\n")
+    assert (cls['has_code'], cls['has_imports']) == (True, False)
+    assert classify("   \n\t# import os\n") == classify("")
+
+
+def test_repeated_snippets_reuse_compiled_code():
+    from src.snippets.validator import _compile_snippet
+
+    code = "total_compiled = 40 + 2\nprint(total_compiled)\n"
+    first = validate(code)
+    hits = _compile_snippet.cache_info().hits
+    second = validate(code)
+
+    assert first.status == second.status == 'ok'
+    assert second.stdout == '42\n'
+    # La comprobación de sintaxis y la ejecución comparten el code object
+    assert _compile_snippet.cache_info().hits == hits + 1
+
+
+def test_compile_time_errors_are_syntax_errors():
+    res = validate("return 1\n", normalize=False)
+    assert res.status == 'syntax_error'
+
+
+def test_infinite_loop_times_out():
+    res = validate("while True:\n    pass\n", timeout_sec=0.2)
+    assert res.status == 'timeout'
+
+
+def test_timeout_is_not_swallowed_by_snippet_handlers():
+    code = "import time\nwhile True:\n    try:\n        time.sleep(1)\n    except Exception:\n        pass\n"
+    res = validate(code, timeout_sec=0.2)
+    assert res.status == 'timeout'
+
+
+def test_timeout_is_not_swallowed_by_bare_except():
+    import time
+
+    # Un except desnudo captura la alarma: el plazo lo impone el hilo de respaldo
+    code = "import time\nfor _ in range(4):\n    try:\n        time.sleep(0.1)\n    except:\n        pass\n"
+    assert validate(code, timeout_sec=0.2).status == 'timeout'
+    # y capturarla una sola vez no convierte el timeout en 'ok'
+    code = "import time\ntry:\n    time.sleep(0.4)\nexcept BaseException:\n    print('caught')\n"
+    assert validate(code, timeout_sec=0.2).status == 'timeout'
+    # Los hilos abandonados mantienen stdout redirigido hasta que terminan
+    time.sleep(0.5)
+
+
+def test_alarm_caught_by_runner_still_counts_as_timeout():
+    import time
+
+    from src.snippets.validator import _run_with_alarm
+
+    def swallowing_runner():
+        try:
+            time.sleep(0.4)
+        except BaseException:
+            pass
+
+    assert _run_with_alarm(swallowing_runner, 0.1) is False
+    assert _run_with_alarm(lambda: None, 0.1) is True
+
+
+def test_system_exit_is_reported_not_raised():
+    import pytest
+
+    assert validate("import sys\nsys.exit(0)\n").status == 'ok'
+    res = validate("import sys\nsys.exit(2)\n")
+    assert res.status == 'runtime_error'
+    assert res.details.startswith('SystemExit')
+    # Un Ctrl-C no se convierte en resultado: debe poder interrumpir el lote
+    with pytest.raises(KeyboardInterrupt):
+        validate("raise KeyboardInterrupt\n")
+
+
+def test_alarm_resumes_callers_interval_timer():
+    import signal
+
+    previous = signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 30)
+        assert validate("x = 1\n").status == 'ok'
+        remaining, _ = signal.getitimer(signal.ITIMER_REAL)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    assert 29 < remaining <= 30
+
+
+def test_thread_fallback_outside_main_thread():
+    from concurrent.futures import ThreadPoolExecutor
+
+    import time
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        res = pool.submit(validate, "import time\ntime.sleep(0.3)\n", 0.1).result()
+    assert res.status == 'timeout'
+    # El hilo abandonado mantiene stdout redirigido hasta que termina
+    time.sleep(0.4)
+
+
+def test_valid_snippets_are_compiled_once():
+    from src.snippets.validator import _compile_snippet
+
+    before = _compile_snippet.cache_info()
+    res = validate("probe_value = 7 * 6\n")
+    after = _compile_snippet.cache_info()
+
+    assert res.status == 'ok'
+    assert (after.misses - before.misses, after.hits - before.hits) == (1, 0)
+
+
+def test_no_code_and_unnormalizable_snippets_skip_extra_compiles(monkeypatch):
+    from src.snippets import validator
+
+    calls = []
+    compile_snippet = validator._compile_snippet
+    monkeypatch.setattr(validator, '_compile_snippet', lambda code: calls.append(code) or compile_snippet(code))
+
+    assert validate("# solo comentarios\n").status == 'no_code'
+    assert calls == []
+
+    res = validate("def f(:\n")
+    assert res.status == 'syntax_error'
+    assert calls == ["def f(:\n"]
+
+
+def test_sandbox_blocks_writes_without_patching_builtins():
+    import builtins
+
+    original_open = builtins.open
+    res = validate("open('sandbox_probe.txt', 'w')\n")
+
+    assert res.status == 'runtime_error'
+    assert 'PermissionError' in res.details
+    assert builtins.open is original_open
+    assert validate("x = input('name: ')\nprint(repr(x))\n").stdout == "''\n"
+
+
+def test_sandbox_blocks_writes_through_builtins_module(tmp_path):
+    target = tmp_path / 'probe.txt'
+
+    for code in (f"import builtins\nbuiltins.open({str(target)!r}, 'w')\n",
+                 f"from builtins import open as o\no({str(target)!r}, 'a')\n",
+                 f"__import__('builtins').open({str(target)!r}, 'w')\n"):
+        res = validate(code)
+        assert res.status == 'runtime_error'
+        assert 'PermissionError' in res.details
+    assert not target.exists()
+    assert validate("import builtins, math\nprint(builtins.len('ab'), math.floor(1.5))\n").stdout == '2 1\n'
+
+
+def test_validate_many_matches_serial_validation_in_order():
+    from src.snippets.validator import validate_many
+
+    codes = ["print('a')\n", "raise ValueError('x')\n", "def f(:\n", "# nada\n"]
+
+    parallel = validate_many(codes, workers=2, chunksize=1)
+
+    assert [r.status for r in parallel] == ['ok', 'runtime_error', 'syntax_error', 'no_code']
+    assert parallel == validate_many(codes, workers=1)
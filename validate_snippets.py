@@ -5,8 +5,8 @@ from pathlib import Path
 from typing import Any, Dict
 
 from src.snippets.parser import parse_snippets, to_dict
-from src.snippets.validator import validate
-from src.snippets.reporter import to_json_report, to_markdown_summary
+from src.snippets.validator import validate_many
+from src.snippets.reporter import to_markdown_summary, write_json_report
 
 
 def main():
@@ -17,6 +17,7 @@ def main():
     parser.add_argument('--no-normalize', dest='normalize', action='store_false', help='Disable normalization')
     parser.add_argument('--out', help='Path to write JSON report')
     parser.add_argument('--md', help='Path to write Markdown summary')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for validation (default: CPU count)')
     args = parser.parse_args()
 
     src = Path(args.file)
@@ -25,9 +26,10 @@ def main():
 
     snippets = parse_snippets(str(src), strict=True if args.strict else True)
 
+    validations = validate_many([sn.content for sn in snippets], normalize=args.normalize, workers=args.workers)
+
     results = []
-    for sn in snippets:
-        vr = validate(sn.content, normalize=args.normalize)
+    for sn, vr in zip(snippets, validations):
         item: Dict[str, Any] = {
             'index': sn.index,
             'title': sn.title,
@@ -40,7 +42,8 @@ def main():
         results.append(item)
 
     if args.out:
-        Path(args.out).write_text(to_json_report(results), encoding='utf-8')
+        with open(args.out, 'w', encoding='utf-8') as fp:
+            write_json_report(results, fp)
     if args.md:
         Path(args.md).write_text(to_markdown_summary(results), encoding='utf-8')
 